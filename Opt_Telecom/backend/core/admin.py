@@ -1,6 +1,6 @@
 # backend/core/admin.py
 from django.contrib import admin
-from .models import Profesor, Materia, Aula, Horario, Restriccion, SolicitudClase, VersionHorario
+from .models import Profesor, Materia, Aula, Horario, Restriccion, ResumenNomina, SolicitudClase, VersionHorario
 
 # Registra tus modelos aquí para que sean visibles y gestionables en el panel de administración
 admin.site.register(Profesor)
@@ -10,6 +10,7 @@ admin.site.register(Horario)
 admin.site.register(Restriccion)
 admin.site.register(SolicitudClase)  # <-- Asegúrate de que esta línea esté
 admin.site.register(VersionHorario)  # <-- Y esta también
+admin.site.register(ResumenNomina)
 
 
 # Opcional: Puedes personalizar cómo se muestran los modelos en el admin
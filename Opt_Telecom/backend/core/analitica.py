@@ -0,0 +1,175 @@
+# backend/core/analitica.py
+"""
+Reportes de uso para los tableros: ocupación de aulas (aula x día x hora), distribución de la
+carga de los profesores frente a su carga máxima y horas por carrera y tipo de clase.
+
+Los totales salen de agregados SQL (GROUP BY + Sum de duracion_en_minutos) y NumPy hace el
+resto (reparto por hora, histogramas, percentiles). Cada reporte se guarda en la caché con
+las versiones de las colecciones de las que depende, así que un tablero se sirve desde la
+caché hasta que cambia un horario del período (o los catálogos de profesores/aulas).
+"""
+from urllib.parse import quote
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .colecciones import versiones_colecciones
+from .grilla import DIAS_LABORABLES
+from .importacion import MINUTOS_POR_DIA, time_a_minutos
+from .models import Aula, Horario, Profesor, duracion_en_minutos
+from .nomina import SIN_TIPO
+
+TIEMPO_CACHE = 60 * 60 * 24
+
+# Tramos de carga asignada / carga máxima para el histograma (el último es "sobrecarga").
+TRAMOS_CARGA = [0.0, 0.25, 0.5, 0.75, 1.0]
+
+SIN_CARRERA = 'Sin carrera'
+
+
+def ocupacion_aulas(periodo, dias=DIAS_LABORABLES, desde=7, hasta=22):
+    """
+    Mapa de calor de minutos ocupados por aula, día y hora (desde..hasta), más la
+    utilización de cada aula sobre esa ventana semanal.
+    """
+    aulas = list(Aula.objects.order_by('codigo').values_list('id', 'codigo'))
+    posicion_aula = {aula_id: i for i, (aula_id, _) in enumerate(aulas)}
+    posicion_dia = {dia: i for i, dia in enumerate(dias)}
+    # Bloques distintos con su número de repeticiones (normalmente 1 por aula y franja).
+    bloques = list(
+        Horario.objects.filter(periodo_academico=periodo, dia__in=dias).order_by()
+        .values_list('aula_id', 'dia', 'hora_inicio', 'hora_fin').annotate(veces=Count('id'))
+    )
+    horas = np.arange(desde, hasta)
+    minutos = np.zeros((len(aulas), len(dias), len(horas)))
+    if bloques:
+        aula_idx = np.array([posicion_aula[b[0]] for b in bloques])
+        dia_idx = np.array([posicion_dia[b[1]] for b in bloques])
+        inicio = np.array([time_a_minutos(b[2]) for b in bloques])
+        fin = np.array([time_a_minutos(b[3]) for b in bloques])
+        # Un bloque que cruza la medianoche cuenta hasta el final de su día.
+        fin = np.where(fin <= inicio, MINUTOS_POR_DIA, fin)
+        veces = np.array([b[4] for b in bloques])
+        # Minutos de cada bloque dentro de cada hora: (bloques x horas).
+        solape = np.clip(np.minimum(fin[:, None], (horas + 1) * 60) - np.maximum(inicio[:, None], horas * 60), 0, 60)
+        np.add.at(minutos, (aula_idx, dia_idx), solape * veces[:, None])
+
+    disponibles = len(dias) * len(horas) * 60
+    ocupados = minutos.sum(axis=(1, 2))
+    return {
+        'periodo_academico': periodo,
+        'dias': list(dias),
+        'horas': [f'{h:02d}:00' for h in horas],
+        'aulas': [
+            {
+                'id': aula_id, 'codigo': codigo,
+                'horas_ocupadas': round(float(ocupados[i]) / 60, 2),
+                'utilizacion': round(float(ocupados[i]) / disponibles, 4) if disponibles else 0.0,
+                # Fracción ocupada de cada hora (día x hora).
+                'mapa': np.round(minutos[i] / 60, 3).tolist(),
+            }
+            for i, (aula_id, codigo) in enumerate(aulas)
+        ],
+        'utilizacion_promedio': round(float(ocupados.mean()) / disponibles, 4) if aulas and disponibles else 0.0,
+        'ocupacion_por_dia_hora': np.round(minutos.sum(axis=0) / 60, 3).tolist(),
+    }
+
+
+def carga_profesores(periodo):
+    """Horas semanales asignadas por profesor frente a carga_horaria_maxima, con su distribución."""
+    filas = list(
+        Profesor.objects.order_by('apellido', 'nombre')
+        .values_list('id', 'nombre', 'apellido', 'carga_horaria_maxima')
+        .annotate(minutos=Coalesce(Sum(
+            duracion_en_minutos('horarios_asignados__'),
+            filter=Q(horarios_asignados__periodo_academico=periodo),
+        ), 0))
+    )
+    horas = np.array([fila[4] for fila in filas], dtype=float) / 60
+    maximas = np.array([fila[3] or 0 for fila in filas], dtype=float)
+    proporcion = np.divide(horas, maximas, out=np.full_like(horas, np.nan), where=maximas > 0)
+
+    con_maxima = proporcion[~np.isnan(proporcion)]
+    conteos, _ = np.histogram(con_maxima, bins=TRAMOS_CARGA + [np.inf])
+    tramos = [f'{int(a * 100)}-{int(b * 100)}%' for a, b in zip(TRAMOS_CARGA, TRAMOS_CARGA[1:])] + ['>100%']
+
+    def estadistica(funcion):
+        return round(float(funcion(horas)), 2) if len(horas) else 0.0
+
+    return {
+        'periodo_academico': periodo,
+        'total_profesores': len(filas),
+        'horas_totales': round(float(horas.sum()), 2),
+        'estadisticas': {
+            'promedio': estadistica(np.mean),
+            'mediana': estadistica(np.median),
+            'desviacion': estadistica(np.std),
+            'p90': estadistica(lambda v: np.percentile(v, 90)),
+            'maximo': estadistica(np.max),
+        },
+        'distribucion': dict(zip(tramos, conteos.tolist())),
+        'sin_carga_maxima': int(np.isnan(proporcion).sum()),
+        'profesores': [
+            {
+                'id': pk, 'nombre': f'{nombre} {apellido}', 'carga_horaria_maxima': maxima,
+                'carga_horaria_asignada': round(float(horas[i]), 2),
+                'proporcion': None if np.isnan(proporcion[i]) else round(float(proporcion[i]), 4),
+                'sobrecargado': bool(proporcion[i] > 1) if not np.isnan(proporcion[i]) else False,
+            }
+            for i, (pk, nombre, apellido, maxima, _) in enumerate(filas)
+        ],
+    }
+
+
+def horas_por_carrera(periodo):
+    """Tabla carrera x tipo de clase con las horas semanales programadas."""
+    # NULL y '' se agrupan bajo una misma etiqueta (igual que en la nómina).
+    filas = [
+        (carrera or SIN_CARRERA, tipo or SIN_TIPO, minutos)
+        for carrera, tipo, minutos in Horario.objects.filter(periodo_academico=periodo).order_by()
+        .values_list('carrera_programa', 'tipo_clase').annotate(minutos=Sum(duracion_en_minutos()))
+    ]
+    carreras = sorted({fila[0] for fila in filas})
+    tipos = sorted({fila[1] for fila in filas})
+    tabla = np.zeros((len(carreras), len(tipos)))
+    if filas:
+        indice_carrera = {c: i for i, c in enumerate(carreras)}
+        indice_tipo = {t: i for i, t in enumerate(tipos)}
+        np.add.at(
+            tabla,
+            ([indice_carrera[f[0]] for f in filas], [indice_tipo[f[1]] for f in filas]),
+            np.array([f[2] for f in filas], dtype=float) / 60,
+        )
+    return {
+        'periodo_academico': periodo,
+        'carreras': carreras,
+        'tipos_clase': tipos,
+        'horas': np.round(tabla, 2).tolist(),
+        'total_por_carrera': dict(zip(carreras, np.round(tabla.sum(axis=1), 2).tolist())),
+        'total_por_tipo': dict(zip(tipos, np.round(tabla.sum(axis=0), 2).tolist())),
+        'total': round(float(tabla.sum()), 2),
+    }
+
+
+# reporte -> (función, colecciones de las que depende)
+REPORTES = {
+    'ocupacion-aulas': (ocupacion_aulas, ('horarios', 'aulas')),
+    'carga-profesores': (carga_profesores, ('horarios', 'profesores')),
+    'horas-carrera': (horas_por_carrera, ('horarios',)),
+}
+
+
+def obtener_reporte(nombre, periodo, **opciones):
+    """Devuelve (reporte, desde_cache)."""
+    funcion, colecciones = REPORTES[nombre]
+    versiones = versiones_colecciones(colecciones, periodo=periodo)
+    partes = [quote(str(periodo), safe='')] + [f'{k}={quote(str(v), safe="")}' for k, v in sorted(opciones.items())]
+    clave = f"analitica:{nombre}:{':'.join(partes)}:v{'.'.join(map(str, versiones))}"
+    reporte = cache.get(clave)
+    if reporte is not None:
+        return reporte, True
+    reporte = funcion(periodo, **opciones)
+    cache.set(clave, reporte, TIEMPO_CACHE)
+    return reporte, False
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Conecta los receptores que invalidan las cachés (grillas) al modificar los modelos.
+        from . import signals  # noqa: F401
@@ -0,0 +1,71 @@
+# backend/core/colecciones.py
+"""
+Contadores de versión por colección guardados en la caché de Django.
+
+Cada escritura confirmada incrementa la versión de su colección (y la de su período
+académico, para horarios y solicitudes). Los endpoints de lectura usan estas versiones
+para responder 304 a los sondeos sin cambios (ETag) y como parte de las claves de caché,
+sin consultar la base de datos.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Aula, Horario, Materia, Profesor, Restriccion, SolicitudClase, VersionHorario
+
+# modelo -> nombre de colección
+COLECCIONES = {
+    Profesor: 'profesores',
+    Materia: 'materias',
+    Aula: 'aulas',
+    Restriccion: 'restricciones',
+    Horario: 'horarios',
+    SolicitudClase: 'solicitudes',
+    VersionHorario: 'versiones',
+}
+
+# Colecciones que además llevan una versión por período académico.
+COLECCIONES_POR_PERIODO = {'horarios', 'solicitudes'}
+
+
+def leer_version(clave):
+    version = cache.get(clave)
+    if version is None:
+        # Si la versión se perdió (caché reiniciada o purgada) se parte de un valor nuevo basado
+        # en el reloj, nunca de 1, para no volver a apuntar a entradas viejas aún en la caché.
+        cache.add(clave, time.time_ns(), None)
+        version = cache.get(clave)
+    return version
+
+
+def incrementar_version(clave):
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.set(clave, time.time_ns(), None)
+
+
+def _clave_coleccion(nombre, periodo=None):
+    return f"coleccion:{nombre}:version" if periodo is None else f"coleccion:{nombre}:{periodo}:version"
+
+
+def versiones_colecciones(nombres, periodo=None):
+    """
+    Versiones actuales de las colecciones indicadas, en el mismo orden. Con `periodo` se usa la
+    versión por período de las colecciones que la tienen. Una sola lectura a la caché si todas existen.
+    """
+    claves = [
+        _clave_coleccion(nombre, periodo if nombre in COLECCIONES_POR_PERIODO else None)
+        for nombre in nombres
+    ]
+    encontradas = cache.get_many(claves)
+    return tuple(encontradas[clave] if clave in encontradas else leer_version(clave) for clave in claves)
+
+
+def marcar_cambio(nombre, periodos=()):
+    """Incrementa la versión de la colección (y de los períodos indicados) al confirmarse la transacción."""
+    claves = {_clave_coleccion(nombre)}
+    if nombre in COLECCIONES_POR_PERIODO:
+        claves |= {_clave_coleccion(nombre, periodo) for periodo in periodos if periodo}
+    transaction.on_commit(lambda: [incrementar_version(clave) for clave in claves])
@@ -0,0 +1,190 @@
+# backend/core/exportacion.py
+"""
+Exportación en streaming de horarios y solicitudes a CSV y XLSX.
+
+Las filas se leen con un cursor del lado del servidor (QuerySet.iterator) y se escriben a
+medida que llegan, así la memoria no depende del tamaño de la exportación y el primer byte
+sale de inmediato. El XLSX se arma a mano (un ZIP con el XML mínimo de una hoja, con
+cadenas en línea) porque openpyxl necesita tener el libro completo antes de guardarlo.
+"""
+import csv
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from django.utils.text import slugify
+
+TAMANO_LOTE = 2000
+
+# (encabezado, campo de values_list); 'profesor' se arma con nombre y apellido.
+COLUMNAS_HORARIO = [
+    ('ID', 'id'),
+    ('Período', 'periodo_academico'),
+    ('Carrera', 'carrera_programa'),
+    ('Día', 'dia'),
+    ('Hora Inicio', 'hora_inicio'),
+    ('Hora Fin', 'hora_fin'),
+    ('Materia', 'materia__nombre'),
+    ('Sección', 'seccion'),
+    ('Tipo de Clase', 'tipo_clase'),
+    ('Profesor', 'profesor'),
+    ('Aula', 'aula__codigo'),
+]
+
+COLUMNAS_SOLICITUD = COLUMNAS_HORARIO + [('Estado', 'estado')]
+
+
+def filas_exportacion(queryset, columnas):
+    """Genera las filas (listas de valores simples) en el orden de `columnas`, en lotes."""
+    campos = []
+    for _, campo in columnas:
+        campos += ['profesor__nombre', 'profesor__apellido'] if campo == 'profesor' else [campo]
+    for valores in queryset.values_list(*campos).iterator(chunk_size=TAMANO_LOTE):
+        registro = dict(zip(campos, valores))
+        fila = []
+        for _, campo in columnas:
+            if campo == 'profesor':
+                valor = f"{registro['profesor__nombre']} {registro['profesor__apellido']}"
+            else:
+                valor = registro[campo]
+                if hasattr(valor, 'strftime'):
+                    valor = valor.strftime('%H:%M')
+            fila.append(valor)
+        yield fila
+
+
+# --- CSV ---
+
+class _Eco:
+    """Objeto tipo archivo que devuelve lo escrito en lugar de guardarlo (para csv.writer)."""
+    def write(self, valor):
+        return valor
+
+
+def generar_csv(filas, encabezados):
+    escritor = csv.writer(_Eco())
+    # BOM para que Excel abra el archivo como UTF-8 (tildes y eñes).
+    yield '\ufeff' + escritor.writerow(encabezados)
+    for fila in filas:
+        yield escritor.writerow(['' if v is None else v for v in fila])
+
+
+# --- XLSX ---
+
+class _Salida:
+    """Destino no posicionable para zipfile: acumula lo escrito hasta que el generador lo retira."""
+    def __init__(self):
+        self.partes = []
+
+    def write(self, datos):
+        self.partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def retirar(self):
+        datos = b''.join(self.partes)
+        self.partes = []
+        return datos
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _workbook(nombre_hoja):
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(nombre_hoja[:31])}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    )
+
+
+# Caracteres de control que XML no admite (pueden venir de textos pegados desde otros sistemas).
+_CARACTERES_ILEGALES = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _celda(valor):
+    if valor is None:
+        return '<c/>'
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return f'<c><v>{valor}</v></c>'
+    texto = escape(_CARACTERES_ILEGALES.sub('', str(valor)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _fila_xml(valores):
+    return '<row>' + ''.join(_celda(v) for v in valores) + '</row>'
+
+
+def generar_xlsx(filas, encabezados, nombre_hoja='Horarios'):
+    salida = _Salida()
+    with zipfile.ZipFile(salida, 'w', zipfile.ZIP_DEFLATED) as libro:
+        libro.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        libro.writestr('_rels/.rels', _RELS)
+        libro.writestr('xl/workbook.xml', _workbook(nombre_hoja))
+        libro.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        yield salida.retirar()
+
+        with libro.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as hoja:
+            hoja.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                + _fila_xml(encabezados)
+            ).encode('utf-8'))
+            pendientes = []
+            for fila in filas:
+                pendientes.append(_fila_xml(fila))
+                if len(pendientes) >= 500:
+                    hoja.write(''.join(pendientes).encode('utf-8'))
+                    pendientes = []
+                    yield salida.retirar()
+            hoja.write((''.join(pendientes) + '</sheetData></worksheet>').encode('utf-8'))
+    yield salida.retirar()
+
+
+# --- Respuesta ---
+
+TIPOS_CONTENIDO = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def respuesta_filas(filas, encabezados, formato, nombre_archivo, titulo):
+    """Respuesta en streaming para cualquier generador de filas (listas de valores simples)."""
+    contenido = generar_xlsx(filas, encabezados, titulo) if formato == 'xlsx' else generar_csv(filas, encabezados)
+    response = StreamingHttpResponse(contenido, content_type=TIPOS_CONTENIDO[formato])
+    # El nombre puede incluir parámetros de la petición (ej. el período): se limpian comillas,
+    # ';' y saltos de línea para que no rompan ni agreguen cabeceras.
+    nombre_archivo = slugify(nombre_archivo) or 'exportacion'
+    response['Content-Disposition'] = content_disposition_header(True, f'{nombre_archivo}.{formato}')
+    return response
+
+
+def respuesta_exportacion(queryset, columnas, formato, nombre_archivo, titulo):
+    encabezados = [encabezado for encabezado, _ in columnas]
+    return respuesta_filas(filas_exportacion(queryset, columnas), encabezados, formato, nombre_archivo, titulo)
@@ -0,0 +1,95 @@
+# backend/core/filtros.py
+"""
+Filtros por parámetros de consulta compartidos por los endpoints de horarios y solicitudes.
+
+Todos los filtros admiten varios valores separados por coma (ej. ?dia=LUN,MAR).
+Las combinaciones habituales (período + profesor/aula/sección/carrera + día) están
+respaldadas por índices compuestos en Horario.Meta.indexes.
+"""
+from datetime import time
+
+from django.db.models import F, Q
+from rest_framework.exceptions import ValidationError
+
+# parámetro -> (campo del modelo, conversión)
+FILTROS_HORARIO = {
+    'profesor': ('profesor_id', int),
+    'aula': ('aula_id', int),
+    'materia': ('materia_id', int),
+    'seccion': ('seccion', str),
+    'dia': ('dia', str.upper),
+    'periodo_academico': ('periodo_academico', str),
+    'carrera_programa': ('carrera_programa', str),
+    'tipo_clase': ('tipo_clase', str),
+}
+
+# Las solicitudes admiten los mismos filtros más su estado (Pendiente, Asignada, ...).
+FILTROS_SOLICITUD = {**FILTROS_HORARIO, 'estado': ('estado', str)}
+
+
+def _valores(params, nombre, conversion):
+    crudo = params.get(nombre)
+    if crudo in (None, ''):
+        return []
+    try:
+        return [conversion(v.strip()) for v in str(crudo).split(',') if v.strip()]
+    except ValueError:
+        raise ValidationError({nombre: f"Valor no válido: '{crudo}'."})
+
+
+def _hora(params, nombre):
+    crudo = params.get(nombre)
+    if not crudo:
+        return None
+    try:
+        return time.fromisoformat(crudo)
+    except ValueError:
+        raise ValidationError({nombre: f"Hora no válida: '{crudo}'. Use el formato HH:MM."})
+
+
+def aplicar_filtros(queryset, params, filtros):
+    """Aplica los filtros de igualdad definidos en `filtros` presentes en `params`."""
+    for nombre, (campo, conversion) in filtros.items():
+        valores = _valores(params, nombre, conversion)
+        if len(valores) == 1:
+            queryset = queryset.filter(**{campo: valores[0]})
+        elif valores:
+            queryset = queryset.filter(**{f'{campo}__in': valores})
+    return queryset
+
+
+def filtro_rango_horas(desde=None, hasta=None):
+    """
+    Q de los bloques que se solapan con [desde, hasta): hora_inicio < hasta AND hora_fin > desde.
+    Los bloques que cruzan la medianoche (hora_fin < hora_inicio) ocupan [inicio, 24:00) y [00:00, fin).
+    """
+    normal = Q(hora_fin__gte=F('hora_inicio'))
+    cruza = Q(hora_fin__lt=F('hora_inicio'))
+    if desde is not None and hasta is not None:
+        return (normal & Q(hora_inicio__lt=hasta, hora_fin__gt=desde)) | (cruza & (Q(hora_inicio__lt=hasta) | Q(hora_fin__gt=desde)))
+    if hasta is not None:
+        return Q(hora_inicio__lt=hasta) | cruza
+    if desde is not None:
+        return Q(hora_fin__gt=desde) | cruza
+    return Q()
+
+
+def filtrar_horarios(queryset, params):
+    """
+    Filtra Horario por profesor, aula, materia, sección, día, período, carrera, tipo de clase
+    y rango horario (?desde=08:00&hasta=12:00 devuelve los bloques que se solapan con ese rango).
+    """
+    queryset = aplicar_filtros(queryset, params, FILTROS_HORARIO)
+    desde, hasta = _hora(params, 'desde'), _hora(params, 'hasta')
+    if desde is not None or hasta is not None:
+        queryset = queryset.filter(filtro_rango_horas(desde, hasta))
+    return queryset
+
+
+def filtrar_solicitudes(queryset, params):
+    """Filtra SolicitudClase por los mismos parámetros que los horarios más ?estado=."""
+    queryset = aplicar_filtros(queryset, params, FILTROS_SOLICITUD)
+    desde, hasta = _hora(params, 'desde'), _hora(params, 'hasta')
+    if desde is not None or hasta is not None:
+        queryset = queryset.filter(filtro_rango_horas(desde, hasta))
+    return queryset
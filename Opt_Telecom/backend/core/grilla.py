@@ -0,0 +1,173 @@
+# backend/core/grilla.py
+"""
+Grilla semanal precalculada (día x franja horaria) para el calendario del frontend.
+
+La grilla de un ámbito (profesor, aula, sección o carrera) dentro de un período se construye
+una vez y se guarda en la caché de Django. Cada ámbito tiene su propio número de versión en
+la caché; al modificarse un Horario solo se incrementan las versiones de los ámbitos a los que
+pertenecía antes y después del cambio, de modo que el resto de grillas sigue siendo válido.
+"""
+from functools import reduce
+from math import gcd
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .colecciones import incrementar_version, leer_version
+from .importacion import MINUTOS_POR_DIA, minutos_a_time, time_a_minutos
+from .models import Horario
+
+ORDEN_DIAS = [codigo for codigo, _ in Horario.DIA_CHOICES]
+DIAS_LABORABLES = ORDEN_DIAS[:5]
+
+# ámbito -> campos de Horario que lo identifican
+AMBITOS = {
+    'profesor': ('profesor_id',),
+    'aula': ('aula_id',),
+    'seccion': ('materia_id', 'seccion'),
+    'carrera': ('carrera_programa',),
+}
+
+PASO_POR_DEFECTO = 30
+PASO_MINIMO = 5
+TIEMPO_CACHE = 60 * 60 * 24
+
+
+def _clave_ambito(periodo, ambito, valores):
+    # Los valores se escapan para que la clave sea válida en cualquier backend (sin espacios).
+    partes = [quote(str(periodo), safe='')] + [quote(str(v), safe='') for v in valores]
+    return f"grilla:{partes[0]}:{ambito}:{':'.join(partes[1:])}"
+
+
+def _clave_version(clave_ambito):
+    return f"{clave_ambito}:version"
+
+
+CLAVE_VERSION_GLOBAL = 'grilla:version_global'
+
+
+def ambitos_de_horario(horario):
+    """Claves de todos los ámbitos a los que pertenece un Horario (instancia o dict de valores)."""
+    obtener = horario.get if isinstance(horario, dict) else (lambda campo: getattr(horario, campo))
+    periodo = obtener('periodo_academico')
+    return {
+        _clave_ambito(periodo, ambito, [obtener(campo) for campo in campos])
+        for ambito, campos in AMBITOS.items()
+    }
+
+
+def invalidar_grillas(claves_ambito):
+    """Invalida las grillas de los ámbitos indicados cuando la transacción en curso se confirme."""
+    claves = set(claves_ambito)
+    if claves:
+        transaction.on_commit(lambda: [incrementar_version(_clave_version(c)) for c in claves])
+
+
+def invalidar_grillas_de_horarios(horarios):
+    """Atajo para los caminos que no disparan señales (bulk_create, bulk_update, update())."""
+    claves = set()
+    for horario in horarios:
+        claves |= ambitos_de_horario(horario)
+    invalidar_grillas(claves)
+
+
+def invalidar_todas_las_grillas():
+    """Para cambios de nombres en Profesor, Materia o Aula, que aparecen en todas las grillas."""
+    transaction.on_commit(lambda: incrementar_version(CLAVE_VERSION_GLOBAL))
+
+
+def _paso_automatico(minutos):
+    # El paso es el máximo común divisor de todos los bordes, así cada bloque cae justo en franjas.
+    paso = reduce(gcd, minutos, 0) or PASO_POR_DEFECTO
+    return max(min(paso, 60), PASO_MINIMO)
+
+
+def construir_grilla(queryset, paso=None):
+    """
+    Construye la grilla compacta a partir de un queryset de Horario.
+
+    - 'entradas': tabla sin repeticiones (materia, profesor, aula, tipo, sección, carrera, ids).
+    - 'celdas': una lista por día con una posición por franja; cada posición es el índice de la
+      entrada que la ocupa o None. Las ocupaciones adicionales de una franja ya ocupada se listan
+      en 'solapamientos' como [índice_día, índice_franja, índice_entrada].
+    """
+    filas = list(queryset.values(
+        'id', 'dia', 'hora_inicio', 'hora_fin', 'tipo_clase', 'seccion', 'carrera_programa',
+        'materia_id', 'materia__nombre', 'profesor_id', 'profesor__nombre', 'profesor__apellido',
+        'aula_id', 'aula__codigo',
+    ))
+
+    bloques = []
+    for fila in filas:
+        inicio = time_a_minutos(fila['hora_inicio'])
+        fin = time_a_minutos(fila['hora_fin'])
+        if fin <= inicio:
+            fin += MINUTOS_POR_DIA  # Cruza la medianoche: se dibuja hasta el final del día.
+        bloques.append((fila, inicio, min(fin, MINUTOS_POR_DIA)))
+
+    dias_usados = {fila['dia'] for fila in filas}
+    dias = [d for d in ORDEN_DIAS if d in DIAS_LABORABLES or d in dias_usados]
+    if not bloques:
+        return {'dias': dias, 'paso': paso or PASO_POR_DEFECTO, 'horas': [], 'entradas': [], 'celdas': [[] for _ in dias], 'solapamientos': []}
+
+    paso = paso or _paso_automatico([m for _, inicio, fin in bloques for m in (inicio, fin)])
+    primera = min(inicio for _, inicio, _ in bloques) // paso * paso
+    ultima = -(-max(fin for _, _, fin in bloques) // paso) * paso
+    num_franjas = (ultima - primera) // paso
+
+    entradas, indice_entradas = [], {}
+    celdas = [[None] * num_franjas for _ in dias]
+    solapamientos = []
+    for fila, inicio, fin in sorted(bloques, key=lambda b: (b[0]['dia'], b[1], b[0]['id'])):
+        clave = (fila['materia_id'], fila['profesor_id'], fila['aula_id'], fila['tipo_clase'], fila['seccion'], fila['carrera_programa'])
+        if clave not in indice_entradas:
+            indice_entradas[clave] = len(entradas)
+            entradas.append({
+                'materia': fila['materia__nombre'],
+                'profesor': f"{fila['profesor__nombre']} {fila['profesor__apellido']}",
+                'aula': fila['aula__codigo'],
+                'tipo_clase': fila['tipo_clase'],
+                'seccion': fila['seccion'],
+                'carrera_programa': fila['carrera_programa'],
+                'materia_id': fila['materia_id'],
+                'profesor_id': fila['profesor_id'],
+                'aula_id': fila['aula_id'],
+                'horarios': [],
+            })
+        indice = indice_entradas[clave]
+        entradas[indice]['horarios'].append(fila['id'])
+
+        d = dias.index(fila['dia'])
+        for s in range((inicio - primera) // paso, -(-(fin - primera) // paso)):
+            if celdas[d][s] is None:
+                celdas[d][s] = indice
+            elif celdas[d][s] != indice:
+                solapamientos.append([d, s, indice])
+
+    return {
+        'dias': dias,
+        'paso': paso,
+        'horas': [minutos_a_time(primera + i * paso).strftime('%H:%M') for i in range(num_franjas)],
+        'entradas': entradas,
+        'celdas': celdas,
+        'solapamientos': solapamientos,
+    }
+
+
+def obtener_grilla(periodo, ambito, valores, paso=None):
+    """
+    Devuelve (grilla, desde_cache). La clave incluye la versión del ámbito y la versión global,
+    así una invalidación deja inaccesibles las grillas viejas sin tener que borrarlas.
+    """
+    clave_ambito = _clave_ambito(periodo, ambito, valores)
+    clave = f"{clave_ambito}:v{leer_version(_clave_version(clave_ambito))}.{leer_version(CLAVE_VERSION_GLOBAL)}:paso{paso or 'auto'}"
+    grilla = cache.get(clave)
+    if grilla is not None:
+        return grilla, True
+
+    filtro = dict(zip(AMBITOS[ambito], valores), periodo_academico=periodo)
+    grilla = construir_grilla(Horario.objects.filter(**filtro), paso=paso)
+    grilla.update({'periodo_academico': periodo, 'ambito': ambito, 'valor': valores if len(valores) > 1 else valores[0]})
+    cache.set(clave, grilla, TIEMPO_CACHE)
+    return grilla, False
@@ -0,0 +1,123 @@
+# backend/core/huecos.py
+"""
+Búsqueda de huecos libres: ¿cuándo y en qué aula puede dictar un profesor una materia?
+
+Cada día se representa como una máscara de bits con la resolución de ocupacion.py (un bit por
+franja de 5 minutos). La ocupación de profesores, aulas y secciones de un período se
+precalcula una vez y se guarda en la caché con la versión de la colección de horarios de ese
+período, así que una consulta solo combina máscaras con AND/OR:
+
+    libre del profesor = disponibilidad & ~ocupado & ~restricciones (& ~ocupado de la sección)
+    opción (día, inicio, aula) si el bloque cabe en lo libre del profesor y el aula está libre.
+"""
+from collections import defaultdict
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .colecciones import versiones_colecciones
+from .models import Aula, Horario, Restriccion
+from .ocupacion import (
+    RECURSOS_HORARIO, aula_cumple_requisitos, compilar_disponibilidad, intervalo_minutos, mascara,
+)
+
+DIA_COMPLETO = mascara(0, 24 * 60)
+TIEMPO_CACHE = 60 * 60 * 24
+
+
+def _clave_recurso(recurso, registro):
+    campos = RECURSOS_HORARIO[recurso]
+    return registro[campos[0]] if len(campos) == 1 else tuple(registro[campo] for campo in campos)
+
+
+def construir_mascaras_ocupacion(periodo):
+    """{recurso: {(identificador, dia): máscara}} con todos los horarios del período."""
+    mascaras = {recurso: defaultdict(int) for recurso in RECURSOS_HORARIO}
+    campos = ('profesor_id', 'aula_id', 'materia_id', 'seccion', 'dia', 'hora_inicio', 'hora_fin')
+    for registro in Horario.objects.filter(periodo_academico=periodo).order_by().values(*campos).iterator():
+        bits = mascara(*intervalo_minutos(registro['hora_inicio'], registro['hora_fin']))
+        for recurso in RECURSOS_HORARIO:
+            mascaras[recurso][_clave_recurso(recurso, registro), registro['dia']] |= bits
+    return {recurso: dict(valores) for recurso, valores in mascaras.items()}
+
+
+def mascaras_ocupacion(periodo):
+    """Máscaras de ocupación del período, desde la caché mientras no cambien sus horarios."""
+    version, = versiones_colecciones(['horarios'], periodo=periodo)
+    clave = f"huecos:ocupacion:{quote(str(periodo), safe='')}:v{version}"
+    mascaras = cache.get(clave)
+    if mascaras is None:
+        mascaras = construir_mascaras_ocupacion(periodo)
+        cache.set(clave, mascaras, TIEMPO_CACHE)
+    return mascaras
+
+
+def _mascara_restriccion(restriccion):
+    if restriccion['hora_inicio'] is None or restriccion['hora_fin'] is None:
+        return DIA_COMPLETO
+    return mascara(*intervalo_minutos(restriccion['hora_inicio'], restriccion['hora_fin']))
+
+
+def mascaras_disponibilidad(disponibilidad, dias):
+    """{dia: máscara} de las franjas declaradas; sin disponibilidad el profesor está libre todo el día."""
+    compilada = compilar_disponibilidad(disponibilidad)
+    if compilada is None:
+        return {dia: DIA_COMPLETO for dia in dias}
+    resultado = {}
+    for dia in dias:
+        bits = 0
+        for inicio, fin in compilada.get(dia, ()):
+            bits |= mascara(inicio, fin)
+        resultado[dia] = bits
+    return resultado
+
+
+def buscar_huecos(profesor, duracion, periodo, dias, desde, hasta, paso, requisitos=None,
+                  materia_id=None, seccion=None, capacidad_minima=None):
+    """
+    Opciones [{'dia', 'inicio', 'fin', 'aulas': [ids]}] (minutos) en las que el bloque de
+    `duracion` minutos cabe para el profesor y al menos un aula que cumple `requisitos`.
+    """
+    aulas = {
+        aula['id']: aula
+        for aula in Aula.objects.order_by('codigo').values('id', 'codigo', 'tipo', 'recursos_especiales', 'capacidad')
+        if aula_cumple_requisitos(aula, requisitos)
+        and (capacidad_minima is None or aula['capacidad'] >= capacidad_minima)
+    }
+    ocupacion = mascaras_ocupacion(periodo)
+
+    # Restricciones del profesor, de las aulas candidatas y de la materia en esas aulas.
+    filtro = Q(tipo='PROFESOR_NO_DISPONIBLE', profesor_id=profesor['id']) | Q(tipo='AULA_NO_DISPONIBLE', aula_id__in=aulas)
+    if materia_id is not None:
+        filtro |= Q(tipo='MATERIA_NO_EN_AULA', materia_id=materia_id, aula_id__in=aulas)
+    bloqueo_profesor = defaultdict(int)
+    bloqueo_aula = defaultdict(int)  # (aula, dia) -> máscara; dia None aplica toda la semana
+    for restriccion in Restriccion.objects.filter(filtro).values('tipo', 'dia', 'hora_inicio', 'hora_fin', 'aula_id'):
+        bits = _mascara_restriccion(restriccion)
+        if restriccion['tipo'] == 'PROFESOR_NO_DISPONIBLE':
+            bloqueo_profesor[restriccion['dia'] or None] |= bits
+        else:
+            bloqueo_aula[restriccion['aula_id'], restriccion['dia'] or None] |= bits
+
+    disponible = mascaras_disponibilidad(profesor['disponibilidad'], dias)
+    opciones = []
+    for dia in dias:
+        libre = disponible[dia] & ~bloqueo_profesor[dia] & ~bloqueo_profesor[None]
+        libre &= ~ocupacion['profesor'].get((profesor['id'], dia), 0)
+        if materia_id is not None and seccion is not None:
+            libre &= ~ocupacion['seccion'].get(((materia_id, seccion), dia), 0)
+        if not libre:
+            continue
+        ocupadas = {
+            aula_id: ocupacion['aula'].get((aula_id, dia), 0) | bloqueo_aula[aula_id, dia] | bloqueo_aula[aula_id, None]
+            for aula_id in aulas
+        }
+        for inicio in range(desde, hasta - duracion + 1, paso):
+            bloque = mascara(inicio, inicio + duracion)
+            if libre & bloque != bloque:
+                continue
+            libres = [aula_id for aula_id, bits in ocupadas.items() if not bits & bloque]
+            if libres:
+                opciones.append({'dia': dia, 'inicio': inicio, 'fin': inicio + duracion, 'aulas': libres})
+    return opciones, aulas
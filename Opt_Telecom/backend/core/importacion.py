@@ -0,0 +1,599 @@
+# backend/core/importacion.py
+"""
+Utilidades de importación de solicitudes desde Excel: parseo de horas, normalización y
+validación vectorizadas, lectura de libros con varias hojas y escritura en bloque.
+
+El parseo de horas se hace por columna completa: se detecta el formato dominante con una
+muestra, se convierte toda la columna con una sola llamada vectorizada de pandas y solo los
+valores sobrantes pasan por el parseo celda a celda (memoizado). El resultado son minutos
+desde la medianoche, que es lo que usan la validación y la grilla horaria.
+"""
+import io
+from datetime import datetime, time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Formatos de hora aceptados en celdas de texto. Las cadenas se normalizan antes de parsear
+# (puntos -> dos puntos, mayúsculas para AM/PM), por eso no hacen falta variantes con '.' ni '%P'.
+FORMATOS_HORA = [
+    '%H:%M:%S', '%H:%M',           # 24-horas
+    '%I:%M:%S %p', '%I:%M %p',     # 12-horas con AM/PM (ej. "02:30:00 PM")
+]
+
+# Cantidad de valores distintos usados para detectar el formato dominante de una columna.
+TAMANO_MUESTRA_FORMATO = 50
+
+MINUTOS_POR_DIA = 24 * 60
+
+
+def minutos_a_time(minutos):
+    """Convierte minutos desde la medianoche a un objeto datetime.time."""
+    minutos = int(minutos) % MINUTOS_POR_DIA
+    return time(minutos // 60, minutos % 60)
+
+
+def time_a_minutos(valor):
+    """Convierte un datetime.time (o datetime) a minutos desde la medianoche."""
+    return valor.hour * 60 + valor.minute
+
+
+def _normalizar_texto_hora(valor):
+    # Normalizamos a dos puntos y mayúsculas para que un solo formato cubra "14.30", "2:30 pm", etc.
+    return valor.strip().replace('.', ':').upper()
+
+
+@lru_cache(maxsize=4096)
+def _hora_desde_texto(valor_normalizado):
+    """Parseo celda a celda (con memo) para los valores que no encajan en el formato dominante."""
+    for fmt in FORMATOS_HORA:
+        try:
+            return datetime.strptime(valor_normalizado, fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def _minutos_desde_texto(valor_normalizado):
+    hora = _hora_desde_texto(valor_normalizado)
+    return None if hora is None else time_a_minutos(hora)
+
+
+def _hora_desde_numero(valor):
+    # Fracción de día (hora de Excel) o número de serie fecha/hora: en ambos casos la hora es
+    # la parte fraccionaria. Redondeamos al segundo para evitar 08:29:59 por error de coma flotante.
+    if valor < 0:
+        return None
+    segundos = round((valor % 1) * 24 * 3600) % (MINUTOS_POR_DIA * 60)
+    return time(segundos // 3600, segundos % 3600 // 60, segundos % 60)
+
+
+def hora_desde_valor(excel_value):
+    """
+    Convierte un único valor de hora de Excel a datetime.time, conservando los segundos.
+    Devuelve None si la celda está vacía y lanza ValueError/TypeError si no se reconoce.
+    """
+    if excel_value is None or (isinstance(excel_value, str) and excel_value.strip() == ''):
+        return None
+    if isinstance(excel_value, datetime):
+        return excel_value.time()
+    if isinstance(excel_value, time):
+        return excel_value
+    if isinstance(excel_value, (float, int, np.integer, np.floating)) and not isinstance(excel_value, bool):
+        if pd.isna(excel_value):
+            return None
+        hora = _hora_desde_numero(float(excel_value))
+        if hora is None:
+            raise ValueError(f"No se pudo convertir el número de serie de Excel a hora o fecha/hora: '{excel_value}'")
+        return hora
+    if isinstance(excel_value, str):
+        hora = _hora_desde_texto(_normalizar_texto_hora(excel_value))
+        if hora is None:
+            raise ValueError(f"Formato de hora de cadena no reconocido: '{excel_value.strip()}'. Revise el formato del Excel.")
+        return hora
+    if pd.api.types.is_scalar(excel_value) and pd.isna(excel_value):  # NaT, pd.NA
+        return None
+    raise TypeError(f"Tipo de dato inesperado para la hora: {type(excel_value).__name__} con valor '{excel_value}'")
+
+
+def minutos_desde_valor(excel_value):
+    """Como `hora_desde_valor`, pero en minutos desde la medianoche (se descartan los segundos)."""
+    hora = hora_desde_valor(excel_value)
+    return None if hora is None else time_a_minutos(hora)
+
+
+def detectar_formato_dominante(valores_normalizados):
+    """
+    Prueba cada formato sobre una muestra de valores distintos y devuelve el que más aciertos
+    tiene (o None si ninguno reconoce nada).
+    """
+    muestra = pd.Series(valores_normalizados[:TAMANO_MUESTRA_FORMATO], dtype=object)
+    if muestra.empty:
+        return None
+    mejor_formato, mejores_aciertos = None, 0
+    for fmt in FORMATOS_HORA:
+        aciertos = pd.to_datetime(muestra, format=fmt, errors='coerce').notna().sum()
+        if aciertos > mejores_aciertos:
+            mejor_formato, mejores_aciertos = fmt, aciertos
+            if aciertos == len(muestra):
+                break
+    return mejor_formato
+
+
+def parsear_columna_horas(serie):
+    """
+    Convierte una columna de horas de Excel a minutos desde la medianoche.
+
+    Devuelve una tupla (minutos, invalidos):
+    - minutos: Serie 'Int64' con el mismo índice; <NA> para celdas vacías o no reconocidas.
+    - invalidos: Serie booleana, True en celdas con contenido que no se pudo interpretar.
+    """
+    minutos = pd.Series(pd.NA, index=serie.index, dtype='Int64')
+    invalidos = pd.Series(False, index=serie.index)
+    if serie.empty:
+        return minutos, invalidos
+
+    valores = serie.astype(object)
+    es_texto = valores.map(lambda v: isinstance(v, str))
+    es_hora = valores.map(lambda v: isinstance(v, (datetime, time)))
+    es_numero = ~es_texto & ~es_hora & valores.map(
+        lambda v: isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool)
+    )
+    vacios = valores.isna() | (es_texto & (valores.where(es_texto, '').str.strip() == ''))
+
+    # 1. Números de Excel (fracción de día o número de serie): una sola operación vectorizada.
+    mascara = es_numero & ~vacios
+    if mascara.any():
+        numeros = valores[mascara].astype(float)
+        negativos = numeros < 0
+        validos = numeros[~negativos]
+        segundos = np.round(np.mod(validos.to_numpy(), 1) * 24 * 3600)
+        minutos[validos.index] = ((segundos // 60) % MINUTOS_POR_DIA).astype('int64')
+        invalidos[negativos[negativos].index] = True
+
+    # 2. Objetos time/datetime que pandas ya convirtió al leer el Excel.
+    mascara = es_hora & ~vacios
+    if mascara.any():
+        minutos[mascara] = valores[mascara].map(time_a_minutos).astype('int64')
+
+    # 3. Texto: se parsea cada valor distinto una sola vez (memo) con el formato dominante
+    #    y solo los sobrantes pasan por el parseo celda a celda.
+    mascara = es_texto & ~vacios
+    if mascara.any():
+        textos = valores[mascara].map(_normalizar_texto_hora)
+        unicos = pd.Series(textos.unique(), dtype=object)
+        formato = detectar_formato_dominante(unicos.tolist())
+        if formato is not None:
+            parseados = pd.to_datetime(unicos, format=formato, errors='coerce')
+            minutos_unicos = pd.Series(parseados.dt.hour * 60 + parseados.dt.minute, dtype='Int64')
+        else:
+            minutos_unicos = pd.Series(pd.NA, index=unicos.index, dtype='Int64')
+
+        sobrantes = minutos_unicos.isna()
+        if sobrantes.any():
+            minutos_unicos[sobrantes] = pd.array(
+                [_minutos_desde_texto(v) for v in unicos[sobrantes]], dtype='Int64'
+            )
+
+        memo = dict(zip(unicos, minutos_unicos))
+        resultado = pd.array(textos.map(memo), dtype='Int64')
+        minutos[mascara] = resultado
+        invalidos[mascara] = pd.isna(resultado)
+
+    # Cualquier otro tipo de dato inesperado se marca como inválido.
+    invalidos |= ~(es_texto | es_hora | es_numero | vacios)
+    return minutos, invalidos
+
+
+def validar_rangos_horarios(minutos_inicio, minutos_fin):
+    """
+    Valida en bloque los rangos (inicio, fin) en minutos.
+    Un rango es válido si inicio < fin, o si cruza la medianoche terminando antes de las 06:00
+    (ej. 23:00 - 02:00). Devuelve una Serie booleana con True en los rangos inválidos.
+    """
+    cruza_medianoche = (minutos_inicio > minutos_fin) & (minutos_fin < 6 * 60)
+    invalidos = (minutos_inicio >= minutos_fin) & ~cruza_medianoche
+    return invalidos.fillna(False).astype(bool)
+
+
+# --- Normalización y validación vectorizada de hojas de solicitudes ---
+
+# Mapeo de nombres de columnas normalizados a los nombres esperados en nuestro código.
+# 'periodo_academico_carrera' es un campo combinado del Excel ("2025-2 Ingeniería en Sistemas")
+# del que se obtienen 'periodo_academico' y 'carrera_programa'.
+COLUMN_ALIASES = {
+    'dia': ['dia', 'day'],
+    'hora_inicio': ['hora_inicio', 'hora_ini', 'start_time'],
+    'hora_fin': ['hora_fin', 'hora_final', 'end_time'],
+    'profesor': ['profesor', 'nombre_profesor', 'profesor_nombre'],
+    'materia': ['materia', 'nombre_materia'],
+    'aula': ['aula', 'codigo_aula', 'nombre_aula'],
+    'tipo_clase': ['tipo_clase', 'clase_tipo', 'class_type'],
+    'seccion': ['seccion', 'section', 'seccion_num'],
+    'periodo_academico_carrera': ['periodo_academico_carrera', 'periodo_academico', 'periodo_carrera'],
+}
+
+# Diccionario para mapear días de la semana (ej. 'Lunes' a 'LUN')
+DIAS_MAP = {
+    'lunes': 'LUN', 'lun': 'LUN',
+    'martes': 'MAR', 'mar': 'MAR',
+    'miércoles': 'MIE', 'miercoles': 'MIE', 'mie': 'MIE',
+    'jueves': 'JUE', 'jue': 'JUE',
+    'viernes': 'VIE', 'vie': 'VIE',
+    'sábado': 'SAB', 'sabado': 'SAB', 'sab': 'SAB',
+    'domingo': 'DOM', 'dom': 'DOM',
+}
+
+CARRERA_NO_ESPECIFICADA = "No Especificada en Excel"
+
+
+class ErrorImportacion(Exception):
+    """Error que invalida la hoja completa (ej. falta una columna requerida)."""
+
+
+def clean_col_name(col):
+    """
+    Función para limpiar y normalizar un nombre de columna para el procesamiento de Excel.
+    """
+    return str(col).strip().lower().replace(' ', '_').replace('.', '').replace('-', '_').replace('á', 'a').replace('é', 'e').replace('í', 'i').replace('ó', 'o').replace('ú', 'u').replace('ñ', 'n')
+
+
+def preparar_hoja(df):
+    """
+    Normaliza los nombres de columna de una hoja y verifica que estén todas las requeridas.
+    Lanza ErrorImportacion si falta alguna.
+    """
+    df = df.copy()
+    df.columns = [clean_col_name(col) for col in df.columns]
+    for expected_col_key, possible_names in COLUMN_ALIASES.items():
+        if not any(pn in df.columns for pn in possible_names):
+            raise ErrorImportacion(
+                f'Columna requerida faltante o con nombre incorrecto en el archivo Excel: "{expected_col_key}" '
+                f'(posibles nombres: {", ".join(possible_names)}). Por favor, revise su archivo.'
+            )
+    return df
+
+
+def _valor_a_texto(valor):
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))  # Secciones leídas como 1.0 por pandas cuando la columna tiene vacíos
+    return str(valor).strip()
+
+
+def _columna_texto(df, aliases):
+    """Primera columna con valor no vacío entre los alias, como texto limpio ('' si no hay)."""
+    columnas = [alias for alias in aliases if alias in df.columns]
+    combinada = df[columnas[0]]
+    for alias in columnas[1:]:
+        combinada = combinada.combine_first(df[alias])
+    return combinada.map(lambda v: '' if pd.isna(v) else _valor_a_texto(v)).astype(object)
+
+
+def normalizar_solicitudes(df, hoja=None):
+    """
+    Convierte una hoja (ya pasada por `preparar_hoja`) al esquema común de solicitudes.
+
+    Devuelve un DataFrame con una fila por fila del Excel y las columnas:
+    fila, hoja, profesor_nombre, profesor_apellido, materia, aula, tipo_clase, seccion, dia,
+    minutos_inicio, minutos_fin, periodo_academico, carrera_programa y error (None si la fila es válida).
+    Todas las validaciones se hacen por columna; la primera regla que falla define el error.
+    """
+    norm = pd.DataFrame(index=df.index)
+    norm['fila'] = df.index + 2  # +1 por la cabecera y +1 porque Excel numera desde 1
+    norm['hoja'] = hoja
+
+    profesor = _columna_texto(df, COLUMN_ALIASES['profesor'])
+    partes_profesor = profesor.str.split(' ', n=1, expand=True).reindex(columns=[0, 1])
+    norm['profesor_nombre'] = partes_profesor[0].fillna('')
+    norm['profesor_apellido'] = partes_profesor[1].fillna('').str.strip()
+    norm['materia'] = _columna_texto(df, COLUMN_ALIASES['materia'])
+    norm['aula'] = _columna_texto(df, COLUMN_ALIASES['aula'])
+    norm['tipo_clase'] = _columna_texto(df, COLUMN_ALIASES['tipo_clase'])
+    norm['seccion'] = _columna_texto(df, COLUMN_ALIASES['seccion'])
+
+    dia_excel = _columna_texto(df, COLUMN_ALIASES['dia'])
+    norm['dia'] = dia_excel.str.lower().map(DIAS_MAP)
+
+    # Intenta parsear el formato "YYYY-P Carrera Nombre" o "YYYY-P"
+    periodo_carrera = _columna_texto(df, COLUMN_ALIASES['periodo_academico_carrera'])
+    partes_periodo = periodo_carrera.str.split(' ', n=1, expand=True).reindex(columns=[0, 1])
+    norm['periodo_academico'] = partes_periodo[0].fillna('').str.strip()
+    norm['carrera_programa'] = partes_periodo[1].fillna('').str.strip().replace('', CARRERA_NO_ESPECIFICADA)
+
+    col_inicio = next(alias for alias in COLUMN_ALIASES['hora_inicio'] if alias in df.columns)
+    col_fin = next(alias for alias in COLUMN_ALIASES['hora_fin'] if alias in df.columns)
+    norm['minutos_inicio'], inicio_invalido = parsear_columna_horas(df[col_inicio])
+    norm['minutos_fin'], fin_invalido = parsear_columna_horas(df[col_fin])
+    rango_invalido = validar_rangos_horarios(norm['minutos_inicio'], norm['minutos_fin'])
+
+    criticas_vacias = (
+        (profesor == '') | (norm['materia'] == '') | (norm['aula'] == '') | (norm['tipo_clase'] == '')
+        | (norm['seccion'] == '') | (periodo_carrera == '') | (dia_excel == '')
+    )
+    valor_hora_invalido = df[col_inicio].where(inicio_invalido, df[col_fin]).astype(str)
+    condiciones = [
+        criticas_vacias,
+        norm['dia'].isna(),
+        inicio_invalido | fin_invalido,
+        norm['minutos_inicio'].isna() | norm['minutos_fin'].isna(),
+        rango_invalido,
+    ]
+    mensajes = [
+        pd.Series("Una o más columnas críticas están vacías.", index=df.index),
+        "Día de la semana no reconocido: '" + dia_excel + "'.",
+        "Formato de hora no reconocido: '" + valor_hora_invalido + "'. Revise el formato del Excel.",
+        pd.Series("Las horas de inicio o fin no son válidas.", index=df.index),
+        pd.Series("La hora de inicio debe ser anterior a la hora de fin, o el rango debe cruzar la medianoche de forma válida.", index=df.index),
+    ]
+    norm['error'] = np.select(
+        [c.to_numpy(dtype=bool) for c in condiciones],
+        [m.to_numpy(dtype=object) for m in mensajes],
+        default=None,
+    )
+    return norm
+
+
+def fila_a_dict(df, index):
+    """Fila original del Excel como dict serializable (NaN -> None)."""
+    return {k: (None if pd.isna(v) else v) for k, v in df.loc[index].items()}
+
+
+class CatalogoEntidades:
+    """
+    Lookups en memoria de profesores, materias y aulas existentes (tres consultas en total),
+    usados para resolver los nombres del Excel sin una consulta por fila.
+    """
+
+    def __init__(self, profesores, materias, aulas):
+        self.profesores = profesores  # {(nombre, apellido): id}
+        self.materias = materias      # {nombre: id}
+        self.aulas = aulas            # {codigo: id}
+
+    @classmethod
+    def desde_bd(cls):
+        from .models import Aula, Materia, Profesor
+
+        return cls(
+            profesores={(n, a): pk for pk, n, a in Profesor.objects.values_list('id', 'nombre', 'apellido')},
+            materias={n: pk for pk, n in Materia.objects.values_list('id', 'nombre')},
+            aulas={c: pk for pk, c in Aula.objects.values_list('id', 'codigo')},
+        )
+
+    def resolver(self, norm):
+        """Añade profesor_id / materia_id / aula_id (<NA> si la entidad todavía no existe)."""
+        norm = norm.copy()
+        claves_profesor = pd.Series(list(zip(norm['profesor_nombre'], norm['profesor_apellido'])), index=norm.index, dtype=object)
+        norm['profesor_id'] = pd.array(claves_profesor.map(self.profesores), dtype='Int64')
+        norm['materia_id'] = pd.array(norm['materia'].map(self.materias), dtype='Int64')
+        norm['aula_id'] = pd.array(norm['aula'].map(self.aulas), dtype='Int64')
+        return norm
+
+    def entidades_nuevas(self, norm):
+        """Nombres de las entidades que la importación crearía (solo filas válidas)."""
+        validas = norm[norm['error'].isna()]
+        profesores = validas.loc[validas['profesor_id'].isna(), ['profesor_nombre', 'profesor_apellido']].drop_duplicates()
+        return {
+            'profesores': [f"{n} {a}".strip() for n, a in profesores.itertuples(index=False)],
+            'materias': sorted(validas.loc[validas['materia_id'].isna(), 'materia'].unique().tolist()),
+            'aulas': sorted(validas.loc[validas['aula_id'].isna(), 'aula'].unique().tolist()),
+        }
+
+
+CLAVE_SOLICITUD = ['materia', 'profesor_nombre', 'profesor_apellido', 'tipo_clase', 'seccion', 'periodo_academico', 'carrera_programa']
+
+
+def _solapamientos(df, recurso):
+    """
+    Pares de filas que usan el mismo recurso el mismo día y período con horas solapadas.
+    Barrido por grupo ordenado por hora de inicio: O(n log n).
+    """
+    pares = []
+    for _, grupo in df.groupby(['periodo_academico', 'dia', recurso], sort=False):
+        if len(grupo) < 2:
+            continue
+        grupo = grupo.sort_values('inicio')
+        activos = []  # (fin, origen, referencia) de los intervalos que siguen abiertos
+        for inicio, fin, origen, referencia in grupo[['inicio', 'fin', 'origen', 'referencia']].itertuples(index=False):
+            activos = [a for a in activos if a[0] > inicio]
+            for _, origen_a, referencia_a in activos:
+                if origen == 'archivo' or origen_a == 'archivo':
+                    pares.append((recurso, (origen_a, referencia_a), (origen, referencia)))
+            activos.append((fin, origen, referencia))
+    return pares
+
+
+def validar_solicitudes(norm, catalogo):
+    """
+    Resuelve entidades contra el catálogo y valida las filas contra las solicitudes existentes.
+
+    - Marca como error las filas duplicadas dentro del archivo o idénticas (según el unique_together
+      de SolicitudClase) a una solicitud ya guardada: la importación real fallaría en ellas.
+    - Devuelve como 'conflictos' (advertencias) los solapamientos de aula o profesor con
+      solicitudes existentes o con otras filas del archivo.
+
+    Devuelve (norm_resuelto, conflictos). Solo lee de la base de datos.
+    """
+    from .models import SolicitudClase
+
+    norm = catalogo.resolver(norm)
+    validas = norm['error'].isna()
+
+    duplicada_archivo = validas & norm[validas].duplicated(subset=CLAVE_SOLICITUD, keep='first').reindex(norm.index, fill_value=False)
+    ubicacion = 'la fila ' + norm['fila'].astype(str)
+    ubicacion = ubicacion.where(norm['hoja'].isna(), ubicacion + " de la hoja '" + norm['hoja'].astype(str) + "'")
+    primera_fila = ubicacion[validas].groupby([norm.loc[validas, c] for c in CLAVE_SOLICITUD], sort=False).transform('first')
+    norm.loc[duplicada_archivo, 'error'] = (
+        "Solicitud duplicada dentro del archivo (igual a " + primera_fila[duplicada_archivo] + ")."
+    )
+
+    periodos = norm.loc[validas, 'periodo_academico'].unique().tolist()
+    existentes = pd.DataFrame(list(
+        SolicitudClase.objects.filter(periodo_academico__in=periodos).values_list(
+            'id', 'materia_id', 'profesor_id', 'aula_id', 'tipo_clase', 'seccion', 'periodo_academico',
+            'carrera_programa', 'dia', 'hora_inicio', 'hora_fin',
+        )
+    ), columns=['id', 'materia_id', 'profesor_id', 'aula_id', 'tipo_clase', 'seccion', 'periodo_academico',
+                'carrera_programa', 'dia', 'hora_inicio', 'hora_fin'])
+
+    conflictos = []
+    if not existentes.empty:
+        # Duplicados contra la base de datos: solo pueden darse si las tres entidades ya existen.
+        clave_bd = ['materia_id', 'profesor_id', 'tipo_clase', 'seccion', 'periodo_academico', 'carrera_programa']
+        candidatas = norm[norm['error'].isna() & norm['profesor_id'].notna() & norm['materia_id'].notna()]
+        cruce = candidatas.reset_index().astype({'materia_id': 'int64', 'profesor_id': 'int64'}).merge(
+            existentes[clave_bd + ['id']], on=clave_bd, how='inner'
+        )
+        if not cruce.empty:
+            norm.loc[cruce['index'].to_numpy(), 'error'] = [
+                f"Ya existe una solicitud idéntica (ID {pk}) para esta materia, profesor, tipo de clase, sección, período y carrera."
+                for pk in cruce['id']
+            ]
+
+    # Solapamientos de aula y profesor (archivo vs. archivo y archivo vs. existentes).
+    filas = norm[norm['error'].isna()]
+    archivo = pd.DataFrame({
+        'origen': 'archivo',
+        'referencia': pd.Series(list(zip(filas['hoja'], filas['fila'])), index=filas.index, dtype=object),
+        'periodo_academico': filas['periodo_academico'],
+        'dia': filas['dia'],
+        'aula': filas['aula_id'].astype(object).where(filas['aula_id'].notna(), 'nueva:' + filas['aula']),
+        'profesor': filas['profesor_id'].astype(object).where(
+            filas['profesor_id'].notna(), 'nuevo:' + filas['profesor_nombre'] + ' ' + filas['profesor_apellido']),
+        'inicio': filas['minutos_inicio'].astype('int64'),
+        'fin': filas['minutos_fin'].astype('int64'),
+    })
+    if not existentes.empty:
+        existentes = existentes[existentes['dia'].notna() & existentes['hora_inicio'].notna() & existentes['hora_fin'].notna()]
+        en_bd = pd.DataFrame({
+            'origen': 'existente',
+            'referencia': existentes['id'].astype(object),
+            'periodo_academico': existentes['periodo_academico'],
+            'dia': existentes['dia'],
+            'aula': existentes['aula_id'].astype(object),
+            'profesor': existentes['profesor_id'].astype(object),
+            'inicio': existentes['hora_inicio'].map(time_a_minutos).astype('int64'),
+            'fin': existentes['hora_fin'].map(time_a_minutos).astype('int64'),
+        })
+        archivo = pd.concat([archivo, en_bd], ignore_index=True)
+    # Los rangos que cruzan la medianoche terminan "al día siguiente".
+    archivo['fin'] = archivo['fin'].where(archivo['fin'] > archivo['inicio'], archivo['fin'] + MINUTOS_POR_DIA)
+
+    for recurso in ('aula', 'profesor'):
+        for _, (origen_a, ref_a), (origen_b, ref_b) in _solapamientos(archivo.dropna(subset=[recurso]), recurso):
+            conflicto = {'recurso': recurso}
+            for origen, ref in ((origen_a, ref_a), (origen_b, ref_b)):
+                if origen == 'archivo':
+                    conflicto.setdefault('filas', []).append({'hoja': ref[0], 'fila': int(ref[1])})
+                else:
+                    conflicto['solicitud_existente'] = int(ref)
+            conflictos.append(conflicto)
+
+    return norm, conflictos
+
+
+# --- Libros con varias hojas ---
+
+class ResultadoHoja:
+    """Resultado de leer y normalizar una hoja: el DataFrame original, el normalizado o un error."""
+
+    def __init__(self, nombre, df=None, norm=None, error=None):
+        self.nombre = nombre
+        self.df = df
+        self.norm = norm
+        self.error = error
+
+
+def _procesar_hoja(nombre_hoja, df):
+    # Lleva una hoja ya leída al esquema común; las que no tienen las columnas requeridas
+    # quedan como error de hoja.
+    try:
+        df = preparar_hoja(df)
+    except ErrorImportacion as e:
+        return ResultadoHoja(nombre_hoja, error=str(e))
+    return ResultadoHoja(nombre_hoja, df=df, norm=normalizar_solicitudes(df, hoja=nombre_hoja))
+
+
+def leer_libro(contenido, hojas=None):
+    """
+    Lee las hojas de un libro Excel (todas, o solo las indicadas en `hojas`) y las normaliza.
+    El libro se abre y se parsea una sola vez (un único read_excel para todas las hojas); la
+    normalización de cada hoja es vectorizada. Devuelve una lista de ResultadoHoja en el orden
+    del libro.
+    """
+    libro = pd.ExcelFile(io.BytesIO(contenido))
+    nombres = libro.sheet_names
+    if hojas:
+        faltantes = [h for h in hojas if h not in nombres]
+        if faltantes:
+            raise ErrorImportacion(f"El libro no contiene las hojas: {', '.join(faltantes)}.")
+        nombres = [n for n in nombres if n in hojas]
+    if not nombres:
+        return []
+    tablas = pd.read_excel(libro, sheet_name=nombres)
+    return [_procesar_hoja(nombre, tablas[nombre]) for nombre in nombres]
+
+
+def guardar_solicitudes(norm, catalogo):
+    """
+    Escribe en bloque las filas válidas ya validadas: crea las entidades que falten con
+    bulk_create y luego todas las solicitudes con un único bulk_create. Debe llamarse dentro
+    de una transacción. Devuelve la lista de SolicitudClase creadas, en el orden de `norm`.
+    """
+    from .colecciones import marcar_cambio
+    from .models import Aula, Materia, Profesor, SolicitudClase
+
+    nuevas = catalogo.entidades_nuevas(norm)
+    if nuevas['profesores']:
+        claves = norm.loc[norm['profesor_id'].isna(), ['profesor_nombre', 'profesor_apellido']].drop_duplicates()
+        Profesor.objects.bulk_create([
+            Profesor(nombre=n, apellido=a, especialidad='General', carga_horaria_maxima=40)
+            for n, a in claves.itertuples(index=False)
+        ], ignore_conflicts=True)
+    if nuevas['materias']:
+        Materia.objects.bulk_create([
+            Materia(nombre=n, horas_semanales=0, horas_teoricas=0, horarios_de_practicas=0,
+                    horario_de_laboratorio=0, secciones_disponibles=1)
+            for n in nuevas['materias']
+        ], ignore_conflicts=True)
+    if nuevas['aulas']:
+        Aula.objects.bulk_create([Aula(codigo=c, capacidad=0, tipo='General') for c in nuevas['aulas']], ignore_conflicts=True)
+
+    # Con ignore_conflicts no siempre se devuelven los ids: se vuelven a leer los catálogos.
+    catalogo = CatalogoEntidades.desde_bd()
+    norm = catalogo.resolver(norm)
+    profesores = Profesor.objects.in_bulk(norm['profesor_id'].dropna().astype(int).unique().tolist())
+    materias = Materia.objects.in_bulk(norm['materia_id'].dropna().astype(int).unique().tolist())
+    aulas = Aula.objects.in_bulk(norm['aula_id'].dropna().astype(int).unique().tolist())
+
+    solicitudes = []
+    for row in norm.itertuples(index=False):
+        hora_inicio = minutos_a_time(row.minutos_inicio)
+        hora_fin = minutos_a_time(row.minutos_fin)
+        solicitudes.append(SolicitudClase(
+            materia=materias[int(row.materia_id)],
+            profesor=profesores[int(row.profesor_id)],
+            aula=aulas[int(row.aula_id)], # El aula sugerida directamente del Excel
+            dia=row.dia,
+            hora_inicio=hora_inicio,
+            hora_fin=hora_fin,
+            tipo_clase=row.tipo_clase,
+            seccion=row.seccion,
+            periodo_academico=row.periodo_academico,
+            carrera_programa=row.carrera_programa,
+            requisitos_aula_sugeridos={
+                'aula_codigo_sugerida': row.aula,
+                'dia_sugerido': row.dia,
+                'hora_inicio_sugerida': hora_inicio.isoformat(),
+                'hora_fin_sugerida': hora_fin.isoformat(),
+            },
+            estado='Pendiente',
+        ))
+    creadas = SolicitudClase.objects.bulk_create(solicitudes)
+
+    # bulk_create no dispara señales: se marcan a mano las colecciones modificadas.
+    marcar_cambio('solicitudes', periodos=set(norm['periodo_academico']))
+    for coleccion in ('profesores', 'materias', 'aulas'):
+        if nuevas[coleccion]:
+            marcar_cambio(coleccion)
+    return creadas
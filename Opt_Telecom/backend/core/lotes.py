@@ -0,0 +1,377 @@
+# backend/core/lotes.py
+"""
+Operaciones en lote (crear, actualizar y eliminar) para Horario y SolicitudClase.
+
+Todo el lote se valida de una vez: las claves foráneas con un in_bulk por modelo, los
+registros existentes con una sola consulta y los solapamientos con un IndiceOcupacion
+construido en memoria. Después se aplica en una transacción con bulk_create / bulk_update.
+
+Formato de entrada:
+    {"crear": [{...}, ...], "actualizar": [{"id": 1, ...}, ...], "eliminar": [3, 4], "todo_o_nada": false}
+
+Cada elemento produce un resultado {"operacion", "indice", "id", "estado": "ok"|"error", "errores"}.
+Con "todo_o_nada" cualquier error cancela el lote completo.
+
+AsignacionSolicitudes reutiliza LoteHorarios para convertir muchas solicitudes pendientes
+en horarios de una vez.
+"""
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+
+from .colecciones import COLECCIONES, marcar_cambio
+from .grilla import invalidar_grillas_de_horarios
+from .models import Horario, SolicitudClase
+from .nomina import marcar_nomina
+from .ocupacion import IndiceOcupacion
+
+NOMBRES_RECURSO = {'profesor': 'El profesor', 'aula': 'El aula', 'seccion': 'La sección'}
+
+
+class ErrorLote(Exception):
+    """Error de formato del cuerpo de la petición (no de un elemento concreto)."""
+
+
+class Lote:
+    modelo = None
+    campos = ()
+    # Si los solapamientos impiden guardar (True) o solo se informan como advertencias (False).
+    solapamiento_es_error = True
+    # Campos que no pueden repetirse entre registros (unique_together del modelo).
+    campos_unicos = None
+
+    def __init__(self, datos):
+        if not isinstance(datos, dict):
+            raise ErrorLote("El cuerpo debe ser un objeto con las listas 'crear', 'actualizar' y/o 'eliminar'.")
+        self.crear = self._lista(datos, 'crear')
+        self.actualizar = self._lista(datos, 'actualizar')
+        self.eliminar = self._lista(datos, 'eliminar')
+        self.todo_o_nada = str(datos.get('todo_o_nada', False)).lower() in ('true', '1')
+        self.opciones = {f.name: f for f in self.modelo._meta.concrete_fields if f.name in self.campos}
+        self.resultados = []
+        self._por_item = {}
+
+    @staticmethod
+    def _lista(datos, nombre):
+        valor = datos.get(nombre) or []
+        if not isinstance(valor, list):
+            raise ErrorLote(f"'{nombre}' debe ser una lista.")
+        return valor
+
+    # --- Validación de campos ---
+
+    def _limpiar(self, item, parcial):
+        """Convierte los valores del elemento a {attname: valor} y devuelve (valores, errores)."""
+        valores, errores = {}, {}
+        if not isinstance(item, dict):
+            return valores, {'non_field_errors': ['Cada elemento debe ser un objeto.']}
+        for nombre, campo in self.opciones.items():
+            clave = nombre if nombre in item else campo.attname if campo.attname in item else None
+            if clave is None:
+                if not parcial and not campo.has_default() and not campo.null and not campo.blank:
+                    errores[nombre] = ['Este campo es obligatorio.']
+                continue
+            valor = item[clave]
+            try:
+                if campo.is_relation:
+                    valores[campo.attname] = None if valor in (None, '') else int(valor)
+                    if valores[campo.attname] is None and not campo.null:
+                        errores[nombre] = ['Este campo no puede ser nulo.']
+                else:
+                    valores[campo.attname] = campo.clean(valor, None)
+            except (TypeError, ValueError):
+                errores[nombre] = ['Debe ser un identificador numérico.']
+            except DjangoValidationError as e:
+                errores[nombre] = e.messages
+        return valores, errores
+
+    # --- Proceso del lote ---
+
+    def procesar(self):
+        """Valida y, si corresponde, aplica el lote. Devuelve (resultados, aplicado)."""
+        limpios_crear = [self._limpiar(item, parcial=False) for item in self.crear]
+        limpios_actualizar = []
+        for item in self.actualizar:
+            valores, errores = self._limpiar(item, parcial=True)
+            pk = item.get('id') if isinstance(item, dict) else None
+            if not isinstance(pk, int):
+                errores.setdefault('id', ['Se requiere el id numérico del registro a actualizar.'])
+            limpios_actualizar.append((pk, valores, errores))
+        ids_eliminar = {pk for pk in self.eliminar if isinstance(pk, int)}
+
+        # Registros existentes afectados: una consulta.
+        pks = {pk for pk, _, _ in limpios_actualizar if isinstance(pk, int)} | ids_eliminar
+        existentes = self.modelo.objects.in_bulk(pks) if pks else {}
+
+        # Claves foráneas: un in_bulk por modelo relacionado.
+        validas_fk = {}
+        for nombre, campo in self.opciones.items():
+            if campo.is_relation:
+                ids = {v[campo.attname] for v, _ in limpios_crear if v.get(campo.attname) is not None}
+                ids |= {v[campo.attname] for _, v, _ in limpios_actualizar if v.get(campo.attname) is not None}
+                validas_fk[nombre] = set(campo.related_model.objects.filter(pk__in=ids).values_list('pk', flat=True)) if ids else set()
+
+        def revisar_fk(valores, errores):
+            for nombre, validas in validas_fk.items():
+                valor = valores.get(self.opciones[nombre].attname)
+                if valor is not None and valor not in validas:
+                    errores[nombre] = [f'No existe {nombre} con ID {valor}.']
+
+        # Registros finales de cada actualización (valores actuales + cambios).
+        finales_actualizar = []
+        for pk, valores, errores in limpios_actualizar:
+            revisar_fk(valores, errores)
+            actual = existentes.get(pk) if isinstance(pk, int) else None
+            if 'id' not in errores:
+                if actual is None:
+                    errores['id'] = [f'No existe el registro con ID {pk}.']
+                elif pk in ids_eliminar:
+                    errores['id'] = ['El registro también se elimina en este lote.']
+                    actual = None
+            registro = None
+            if actual is not None:
+                registro = {campo.attname: getattr(actual, campo.attname) for campo in self.opciones.values()}
+                registro.update(valores)
+                registro['id'] = pk
+            finales_actualizar.append((pk, valores, errores, registro))
+        for valores, errores in limpios_crear:
+            revisar_fk(valores, errores)
+            for campo in self.opciones.values():
+                if campo.attname not in valores and campo.has_default():
+                    valores[campo.attname] = campo.get_default()
+
+        # Índice de ocupación y claves únicas de los períodos afectados: una consulta.
+        periodos = {v.get('periodo_academico') for v, _ in limpios_crear}
+        periodos |= {r['periodo_academico'] for _, _, _, r in finales_actualizar if r}
+        periodos |= {getattr(o, 'periodo_academico') for o in existentes.values()}
+        campos_registro = ['id'] + [c.attname for c in self.opciones.values()]
+        registros = list(self.modelo.objects.filter(periodo_academico__in=periodos - {None}).values(*campos_registro))
+        indice = IndiceOcupacion.desde_registros(registros)
+        unicos = {self._clave_unica(r): r['id'] for r in registros} if self.campos_unicos else {}
+
+        def valores_actuales(pk):
+            return {'id': pk, **{c.attname: getattr(existentes[pk], c.attname) for c in self.opciones.values()}}
+
+        def quitar(registro):
+            indice.quitar(registro['id'])
+            if self.campos_unicos and unicos.get(self._clave_unica(registro)) == registro['id']:
+                del unicos[self._clave_unica(registro)]
+
+        def revisar_y_ocupar(referencia, registro, errores, advertencias):
+            if registro.get('hora_inicio') is not None and registro.get('hora_inicio') == registro.get('hora_fin'):
+                errores['hora_fin'] = ['La hora de fin debe ser distinta de la hora de inicio.']
+            if self.campos_unicos and not errores:
+                otro = unicos.get(self._clave_unica(registro))
+                if otro is not None and otro != referencia:
+                    errores['non_field_errors'] = [f'Ya existe un registro idéntico ({self._describir(otro)}).']
+            if not errores:
+                for recurso, otro in indice.conflictos(registro, ignorar=referencia):
+                    mensaje = f"{NOMBRES_RECURSO[recurso]} ya tiene una clase en ese horario ({self._describir(otro)})."
+                    (errores if self.solapamiento_es_error else advertencias).setdefault(recurso, []).append(mensaje)
+            if not errores:
+                indice.agregar(referencia, registro)
+                if self.campos_unicos:
+                    unicos[self._clave_unica(registro)] = referencia
+
+        # Pasada única: primero se liberan los eliminados, luego actualizaciones y altas.
+        for indice_item, pk in enumerate(self.eliminar):
+            if isinstance(pk, int) and pk in existentes:
+                quitar(valores_actuales(pk))
+                self._resultado('eliminar', indice_item, pk, {})
+            else:
+                self._resultado('eliminar', indice_item, pk, {'id': [f'No existe el registro con ID {pk}.']})
+
+        aplicar_actualizar = []
+        for indice_item, (pk, valores, errores, registro) in enumerate(finales_actualizar):
+            advertencias = {}
+            if registro is not None and not errores:
+                anterior = valores_actuales(pk)
+                quitar(anterior)
+                revisar_y_ocupar(pk, registro, errores, advertencias)
+                if errores:
+                    indice.agregar(pk, anterior)  # El registro conserva sus valores actuales.
+                    if self.campos_unicos:
+                        unicos[self._clave_unica(anterior)] = pk
+                else:
+                    aplicar_actualizar.append((existentes[pk], valores))
+            self._resultado('actualizar', indice_item, pk, errores, advertencias)
+
+        aplicar_crear = []
+        for indice_item, (valores, errores) in enumerate(limpios_crear):
+            advertencias = {}
+            if not errores:
+                revisar_y_ocupar(('nuevo', indice_item), valores, errores, advertencias)
+            if not errores:
+                aplicar_crear.append((indice_item, valores))
+            self._resultado('crear', indice_item, None, errores, advertencias)
+
+        hay_errores = any(r['estado'] == 'error' for r in self.resultados)
+        if self.todo_o_nada and hay_errores:
+            return self.resultados, False
+        self._aplicar(
+            [pk for pk in ids_eliminar if pk in existentes], existentes, aplicar_actualizar, aplicar_crear,
+        )
+        return self.resultados, True
+
+    def _aplicar(self, eliminar, existentes, actualizar, crear):
+        anteriores = [self._valores_recurso(existentes[pk]) for pk in eliminar]
+        anteriores += [self._valores_recurso(objeto) for objeto, _ in actualizar]
+        with transaction.atomic():
+            if eliminar:
+                # QuerySet.delete() dispara post_delete por registro (y los borrados en cascada).
+                self.modelo.objects.filter(pk__in=eliminar).delete()
+            if actualizar:
+                nombres = {c.attname: c.name for c in self.opciones.values()}
+                campos = set()
+                for objeto, valores in actualizar:
+                    for attname, valor in valores.items():
+                        setattr(objeto, attname, valor)
+                    campos |= {nombres[a] for a in valores}
+                if campos:
+                    self.modelo.objects.bulk_update([o for o, _ in actualizar], list(campos))
+            creados = self.modelo.objects.bulk_create([self.modelo(**valores) for _, valores in crear])
+            for (indice_item, _), objeto in zip(crear, creados):
+                self._por_item['crear', indice_item]['id'] = objeto.pk
+
+            # bulk_create y bulk_update no disparan señales.
+            nuevos = [self._valores_recurso(o) for o, _ in actualizar] + [self._valores_recurso(o) for o in creados]
+            if nuevos:
+                self.invalidar(anteriores + nuevos)
+
+    def invalidar(self, registros):
+        marcar_cambio(COLECCIONES[self.modelo], periodos={r.get('periodo_academico') for r in registros})
+
+    # --- Auxiliares ---
+
+    def _valores_recurso(self, objeto):
+        return {c.attname: getattr(objeto, c.attname) for c in self.modelo._meta.concrete_fields}
+
+    def _clave_unica(self, registro):
+        return tuple(registro.get(self.opciones[c].attname if c in self.opciones else c) for c in self.campos_unicos)
+
+    @staticmethod
+    def _describir(referencia):
+        if isinstance(referencia, tuple):
+            return f"elemento {referencia[1]} de 'crear' en este lote"
+        return f"ID {referencia}"
+
+    def _resultado(self, operacion, indice, pk, errores, advertencias=None):
+        resultado = {'operacion': operacion, 'indice': indice, 'id': pk, 'estado': 'error' if errores else 'ok'}
+        if errores:
+            resultado['errores'] = errores
+        if advertencias:
+            resultado['advertencias'] = advertencias
+        self.resultados.append(resultado)
+        self._por_item[operacion, indice] = resultado
+
+
+class LoteHorarios(Lote):
+    modelo = Horario
+    campos = ('profesor', 'materia', 'aula', 'dia', 'hora_inicio', 'hora_fin', 'tipo_clase', 'seccion',
+              'periodo_academico', 'carrera_programa')
+    solapamiento_es_error = True
+
+    def invalidar(self, registros):
+        super().invalidar(registros)
+        invalidar_grillas_de_horarios(registros)
+        marcar_nomina(registros)
+
+
+class LoteSolicitudes(Lote):
+    modelo = SolicitudClase
+    campos = ('materia', 'profesor', 'aula', 'dia', 'hora_inicio', 'hora_fin', 'tipo_clase', 'seccion',
+              'periodo_academico', 'carrera_programa', 'requisitos_aula_sugeridos')
+    # Igual que en la importación de Excel, los choques entre solicitudes son solo advertencias.
+    solapamiento_es_error = False
+    campos_unicos = ('materia', 'profesor', 'tipo_clase', 'seccion', 'periodo_academico', 'carrera_programa')
+
+
+class _LoteAsignaciones(LoteHorarios):
+    """LoteHorarios cuyos elementos 'crear' provienen de asignaciones de solicitudes."""
+    def __init__(self, datos, origen):
+        super().__init__(datos)
+        self.origen = origen  # índice en 'crear' -> índice en 'asignaciones'
+
+    def _describir(self, referencia):
+        if isinstance(referencia, tuple):
+            return f"asignación {self.origen[referencia[1]]} de este lote"
+        return f"ID {referencia}"
+
+
+class AsignacionSolicitudes:
+    """
+    Asigna varias solicitudes pendientes a la vez:
+        {"asignaciones": [{"solicitud": 1, "aula": 3, "dia": "LUN", "hora_inicio": "08:00", "hora_fin": "10:00"}, ...],
+         "todo_o_nada": false}
+
+    Las solicitudes se leen con un in_bulk; los horarios resultantes se validan y crean con
+    LoteHorarios (índice de ocupación en memoria + bulk_create) y las solicitudes asignadas
+    pasan a 'Asignada' con un único UPDATE, todo dentro de la misma transacción.
+    """
+    campos_asignacion = ('aula', 'dia', 'hora_inicio', 'hora_fin')
+
+    def __init__(self, datos):
+        if not isinstance(datos, dict):
+            raise ErrorLote("El cuerpo debe ser un objeto con la lista 'asignaciones'.")
+        self.asignaciones = Lote._lista(datos, 'asignaciones')
+        self.todo_o_nada = str(datos.get('todo_o_nada', False)).lower() in ('true', '1')
+
+    def procesar(self):
+        ids = {a.get('solicitud') for a in self.asignaciones if isinstance(a, dict) and isinstance(a.get('solicitud'), int)}
+        solicitudes = SolicitudClase.objects.in_bulk(ids) if ids else {}
+
+        resultados, crear, origen, vistas = {}, [], [], set()
+        for indice_item, asignacion in enumerate(self.asignaciones):
+            errores = {}
+            pk = asignacion.get('solicitud') if isinstance(asignacion, dict) else None
+            solicitud = solicitudes.get(pk) if isinstance(pk, int) else None
+            if not isinstance(asignacion, dict):
+                errores['non_field_errors'] = ['Cada elemento debe ser un objeto.']
+            elif solicitud is None:
+                errores['solicitud'] = [f'No existe la solicitud con ID {pk}.']
+            elif pk in vistas:
+                errores['solicitud'] = ['La solicitud aparece más de una vez en este lote.']
+            elif solicitud.estado != 'Pendiente':
+                errores['solicitud'] = [f"La solicitud está en estado '{solicitud.estado}'; solo se asignan las pendientes."]
+            else:
+                for campo in self.campos_asignacion:
+                    if asignacion.get(campo) in (None, ''):
+                        errores[campo] = ['Este campo es obligatorio.']
+            resultados[indice_item] = {
+                'operacion': 'asignar', 'indice': indice_item, 'id': pk if isinstance(pk, int) else None,
+                'estado': 'error' if errores else 'ok',
+            }
+            if errores:
+                resultados[indice_item]['errores'] = errores
+                continue
+            vistas.add(pk)
+            crear.append({
+                'profesor': solicitud.profesor_id,
+                'materia': solicitud.materia_id,
+                'tipo_clase': solicitud.tipo_clase,
+                'seccion': solicitud.seccion,
+                'periodo_academico': solicitud.periodo_academico,
+                'carrera_programa': solicitud.carrera_programa,
+                **{campo: asignacion[campo] for campo in self.campos_asignacion},
+            })
+            origen.append(indice_item)
+
+        hay_errores = any(r['estado'] == 'error' for r in resultados.values())
+        if self.todo_o_nada and hay_errores:
+            return list(resultados.values()), False
+
+        with transaction.atomic():
+            lote = _LoteAsignaciones({'crear': crear, 'todo_o_nada': self.todo_o_nada}, origen)
+            resultados_lote, aplicado = lote.procesar()
+            asignadas = []
+            for resultado in resultados_lote:
+                destino = resultados[origen[resultado['indice']]]
+                if resultado['estado'] == 'error':
+                    destino.update(estado='error', errores=resultado['errores'])
+                elif aplicado:
+                    destino['horario'] = resultado['id']
+                    asignadas.append(destino['id'])
+            if asignadas:
+                # update() no dispara señales: se marca el cambio de la colección a mano.
+                SolicitudClase.objects.filter(pk__in=asignadas).update(estado='Asignada')
+                marcar_cambio(COLECCIONES[SolicitudClase], periodos={solicitudes[pk].periodo_academico for pk in asignadas})
+        return list(resultados.values()), aplicado
@@ -0,0 +1,26 @@
+# backend/core/management/commands/podar_versiones.py
+from django.core.management.base import BaseCommand
+
+from core.versionado import podar_versiones, versiones_a_podar
+
+
+class Command(BaseCommand):
+    help = (
+        "Aplica la política de retención (settings.VERSIONES_RETENCION) a las versiones automáticas "
+        "de horario y borra los contenidos que quedan sin versión."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simular', action='store_true', help="Solo lista las versiones que se borrarían.")
+
+    def handle(self, *args, **options):
+        if options['simular']:
+            descartadas = versiones_a_podar()
+            for version in descartadas:
+                self.stdout.write(f"- {version.nombre_version}")
+            self.stdout.write(self.style.SUCCESS(f"Se borrarían {len(descartadas)} versión(es)."))
+            return
+        borradas, huerfanos = podar_versiones()
+        self.stdout.write(self.style.SUCCESS(
+            f"Versiones borradas: {borradas}. Contenidos sin versión borrados: {huerfanos}."
+        ))
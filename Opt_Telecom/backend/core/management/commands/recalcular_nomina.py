@@ -0,0 +1,15 @@
+# backend/core/management/commands/recalcular_nomina.py
+from django.core.management.base import BaseCommand
+
+from core.nomina import reconstruir_resumen
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el resumen de nómina (ResumenNomina) a partir de los horarios actuales."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--periodo', help="Solo este período académico (ej. 2025-2).")
+
+    def handle(self, *args, **options):
+        filas = reconstruir_resumen(options.get('periodo'))
+        self.stdout.write(self.style.SUCCESS(f"Resumen de nómina reconstruido: {filas} fila(s)."))
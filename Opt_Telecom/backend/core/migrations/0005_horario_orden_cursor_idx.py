@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 23:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_horario_unique_together_solicitudclase_aula_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='horario',
+            index=models.Index(fields=['dia', 'hora_inicio', 'id'], name='horario_orden_cursor_idx'),
+        ),
+    ]
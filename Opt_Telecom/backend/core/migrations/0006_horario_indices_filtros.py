@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_horario_orden_cursor_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='horario',
+            index=models.Index(fields=['periodo_academico', 'carrera_programa', 'dia'], name='horario_periodo_carr_dia_idx'),
+        ),
+    ]
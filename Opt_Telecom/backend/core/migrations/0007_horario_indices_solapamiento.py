@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-18 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_horario_indices_filtros'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='horario',
+            index=models.Index(fields=['periodo_academico', 'profesor', 'dia', 'hora_inicio'], name='horario_per_prof_dia_hora_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='horario',
+            index=models.Index(fields=['periodo_academico', 'aula', 'dia', 'hora_inicio'], name='horario_per_aula_dia_hora_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='horario',
+            index=models.Index(fields=['periodo_academico', 'materia', 'seccion', 'dia', 'hora_inicio'], name='horario_per_secc_dia_hora_idx'),
+        ),
+    ]
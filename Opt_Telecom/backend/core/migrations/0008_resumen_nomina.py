@@ -0,0 +1,66 @@
+# Generated by Django 5.2.3 on 2026-10-18 23:28
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, Count, F, Sum, Value, When
+from django.db.models.functions import ExtractHour, ExtractMinute
+
+
+def reconstruir_resumen(apps, schema_editor):
+    # Mismo agregado que core.nomina.reconstruir_resumen (`manage.py recalcular_nomina`), con
+    # una copia congelada de models.duracion_en_minutos: los horarios existentes quedan en el
+    # resumen sin tener que correr el comando.
+    Horario = apps.get_model('core', 'Horario')
+    ResumenNomina = apps.get_model('core', 'ResumenNomina')
+    inicio = ExtractHour('hora_inicio') * 60 + ExtractMinute('hora_inicio')
+    fin = ExtractHour('hora_fin') * 60 + ExtractMinute('hora_fin')
+    duracion = Case(
+        When(hora_fin__lt=F('hora_inicio'), then=fin - inicio + Value(24 * 60)),
+        default=fin - inicio,
+        output_field=models.IntegerField(),
+    )
+    totales = defaultdict(lambda: [0, 0])
+    agregado = (
+        Horario.objects.order_by().values('profesor_id', 'periodo_academico', 'tipo_clase')
+        .annotate(minutos=Sum(duracion), bloques=Count('id'))
+    )
+    for fila in agregado:
+        # NULL y '' son el mismo "sin tipo".
+        total = totales[fila['profesor_id'], fila['periodo_academico'], fila['tipo_clase'] or '']
+        total[0] += fila['minutos']
+        total[1] += fila['bloques']
+    ResumenNomina.objects.bulk_create([
+        ResumenNomina(profesor_id=profesor_id, periodo_academico=periodo, tipo_clase=tipo,
+                      minutos_semanales=minutos, bloques=bloques)
+        for (profesor_id, periodo, tipo), (minutos, bloques) in totales.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_horario_indices_solapamiento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenNomina',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo_academico', models.CharField(max_length=20)),
+                ('tipo_clase', models.CharField(blank=True, default='', help_text="Tipo de clase ('' si el horario no lo indica).", max_length=50)),
+                ('minutos_semanales', models.IntegerField(default=0)),
+                ('bloques', models.IntegerField(default=0, help_text='Cantidad de bloques horarios semanales.')),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('profesor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_nomina', to='core.profesor')),
+            ],
+            options={
+                'verbose_name_plural': 'Resúmenes de Nómina',
+                'indexes': [models.Index(fields=['periodo_academico', 'profesor'], name='nomina_periodo_prof_idx')],
+                'unique_together': {('profesor', 'periodo_academico', 'tipo_clase')},
+            },
+        ),
+        migrations.RunPython(reconstruir_resumen, migrations.RunPython.noop),
+    ]
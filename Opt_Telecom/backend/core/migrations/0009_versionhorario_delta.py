@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-18 23:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_resumen_nomina'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='versionhorario',
+            name='delta',
+            field=models.JSONField(blank=True, help_text='Horarios agregados, modificados y eliminados respecto de la versión base.', null=True),
+        ),
+        migrations.AddField(
+            model_name='versionhorario',
+            name='es_completa',
+            field=models.BooleanField(default=True, help_text='Si guarda todos los horarios o solo las diferencias con su versión base.'),
+        ),
+        migrations.AddField(
+            model_name='versionhorario',
+            name='profundidad',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Diferencias encadenadas desde la última versión completa.'),
+        ),
+        migrations.AddField(
+            model_name='versionhorario',
+            name='version_base',
+            field=models.ForeignKey(blank=True, help_text='Versión sobre la que se aplican las diferencias.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='derivadas', to='core.versionhorario'),
+        ),
+    ]
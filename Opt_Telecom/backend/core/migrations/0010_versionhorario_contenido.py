@@ -0,0 +1,94 @@
+# Generated by Django 5.2.3 on 2026-10-18 23:34
+
+import json
+import zlib
+
+import django.db.models.deletion
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+
+
+def comprimir_contenidos(apps, schema_editor):
+    # Los datos existentes se pasan tal cual en formato 'json' (core/versionado.py los lee igual
+    # que los columnares); la cantidad de horarios de un delta sale de la de su versión base.
+    VersionHorario = apps.get_model('core', 'VersionHorario')
+    ContenidoVersion = apps.get_model('core', 'ContenidoVersion')
+    cantidades = {}
+    for version in VersionHorario.objects.order_by('fecha_guardado', 'id'):
+        valor = version.datos_horario_json if version.es_completa else (version.delta or {})
+        texto = json.dumps(valor, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':'))
+        contenido = ContenidoVersion.objects.create(formato='json', datos=zlib.compress(texto.encode('utf-8'), 9))
+        if version.es_completa:
+            cantidad = len(valor or [])
+        else:
+            cantidad = (cantidades.get(version.version_base_id, 0)
+                        + len(valor.get('agregados', [])) - len(valor.get('eliminados', [])))
+        cantidades[version.id] = cantidad
+        version.contenido = contenido
+        version.cantidad_horarios = max(cantidad, 0)
+        version.tamano = len(contenido.datos)
+        version.save(update_fields=['contenido', 'cantidad_horarios', 'tamano'])
+
+
+def descomprimir_contenidos(apps, schema_editor):
+    VersionHorario = apps.get_model('core', 'VersionHorario')
+    for version in VersionHorario.objects.select_related('contenido'):
+        if version.contenido is None:
+            continue
+        valor = json.loads(zlib.decompress(bytes(version.contenido.datos)).decode('utf-8'))
+        if version.contenido.formato == 'columnar':
+            columnas, datos, diccionarios = valor['columnas'], valor['datos'], valor['diccionarios']
+            valor = [
+                {c: (diccionarios[c][datos[c][i]] if c in diccionarios and datos[c][i] is not None else datos[c][i]) for c in columnas}
+                for i in range(valor['filas'])
+            ]
+        if version.es_completa:
+            version.datos_horario_json = valor
+        else:
+            version.datos_horario_json, version.delta = [], valor
+        version.save(update_fields=['datos_horario_json', 'delta'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_versionhorario_delta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContenidoVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('formato', models.CharField(choices=[('json', 'JSON'), ('columnar', 'JSON columnar')], default='json', help_text='Codificación de los datos antes de comprimirlos.', max_length=20)),
+                ('datos', models.BinaryField(help_text='Horarios (o diferencias) comprimidos con zlib.')),
+            ],
+            options={
+                'verbose_name_plural': 'Contenidos de Versiones',
+            },
+        ),
+        migrations.AddField(
+            model_name='versionhorario',
+            name='cantidad_horarios',
+            field=models.PositiveIntegerField(default=0, help_text='Cantidad de horarios de la versión.'),
+        ),
+        migrations.AddField(
+            model_name='versionhorario',
+            name='tamano',
+            field=models.PositiveIntegerField(default=0, help_text='Tamaño en bytes del contenido comprimido.'),
+        ),
+        migrations.AddField(
+            model_name='versionhorario',
+            name='contenido',
+            field=models.ForeignKey(blank=True, help_text='Datos comprimidos de la versión.', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='versiones', to='core.contenidoversion'),
+        ),
+        migrations.RunPython(comprimir_contenidos, descomprimir_contenidos),
+        migrations.RemoveField(
+            model_name='versionhorario',
+            name='datos_horario_json',
+        ),
+        migrations.RemoveField(
+            model_name='versionhorario',
+            name='delta',
+        ),
+    ]
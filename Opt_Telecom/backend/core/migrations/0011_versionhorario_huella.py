@@ -0,0 +1,111 @@
+# Generated by Django 5.2.3 on 2026-10-18 23:39
+
+import hashlib
+import json
+import zlib
+from collections import defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+
+# Copias congeladas de core/renderers.py y core/versionado.py tal como estaban al escribir esta
+# migración: los cambios posteriores en esos módulos no deben alterar lo que hace.
+ORDEN_DIAS = {codigo: i for i, codigo in enumerate(['LUN', 'MAR', 'MIE', 'JUE', 'VIE', 'SAB', 'DOM'])}
+CAMPOS_CLAVE = ('periodo_academico', 'carrera_programa', 'materia', 'seccion', 'tipo_clase')
+
+
+def _texto(valor):
+    return '' if valor is None else str(valor)
+
+
+def _orden_canonico(fila):
+    return (
+        _texto(fila.get('periodo_academico')), ORDEN_DIAS.get(fila.get('dia'), len(ORDEN_DIAS)),
+        _texto(fila.get('hora_inicio')), _texto(fila.get('hora_fin')),
+        _texto(fila.get('aula')), _texto(fila.get('materia')), _texto(fila.get('seccion')), _texto(fila.get('id')),
+    )
+
+
+def _clave_de_fila(fila, ordinal):
+    return tuple(fila.get(campo) for campo in CAMPOS_CLAVE) + (ordinal,)
+
+
+def _claves_estables(filas):
+    grupos = defaultdict(list)
+    for posicion, fila in enumerate(filas):
+        grupos[_clave_de_fila(fila, None)[:-1]].append(posicion)
+    claves = [None] * len(filas)
+    for grupo, posiciones in grupos.items():
+        posiciones.sort(key=lambda p: (ORDEN_DIAS.get(filas[p].get('dia'), len(ORDEN_DIAS)),
+                                       _texto(filas[p].get('hora_inicio')), _texto(filas[p].get('aula'))))
+        for ordinal, posicion in enumerate(posiciones):
+            claves[posicion] = grupo + (ordinal,)
+    return claves
+
+
+def _aplicar_delta(base, delta):
+    filas = dict(zip(_claves_estables(base), base))
+    for clave in delta.get('eliminados', ()):
+        filas.pop(tuple(clave), None)
+    for ordinal, fila in delta.get('modificados', []) + delta.get('agregados', []):
+        filas[_clave_de_fila(fila, ordinal)] = fila
+    resultado = sorted(filas.values(), key=_orden_canonico)
+    if 'ids' in delta:
+        resultado = [{**fila, 'id': pk} for fila, pk in zip(resultado, delta['ids'])]
+    return resultado
+
+
+def _de_columnas(estructura):
+    columnas, datos, diccionarios = estructura['columnas'], estructura['datos'], estructura['diccionarios']
+    valores = []
+    for columna in columnas:
+        if columna in diccionarios:
+            tabla = diccionarios[columna]
+            valores.append([None if v is None else tabla[v] for v in datos[columna]])
+        else:
+            valores.append(datos[columna])
+    return [dict(zip(columnas, fila)) for fila in zip(*valores)] if columnas else [{} for _ in range(estructura['filas'])]
+
+
+def _huella(filas):
+    sin_id = [{campo: valor for campo, valor in fila.items() if campo != 'id'} for fila in filas]
+    texto = json.dumps(sin_id, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def calcular_huellas(apps, schema_editor):
+    # Reconstruye cada versión recorriendo las cadenas en orden de guardado (la base de un
+    # delta siempre es anterior) para calcular la huella de sus horarios.
+    VersionHorario = apps.get_model('core', 'VersionHorario')
+    filas_por_version = {}
+    for version in VersionHorario.objects.select_related('contenido').order_by('fecha_guardado', 'id'):
+        valor = None
+        if version.contenido is not None:
+            valor = json.loads(zlib.decompress(bytes(version.contenido.datos)).decode('utf-8'))
+            if version.contenido.formato == 'columnar':
+                valor = _de_columnas(valor)
+        if version.es_completa:
+            filas = sorted(valor or [], key=_orden_canonico)
+        elif version.version_base_id in filas_por_version:
+            filas = _aplicar_delta(filas_por_version[version.version_base_id], valor or {})
+        else:
+            continue
+        filas_por_version[version.id] = filas
+        version.huella = _huella(filas)
+        version.save(update_fields=['huella'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_versionhorario_contenido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='versionhorario',
+            name='huella',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='SHA-256 de los horarios de la versión.', max_length=64),
+        ),
+        migrations.RunPython(calcular_huellas, migrations.RunPython.noop),
+    ]
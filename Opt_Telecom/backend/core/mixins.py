@@ -0,0 +1,196 @@
+# backend/core/mixins.py
+"""
+Mixins reutilizables para los ViewSets de la API.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import serializers, status
+from rest_framework.response import Response
+
+from .colecciones import versiones_colecciones
+from .serializers import seleccionar_campos
+
+
+class ColeccionETagMixin:
+    """
+    GET condicional para list y retrieve a partir de las versiones de colección.
+
+    El ETag combina la URL completa, el formato de respuesta y la versión de cada colección
+    de la que depende la vista (`colecciones`). Si el cliente envía If-None-Match con ese
+    ETag se responde 304 antes de ejecutar la consulta o el serializador.
+    Si `coleccion_por_periodo` está definida y la petición filtra por un único
+    ?periodo_academico=, se usa la versión de ese período en lugar de la global.
+    """
+    colecciones = ()
+    coleccion_por_periodo = None
+
+    def huella(self, request):
+        """Resumen de la petición y de las versiones de sus colecciones; memoizado por petición."""
+        if getattr(self, '_huella', None) is None:
+            self._huella = self._calcular_huella(request)
+        return self._huella
+
+    def _calcular_huella(self, request):
+        periodo = None
+        if self.coleccion_por_periodo:
+            periodo = request.query_params.get('periodo_academico') or None
+            if periodo and ',' in periodo:
+                periodo = None
+        versiones = versiones_colecciones(self.colecciones, periodo=periodo)
+        formato = request.accepted_renderer.format if getattr(request, 'accepted_renderer', None) else ''
+        contenido = f"{request.build_absolute_uri()}|{formato}|{versiones}"
+        return hashlib.md5(contenido.encode('utf-8')).hexdigest()
+
+    def obtener_respuesta(self, request, accion, *args, **kwargs):
+        return accion(request, *args, **kwargs)
+
+    def respuesta_condicional(self, request, accion, *args, **kwargs):
+        etag = quote_etag(self.huella(request))
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            recibidos = [e.removeprefix('W/') for e in parse_etags(if_none_match)]
+            if etag in recibidos or '*' in recibidos:
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        response = self.obtener_respuesta(request, accion, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+            # El navegador guarda la respuesta pero la revalida en cada petición.
+            response['Cache-Control'] = 'no-cache'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.respuesta_condicional(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.respuesta_condicional(request, super().retrieve, *args, **kwargs)
+
+
+# --- Caché de respuestas ---
+
+def _clave_contador(nombre, tipo):
+    return f"respuesta_cache:{nombre}:{tipo}"
+
+
+def _contar(nombre, tipo):
+    clave = _clave_contador(nombre, tipo)
+    if not cache.add(clave, 1, None):
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.set(clave, 1, None)
+
+
+def estadisticas_cache(nombres):
+    """Aciertos y fallos de la caché de respuestas por ViewSet (basename del router)."""
+    contadores = cache.get_many([_clave_contador(n, t) for n in nombres for t in ('aciertos', 'fallos')])
+    estadisticas = {}
+    for nombre in nombres:
+        aciertos = contadores.get(_clave_contador(nombre, 'aciertos'), 0)
+        fallos = contadores.get(_clave_contador(nombre, 'fallos'), 0)
+        total = aciertos + fallos
+        estadisticas[nombre] = {
+            'aciertos': aciertos,
+            'fallos': fallos,
+            'tasa_aciertos': round(aciertos / total, 4) if total else None,
+        }
+    return estadisticas
+
+
+class CacheRespuestaMixin(ColeccionETagMixin):
+    """
+    Caché de lectura para list y retrieve: guarda los datos ya serializados bajo una clave
+    derivada de la URL (parámetros incluidos), el formato y las versiones de `colecciones`.
+    Como las señales incrementan esas versiones en cada escritura, una respuesta vieja deja de
+    ser alcanzable en cuanto cambia cualquier modelo del que depende.
+    """
+    def obtener_respuesta(self, request, accion, *args, **kwargs):
+        nombre = self.basename
+        clave = f"respuesta_cache:{nombre}:{self.huella(request)}"
+        datos = cache.get(clave)
+        if datos is not None:
+            _contar(nombre, 'aciertos')
+            return Response(datos)
+
+        _contar(nombre, 'fallos')
+        response = accion(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(clave, response.data, getattr(settings, 'RESPUESTAS_CACHE_TIEMPO', 300))
+        return response
+
+
+# --- Campos dinámicos ---
+
+class CamposDinamicosViewMixin:
+    """
+    Complemento de CamposDinamicosMixin (serializers.py) para los ViewSets: con ?fields= u
+    ?omit= el queryset se reduce con only() a las columnas necesarias y se descartan los
+    select_related y prefetch_related de relaciones que no se van a serializar.
+    """
+
+    def campos_solicitados(self):
+        """Campos del serializador que se van a devolver, o None si la petición no los restringe."""
+        if not hasattr(self, '_campos_solicitados'):
+            self._campos_solicitados = None
+            if self.request is not None and self.request.method == 'GET':
+                self._campos_solicitados = seleccionar_campos(self.request.query_params, list(self._serializer_vacio().fields))
+        return self._campos_solicitados
+
+    def campo_solicitado(self, nombre):
+        campos = self.campos_solicitados()
+        return campos is None or nombre in campos
+
+    def _serializer_vacio(self):
+        # Sin petición en el contexto: todos los campos, para conocer sus fuentes.
+        return self.get_serializer_class()(context={})
+
+    def podar_queryset(self, queryset):
+        campos = self.campos_solicitados()
+        if campos is None:
+            return queryset
+        modelo = queryset.model
+        disponibles = self._serializer_vacio().fields
+        columnas, seleccionadas, precargadas = {modelo._meta.pk.name}, set(), set()
+
+        for nombre in campos:
+            campo = disponibles[nombre]
+            if isinstance(campo, serializers.SerializerMethodField):
+                continue  # Calculados: la vista se encarga de sus anotaciones.
+            if campo.source == '*':
+                return queryset
+            raiz = campo.source.split('.')[0]
+            try:
+                campo_modelo = modelo._meta.get_field(raiz)
+            except FieldDoesNotExist:
+                continue
+            if campo_modelo.many_to_many or campo_modelo.one_to_many:
+                precargadas.add(raiz)
+            elif campo_modelo.is_relation and not isinstance(campo, serializers.PrimaryKeyRelatedField):
+                columnas.add(raiz)
+                seleccionadas.add(raiz)
+            else:
+                columnas.add(raiz)
+
+        # La paginación por cursor lee los campos de su ordenamiento en la última fila.
+        for orden in getattr(self.paginator, 'ordering', None) or ():
+            partes = orden.lstrip('-').split('__')
+            columnas.add(partes[0])
+            if len(partes) > 1:
+                seleccionadas.add(partes[0])
+
+        queryset = queryset.select_related(None)
+        if seleccionadas:
+            queryset = queryset.select_related(*seleccionadas)
+        lookups = [
+            lookup for lookup in queryset._prefetch_related_lookups
+            if (lookup.prefetch_through if isinstance(lookup, Prefetch) else lookup).split('__')[0] in precargadas
+        ]
+        return queryset.prefetch_related(None).prefetch_related(*lookups).only(*columnas)
+
+    def get_queryset(self):
+        return self.podar_queryset(super().get_queryset())
@@ -1,7 +1,8 @@
 # backend/core/models.py
 
 from django.db import models
-from django.db.models import JSONField
+from django.db.models import Case, F, FloatField, JSONField, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, ExtractHour, ExtractMinute
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 import json
@@ -22,6 +23,32 @@ def validate_json_schema(value):
             params={'value': value},
         )
 
+# --- Expresiones de consulta reutilizables ---
+def duracion_en_minutos(prefijo=''):
+    """
+    Expresión SQL con la duración en minutos de un bloque horario (hora_inicio/hora_fin).
+    Los rangos que cruzan la medianoche (ej. 23:00 - 02:00) suman 24 horas.
+    `prefijo` permite usarla a través de relaciones (ej. 'horarios_asignados__').
+    """
+    inicio = ExtractHour(f'{prefijo}hora_inicio') * 60 + ExtractMinute(f'{prefijo}hora_inicio')
+    fin = ExtractHour(f'{prefijo}hora_fin') * 60 + ExtractMinute(f'{prefijo}hora_fin')
+    return Case(
+        When(**{f'{prefijo}hora_fin__lt': F(f'{prefijo}hora_inicio')}, then=fin - inicio + Value(24 * 60)),
+        default=fin - inicio,
+        output_field=models.IntegerField(),
+    )
+
+
+class ProfesorQuerySet(models.QuerySet):
+    def con_carga_horaria(self):
+        """
+        Anota 'carga_horaria_asignada' (horas semanales asignadas en Horario) con un único
+        agregado SQL, en lugar de recorrer horarios_asignados por cada profesor.
+        """
+        minutos = Coalesce(Sum(duracion_en_minutos('horarios_asignados__')), 0)
+        return self.annotate(carga_horaria_asignada=Cast(minutos, FloatField()) / Value(60.0))
+
+
 # --- Tus modelos existentes ---
 class Profesor(models.Model):
     nombre = models.CharField(max_length=100)
@@ -39,6 +66,8 @@ class Profesor(models.Model):
     dedicatoria = models.CharField(max_length=50, null=True, blank=True) 
     carrera_principal = models.CharField(max_length=100, null=True, blank=True, help_text="Carrera principal a la que está adscrito el profesor.")
 
+    objects = ProfesorQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.nombre} {self.apellido}"
     
@@ -115,6 +144,17 @@ class Horario(models.Model):
         unique_together = ('aula', 'dia', 'hora_inicio', 'hora_fin', 'periodo_academico') 
         verbose_name_plural = "Horarios"
         ordering = ['dia', 'hora_inicio'] # Para un orden lógico en listas
+        indexes = [
+            # Soporta la paginación por cursor (keyset) del listado de horarios.
+            models.Index(fields=['dia', 'hora_inicio', 'id'], name='horario_orden_cursor_idx'),
+            # Vistas de calendario por profesor, aula, sección y carrera dentro de un período.
+            # hora_inicio al final permite resolver la búsqueda de solapamientos
+            # (hora_inicio < fin) como un rango dentro del mismo índice.
+            models.Index(fields=['periodo_academico', 'profesor', 'dia', 'hora_inicio'], name='horario_per_prof_dia_hora_idx'),
+            models.Index(fields=['periodo_academico', 'aula', 'dia', 'hora_inicio'], name='horario_per_aula_dia_hora_idx'),
+            models.Index(fields=['periodo_academico', 'materia', 'seccion', 'dia', 'hora_inicio'], name='horario_per_secc_dia_hora_idx'),
+            models.Index(fields=['periodo_academico', 'carrera_programa', 'dia'], name='horario_periodo_carr_dia_idx'),
+        ]
 
     def __str__(self):
         return f"{self.materia.nombre} - {self.dia} {self.hora_inicio.strftime('%H:%M')}-{self.hora_fin.strftime('%H:%M')} ({self.profesor.nombre})"
@@ -202,16 +242,63 @@ class SolicitudClase(models.Model):
         ordering = ['periodo_academico', 'materia__nombre', 'seccion'] # Orden lógico
 
 # NUEVO MODELO: VersionHorario
+# Contenido de una VersionHorario: JSON compacto comprimido con zlib (ver core/versionado.py).
+# Va en su propia tabla para que los listados de versiones no lean ni transfieran los datos.
+class ContenidoVersion(models.Model):
+    FORMATO_CHOICES = [
+        ('json', 'JSON'),
+        ('columnar', 'JSON columnar'),
+    ]
+    formato = models.CharField(max_length=20, choices=FORMATO_CHOICES, default='json', help_text="Codificación de los datos antes de comprimirlos.")
+    datos = models.BinaryField(help_text="Horarios (o diferencias) comprimidos con zlib.")
+
+    def __str__(self):
+        return f"Contenido {self.pk} ({self.formato}, {len(self.datos)} bytes)"
+
+    class Meta:
+        verbose_name_plural = "Contenidos de Versiones"
+
 class VersionHorario(models.Model):
     nombre_version = models.CharField(max_length=255, unique=True, help_text="Un nombre descriptivo para esta versión del horario.")
     fecha_guardado = models.DateTimeField(auto_now_add=True, help_text="Fecha y hora en que se guardó esta versión.")
-    
-    # Campo JSON para almacenar una "instantánea" de todos los horarios activos en ese momento.
-    datos_horario_json = models.JSONField(help_text="Copia serializada del conjunto de horarios.", default=list, validators=[validate_json_schema]) # Cambiado a default=list, ya que contendrá una lista de horarios
+
+    # "Instantánea" de los horarios (o sus diferencias con version_base), comprimida aparte.
+    contenido = models.ForeignKey(ContenidoVersion, on_delete=models.PROTECT, null=True, blank=True, related_name='versiones', help_text="Datos comprimidos de la versión.")
+    cantidad_horarios = models.PositiveIntegerField(default=0, help_text="Cantidad de horarios de la versión.")
+    tamano = models.PositiveIntegerField(default=0, help_text="Tamaño en bytes del contenido comprimido.")
+    # Dos versiones con la misma huella son idénticas y comparten contenido.
+    huella = models.CharField(max_length=64, blank=True, default='', db_index=True, help_text="SHA-256 de los horarios de la versión.")
+
+    # Las versiones se guardan como cadena: una completa cada tanto y, entre ellas, solo las
+    # diferencias respecto de la versión anterior (ver core/versionado.py).
+    es_completa = models.BooleanField(default=True, help_text="Si guarda todos los horarios o solo las diferencias con su versión base.")
+    version_base = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='derivadas', help_text="Versión sobre la que se aplican las diferencias.")
+    profundidad = models.PositiveSmallIntegerField(default=0, help_text="Diferencias encadenadas desde la última versión completa.")
 
     def __str__(self):
         return f"{self.nombre_version} - Guardado el {self.fecha_guardado.strftime('%Y-%m-%d %H:%M')}"
 
     class Meta:
         verbose_name_plural = "Versiones de Horarios"
-        ordering = ['-fecha_guardado'] # Ordenar por las más recientes primero
\ No newline at end of file
+        ordering = ['-fecha_guardado'] # Ordenar por las más recientes primero
+
+# Resumen persistido para la nómina: horas semanales de docencia por profesor, período y tipo
+# de clase. Se recalcula solo para los (profesor, período) afectados por cada cambio en Horario
+# (ver core/nomina.py); `manage.py recalcular_nomina` lo reconstruye completo.
+class ResumenNomina(models.Model):
+    profesor = models.ForeignKey(Profesor, on_delete=models.CASCADE, related_name='resumenes_nomina')
+    periodo_academico = models.CharField(max_length=20)
+    tipo_clase = models.CharField(max_length=50, blank=True, default='', help_text="Tipo de clase ('' si el horario no lo indica).")
+    minutos_semanales = models.IntegerField(default=0)
+    bloques = models.IntegerField(default=0, help_text="Cantidad de bloques horarios semanales.")
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.profesor} - {self.periodo_academico} - {self.tipo_clase or 'Sin tipo'}: {self.minutos_semanales / 60:.2f} h"
+
+    class Meta:
+        verbose_name_plural = "Resúmenes de Nómina"
+        unique_together = ('profesor', 'periodo_academico', 'tipo_clase')
+        indexes = [
+            models.Index(fields=['periodo_academico', 'profesor'], name='nomina_periodo_prof_idx'),
+        ]
@@ -0,0 +1,134 @@
+# backend/core/movimientos.py
+"""
+Mover o intercambiar horarios desde el calendario (arrastrar y soltar).
+
+Solo se revisan los intervalos afectados: una consulta con filtro_solapamiento por cada
+bloque movido (unidas en un OR), resuelta con los índices por período, recurso, día y hora.
+Los choques se devuelven como conjunto para que el frontend los marque mientras se arrastra.
+"""
+from datetime import time
+
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404
+
+from .colecciones import COLECCIONES, marcar_cambio
+from .grilla import invalidar_grillas_de_horarios
+from .importacion import minutos_a_time, time_a_minutos
+from .models import Aula, Horario
+from .nomina import marcar_nomina
+from .ocupacion import IndiceOcupacion, filtro_solapamiento, intervalo_minutos
+from .validacion import CAMPOS_OCUPACION, DIAS_VALIDOS
+
+CAMPOS_MOVIMIENTO = ('dia', 'hora_inicio', 'hora_fin', 'aula_id')
+# La carrera se lee también para invalidar sus grillas.
+CAMPOS_HORARIO = CAMPOS_OCUPACION + ('carrera_programa',)
+
+
+class ErrorMovimiento(Exception):
+    """Datos del movimiento no válidos (día, horas o aula)."""
+
+
+def _hora(valor, campo):
+    try:
+        return time.fromisoformat(str(valor))
+    except ValueError:
+        raise ErrorMovimiento(f"'{campo}' debe tener el formato HH:MM.")
+
+
+def _destino(actual, datos):
+    """Registro de `actual` con el día, las horas y el aula pedidos. Sin hora_fin se conserva la duración."""
+    nuevo = dict(actual)
+    if datos.get('dia') is not None:
+        nuevo['dia'] = str(datos['dia']).upper()
+        if nuevo['dia'] not in DIAS_VALIDOS:
+            raise ErrorMovimiento(f"Día no válido: '{datos['dia']}'.")
+    if datos.get('aula') is not None:
+        try:
+            nuevo['aula_id'] = int(datos['aula'])
+        except (TypeError, ValueError):
+            raise ErrorMovimiento("'aula' debe ser un identificador numérico.")
+    if datos.get('hora_inicio') is not None:
+        nuevo['hora_inicio'] = _hora(datos['hora_inicio'], 'hora_inicio')
+        if datos.get('hora_fin') is None:
+            inicio, fin = intervalo_minutos(actual['hora_inicio'], actual['hora_fin'])
+            nuevo['hora_fin'] = minutos_a_time(time_a_minutos(nuevo['hora_inicio']) + fin - inicio)
+    if datos.get('hora_fin') is not None:
+        nuevo['hora_fin'] = _hora(datos['hora_fin'], 'hora_fin')
+    if nuevo['hora_inicio'] == nuevo['hora_fin']:
+        raise ErrorMovimiento('La hora de fin debe ser distinta de la hora de inicio.')
+    return nuevo
+
+
+def planificar_movimiento(pk, datos):
+    """
+    Devuelve la lista de (anterior, nuevo) de los horarios que cambian.
+    {"dia", "hora_inicio", "hora_fin"?, "aula"?} mueve el horario `pk`;
+    {"intercambiar_con": id} intercambia día, horas y aula con otro horario.
+    """
+    if not isinstance(datos, dict):
+        raise ErrorMovimiento('El cuerpo debe ser un objeto.')
+    otro_pk = datos.get('intercambiar_con')
+    if otro_pk is not None and not isinstance(otro_pk, int):
+        raise ErrorMovimiento("'intercambiar_con' debe ser un identificador numérico.")
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        raise Http404
+    ids = [pk] + ([otro_pk] if otro_pk is not None else [])
+    actuales = {r['id']: r for r in Horario.objects.filter(pk__in=ids).values(*CAMPOS_HORARIO)}
+    if pk not in actuales:
+        raise Http404
+    actual = actuales[pk]
+
+    if otro_pk is None:
+        nuevo = _destino(actual, datos)
+        if nuevo['aula_id'] != actual['aula_id'] and not Aula.objects.filter(pk=nuevo['aula_id']).exists():
+            raise ErrorMovimiento(f"No existe aula con ID {nuevo['aula_id']}.")
+        return [(actual, nuevo)]
+
+    if otro_pk not in actuales or otro_pk == actual['id']:
+        raise ErrorMovimiento(f'No existe otro horario con ID {otro_pk} para intercambiar.')
+    otro = actuales[otro_pk]
+    if otro['periodo_academico'] != actual['periodo_academico']:
+        raise ErrorMovimiento('Solo se pueden intercambiar horarios del mismo período académico.')
+    return [
+        (actual, {**actual, **{campo: otro[campo] for campo in CAMPOS_MOVIMIENTO}}),
+        (otro, {**otro, **{campo: actual[campo] for campo in CAMPOS_MOVIMIENTO}}),
+    ]
+
+
+def conflictos_movimiento(movidos):
+    """[{'horario', 'recurso', 'con'}] de los bloques movidos, contra el resto y entre ellos."""
+    ids = [nuevo['id'] for _, nuevo in movidos]
+    filtro = Q()
+    for _, nuevo in movidos:
+        filtro |= filtro_solapamiento(nuevo)
+    vecinos = Horario.objects.filter(filtro).exclude(pk__in=ids).order_by().values(*CAMPOS_OCUPACION)
+    indice = IndiceOcupacion.desde_registros(vecinos)
+    for _, nuevo in movidos:
+        indice.agregar(nuevo['id'], nuevo)
+    return [
+        {'horario': nuevo['id'], 'recurso': recurso, 'con': otro}
+        for _, nuevo in movidos
+        for recurso, otro in indice.conflictos(nuevo, ignorar=nuevo['id'])
+    ]
+
+
+def aplicar_movimiento(movidos):
+    with transaction.atomic():
+        if len(movidos) > 1:
+            # En un intercambio dentro de la misma aula el segundo horario ocupa todavía la clave
+            # única (aula, día, horas, período) que toma el primero: se aparta antes dejándolo con
+            # duración cero, que ningún horario válido puede tener, sin tocar su período ni su aula.
+            anterior = movidos[1][0]
+            Horario.objects.filter(pk=anterior['id']).update(hora_fin=anterior['hora_inicio'])
+        for _, nuevo in movidos:
+            Horario.objects.filter(pk=nuevo['id']).update(
+                periodo_academico=nuevo['periodo_academico'], **{campo: nuevo[campo] for campo in CAMPOS_MOVIMIENTO}
+            )
+        # update() no dispara señales.
+        registros = [registro for par in movidos for registro in par]
+        marcar_cambio(COLECCIONES[Horario], periodos={r['periodo_academico'] for r in registros})
+        invalidar_grillas_de_horarios(registros)
+        marcar_nomina(registros)  # Cambiar las horas puede cambiar la duración.
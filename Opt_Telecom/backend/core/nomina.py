@@ -0,0 +1,158 @@
+# backend/core/nomina.py
+"""
+Horas de docencia para la nómina.
+
+ResumenNomina guarda, por profesor, período y tipo de clase, los minutos semanales asignados.
+Cada cambio en Horario programa (al confirmarse la transacción) el recálculo solo de los
+(profesor, período) afectados, con un único agregado SQL; el reporte de fin de mes lee la
+tabla de resumen ya agregada en lugar de recorrer los horarios de cada profesor.
+"""
+import threading
+from collections import defaultdict
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .models import Horario, ResumenNomina, duracion_en_minutos
+
+SIN_TIPO = 'Sin tipo'
+
+# Atributos del profesor por los que se desglosan los totales.
+DESGLOSES = ('categoria', 'regimen', 'dedicatoria')
+
+_pendientes = threading.local()
+
+
+# --- Mantenimiento del resumen ---
+
+def _filtro_pares(pares):
+    por_periodo = defaultdict(set)
+    for profesor_id, periodo in pares:
+        por_periodo[periodo].add(profesor_id)
+    filtro = Q(pk__in=[])
+    for periodo, profesores in por_periodo.items():
+        filtro |= Q(periodo_academico=periodo, profesor_id__in=profesores)
+    return filtro
+
+
+def _reemplazar(filtro):
+    """Vuelve a calcular las filas del resumen que cumplen `filtro` (sobre profesor y período)."""
+    totales = defaultdict(lambda: [0, 0])
+    agregado = (
+        Horario.objects.filter(filtro).order_by()
+        .values('profesor_id', 'periodo_academico', 'tipo_clase')
+        .annotate(minutos=Sum(duracion_en_minutos()), bloques=Count('id'))
+    )
+    for fila in agregado:
+        # NULL y '' son el mismo "sin tipo".
+        total = totales[fila['profesor_id'], fila['periodo_academico'], fila['tipo_clase'] or '']
+        total[0] += fila['minutos']
+        total[1] += fila['bloques']
+    with transaction.atomic():
+        ResumenNomina.objects.filter(filtro).delete()
+        ResumenNomina.objects.bulk_create([
+            ResumenNomina(profesor_id=profesor_id, periodo_academico=periodo, tipo_clase=tipo,
+                          minutos_semanales=minutos, bloques=bloques)
+            for (profesor_id, periodo, tipo), (minutos, bloques) in totales.items()
+        ])
+    return len(totales)
+
+
+def recalcular_resumen(pares):
+    """Recalcula el resumen de los pares (profesor_id, periodo_academico) indicados."""
+    pares = {(p, periodo) for p, periodo in pares if p is not None and periodo}
+    return _reemplazar(_filtro_pares(pares)) if pares else 0
+
+
+def reconstruir_resumen(periodo=None):
+    """Reconstruye el resumen completo (o el de un período). Devuelve cuántas filas quedaron."""
+    return _reemplazar(Q(periodo_academico=periodo) if periodo else Q())
+
+
+def _recalcular_pendientes():
+    pares = getattr(_pendientes, 'pares', set())
+    _pendientes.pares = set()
+    recalcular_resumen(pares)
+
+
+def marcar_nomina(registros):
+    """
+    Programa el recálculo de los (profesor, período) de `registros` (instancias o dicts) al
+    confirmarse la transacción. Varios cambios en la misma transacción se recalculan juntos:
+    el primer callback se lleva todos los pares acumulados y los demás no hacen nada.
+    """
+    pares = getattr(_pendientes, 'pares', None)
+    if pares is None:
+        pares = _pendientes.pares = set()
+    for registro in registros:
+        obtener = registro.get if isinstance(registro, dict) else (lambda campo: getattr(registro, campo, None))
+        pares.add((obtener('profesor_id'), obtener('periodo_academico')))
+    transaction.on_commit(_recalcular_pendientes)
+
+
+# --- Reporte ---
+
+def tipos_de_clase(periodo):
+    tipos = ResumenNomina.objects.filter(periodo_academico=periodo).values_list('tipo_clase', flat=True).distinct()
+    return sorted({tipo or SIN_TIPO for tipo in tipos})
+
+
+def filas_nomina(periodo, tipos, semanas):
+    """
+    Un dict por profesor con sus horas semanales por tipo de clase, el total semanal y el del
+    período, leídos en una sola consulta del resumen.
+    """
+    resumen = (
+        ResumenNomina.objects.filter(periodo_academico=periodo)
+        .order_by('profesor__apellido', 'profesor__nombre', 'profesor_id')
+        .values_list(
+            'profesor_id', 'profesor__cedula', 'profesor__nombre', 'profesor__apellido',
+            'profesor__categoria', 'profesor__regimen', 'profesor__dedicatoria',
+            'tipo_clase', 'minutos_semanales', 'bloques',
+        )
+    )
+    for profesor_id, filas in groupby(resumen.iterator(chunk_size=2000), key=lambda fila: fila[0]):
+        filas = list(filas)
+        _, cedula, nombre, apellido, categoria, regimen, dedicatoria = filas[0][:7]
+        minutos = dict.fromkeys(tipos, 0)
+        for fila in filas:
+            minutos[fila[7] or SIN_TIPO] += fila[8]
+        semanales = sum(minutos.values()) / 60
+        yield {
+            'profesor': profesor_id, 'cedula': cedula, 'nombre': f'{nombre} {apellido}',
+            'categoria': categoria, 'regimen': regimen, 'dedicatoria': dedicatoria,
+            'horas_por_tipo': {tipo: round(valor / 60, 2) for tipo, valor in minutos.items()},
+            'bloques': sum(fila[9] for fila in filas),
+            'horas_semanales': round(semanales, 2),
+            'horas_periodo': round(semanales * semanas, 2),
+        }
+
+
+def totales_nomina(filas, tipos, semanas):
+    """Totales del período por tipo de clase y por cada atributo de DESGLOSES."""
+    totales = {'tipo_clase': dict.fromkeys(tipos, 0.0), **{campo: defaultdict(float) for campo in DESGLOSES}}
+    horas = 0.0
+    for fila in filas:
+        horas += fila['horas_semanales']
+        for tipo, valor in fila['horas_por_tipo'].items():
+            totales['tipo_clase'][tipo] += valor
+        for campo in DESGLOSES:
+            totales[campo][fila[campo] or 'Sin definir'] += fila['horas_semanales']
+    return {
+        'horas_semanales': round(horas, 2),
+        'horas_periodo': round(horas * semanas, 2),
+        'por': {campo: {k: round(v, 2) for k, v in valores.items()} for campo, valores in totales.items()},
+    }
+
+
+def encabezados_nomina(tipos):
+    return (['Cédula', 'Profesor', 'Categoría', 'Régimen', 'Dedicación']
+            + [f'Horas {tipo}' for tipo in tipos] + ['Bloques', 'Horas Semanales', 'Horas del Período'])
+
+
+def filas_exportacion_nomina(filas, tipos):
+    for fila in filas:
+        yield ([fila['cedula'], fila['nombre'], fila['categoria'], fila['regimen'], fila['dedicatoria']]
+               + [fila['horas_por_tipo'][tipo] for tipo in tipos]
+               + [fila['bloques'], fila['horas_semanales'], fila['horas_periodo']])
@@ -0,0 +1,227 @@
+# backend/core/ocupacion.py
+"""
+Índice de ocupación en memoria para detectar solapamientos de recursos (profesor, aula,
+sección) sin una consulta por cada bloque a comprobar.
+
+Cada recurso en un día y período tiene una máscara de bits con resolución de 5 minutos
+(un bit por franja) y la lista exacta de intervalos que la forman. La máscara descarta en
+una sola operación los casos sin choque; solo cuando hay bits en común se revisan los
+intervalos exactos, por lo que horas que no caen en múltiplos de 5 siguen siendo correctas.
+
+También compila a estructuras en memoria las Restricciones, la disponibilidad declarada de
+los profesores y los requisitos de aula de las materias.
+"""
+import json
+from collections import defaultdict
+from datetime import time
+
+from django.db.models import F, Q
+
+from .importacion import MINUTOS_POR_DIA, time_a_minutos
+
+RESOLUCION = 5
+
+# recurso -> campos del registro que lo identifican
+RECURSOS_HORARIO = {
+    'profesor': ('profesor_id',),
+    'aula': ('aula_id',),
+    'seccion': ('materia_id', 'seccion'),
+}
+
+
+def intervalo_minutos(hora_inicio, hora_fin):
+    """(inicio, fin) en minutos; si el bloque cruza la medianoche el fin pasa del 1440."""
+    inicio, fin = time_a_minutos(hora_inicio), time_a_minutos(hora_fin)
+    if fin <= inicio:
+        fin += MINUTOS_POR_DIA
+    return inicio, fin
+
+
+def mascara(inicio, fin):
+    """Bits de las franjas de RESOLUCION minutos que toca [inicio, fin), redondeando hacia afuera."""
+    primera = inicio // RESOLUCION
+    ultima = -(-fin // RESOLUCION)
+    return ((1 << (ultima - primera)) - 1) << primera
+
+
+class IndiceOcupacion:
+    def __init__(self, recursos=RECURSOS_HORARIO):
+        self.recursos = recursos
+        self._mascaras = defaultdict(int)
+        self._intervalos = defaultdict(dict)  # clave de recurso -> {referencia: (inicio, fin)}
+        self._claves = {}  # referencia -> claves de recurso que ocupa
+
+    @classmethod
+    def desde_registros(cls, registros, recursos=RECURSOS_HORARIO):
+        """Construye el índice a partir de dicts con 'id', período, día, horas y los campos de `recursos`."""
+        indice = cls(recursos)
+        for registro in registros:
+            indice.agregar(registro['id'], registro)
+        return indice
+
+    def _claves_recurso(self, registro):
+        claves = []
+        if not registro.get('dia') or registro.get('hora_inicio') is None or registro.get('hora_fin') is None:
+            return claves
+        for recurso, campos in self.recursos.items():
+            valores = tuple(registro.get(campo) for campo in campos)
+            if None not in valores:
+                claves.append((recurso, registro.get('periodo_academico'), registro['dia']) + valores)
+        return claves
+
+    def agregar(self, referencia, registro):
+        claves = self._claves_recurso(registro)
+        if not claves:
+            return
+        inicio, fin = intervalo_minutos(registro['hora_inicio'], registro['hora_fin'])
+        bits = mascara(inicio, fin)
+        for clave in claves:
+            self._intervalos[clave][referencia] = (inicio, fin)
+            self._mascaras[clave] |= bits
+        self._claves[referencia] = claves
+
+    def quitar(self, referencia):
+        for clave in self._claves.pop(referencia, ()):
+            intervalos = self._intervalos[clave]
+            intervalos.pop(referencia, None)
+            # La máscara se recalcula con los intervalos que quedan.
+            bits = 0
+            for inicio, fin in intervalos.values():
+                bits |= mascara(inicio, fin)
+            self._mascaras[clave] = bits
+
+    def conflictos(self, registro, ignorar=None):
+        """Lista de (recurso, referencia) que se solapan con `registro`, sin contar `ignorar`."""
+        claves = self._claves_recurso(registro)
+        if not claves:
+            return []
+        inicio, fin = intervalo_minutos(registro['hora_inicio'], registro['hora_fin'])
+        bits = mascara(inicio, fin)
+        encontrados = []
+        for clave in claves:
+            if not self._mascaras.get(clave, 0) & bits:
+                continue
+            for referencia, (inicio_b, fin_b) in self._intervalos[clave].items():
+                if referencia != ignorar and inicio < fin_b and inicio_b < fin:
+                    encontrados.append((clave[0], referencia))
+        return encontrados
+
+
+# --- Restricciones, disponibilidad y requisitos de aula compilados ---
+
+# tipo de Restriccion -> (recurso bloqueado, campos que lo identifican)
+RECURSOS_RESTRICCION = {
+    'PROFESOR_NO_DISPONIBLE': ('profesor', ('profesor_id',)),
+    'AULA_NO_DISPONIBLE': ('aula', ('aula_id',)),
+    'MATERIA_NO_EN_AULA': ('materia_aula', ('materia_id', 'aula_id')),
+}
+
+
+class IndiceRestricciones:
+    """
+    Restricciones agrupadas por (recurso, identificador, día). Una restricción sin día aplica
+    toda la semana y una sin horas aplica el día completo.
+    """
+    def __init__(self, restricciones):
+        self._bloqueos = defaultdict(list)
+        for restriccion in restricciones:
+            if restriccion['tipo'] not in RECURSOS_RESTRICCION:
+                continue
+            recurso, campos = RECURSOS_RESTRICCION[restriccion['tipo']]
+            valores = tuple(restriccion.get(campo) for campo in campos)
+            if None in valores:
+                continue
+            if restriccion.get('hora_inicio') is not None and restriccion.get('hora_fin') is not None:
+                inicio, fin = intervalo_minutos(restriccion['hora_inicio'], restriccion['hora_fin'])
+            else:
+                inicio, fin = 0, MINUTOS_POR_DIA
+            self._bloqueos[(recurso, valores, restriccion.get('dia') or None)].append((inicio, fin, restriccion))
+
+    def conflictos(self, registro):
+        """Restricciones (dicts) que impiden el bloque `registro`."""
+        inicio, fin = intervalo_minutos(registro['hora_inicio'], registro['hora_fin'])
+        encontradas = []
+        for recurso, campos in RECURSOS_RESTRICCION.values():
+            valores = tuple(registro.get(campo) for campo in campos)
+            for dia in (registro['dia'], None):
+                for inicio_r, fin_r, restriccion in self._bloqueos.get((recurso, valores, dia), ()):
+                    if inicio < fin_r and inicio_r < fin:
+                        encontradas.append(restriccion)
+        return encontradas
+
+
+def compilar_disponibilidad(disponibilidad):
+    """
+    {'LUN': ['08:00-12:00', ...]} -> {'LUN': [(480, 720), ...]}. None si el profesor no definió
+    disponibilidad (está disponible siempre). Las franjas mal escritas se ignoran, igual que en
+    el generador de horarios.
+    """
+    if not disponibilidad:
+        return None
+    if isinstance(disponibilidad, str):
+        try:
+            disponibilidad = json.loads(disponibilidad)
+        except ValueError:
+            return {}
+    if not isinstance(disponibilidad, dict):
+        return {}
+    compilada = {}
+    for dia, franjas in disponibilidad.items():
+        for franja in franjas or []:
+            try:
+                inicio, fin = (time_a_minutos(time.fromisoformat(parte.strip())) for parte in str(franja).split('-'))
+            except ValueError:
+                continue
+            compilada.setdefault(dia, []).append((inicio, fin))
+    return compilada
+
+
+def dentro_de_disponibilidad(compilada, dia, inicio, fin):
+    """El bloque debe caber completo en alguna franja disponible del día."""
+    if compilada is None:
+        return True
+    return any(inicio >= inicio_f and fin <= fin_f for inicio_f, fin_f in compilada.get(dia, ()))
+
+
+def aula_cumple_requisitos(aula, requisitos):
+    """Compara Materia.requisitos_de_aula ({'tipo_aula', 'recursos_minimos'}) con el tipo y los recursos del aula."""
+    if not requisitos:
+        return True
+    if isinstance(requisitos, str):
+        try:
+            requisitos = json.loads(requisitos)
+        except ValueError:
+            return False
+    tipo = requisitos.get('tipo_aula')
+    if tipo and aula['tipo'] != tipo:
+        return False
+    recursos = aula.get('recursos_especiales') or []
+    return all(recurso in recursos for recurso in requisitos.get('recursos_minimos') or [])
+
+
+# --- Consulta de solapamientos en la base de datos ---
+
+def filtro_solapamiento(registro):
+    """
+    Q con los horarios del mismo período y día que comparten profesor, aula o sección con
+    `registro` y se solapan con él (hora_inicio < fin AND hora_fin > inicio). Cada rama del OR
+    usa un índice horario_per_{prof,aula,secc}_dia_hora_idx, con hora_inicio < fin como rango.
+    Un bloque que cruza la medianoche ocupa hasta el final del día, igual que en IndiceOcupacion.
+    """
+    recursos = Q()
+    for campos in RECURSOS_HORARIO.values():
+        valores = {campo: registro.get(campo) for campo in campos}
+        if None not in valores.values():
+            recursos |= Q(periodo_academico=registro.get('periodo_academico'), dia=registro['dia'], **valores)
+    tiempo = Q(hora_fin__gt=registro['hora_inicio']) | Q(hora_fin__lte=F('hora_inicio'))
+    if registro['hora_fin'] > registro['hora_inicio']:
+        tiempo &= Q(hora_inicio__lt=registro['hora_fin'])
+    return recursos & tiempo
+
+
+def recursos_compartidos(registro, otro):
+    """Nombres de los recursos de RECURSOS_HORARIO que `otro` comparte con `registro`."""
+    return [
+        recurso for recurso, campos in RECURSOS_HORARIO.items()
+        if all(registro.get(campo) is not None and registro.get(campo) == otro.get(campo) for campo in campos)
+    ]
@@ -0,0 +1,163 @@
+# backend/core/pagination.py
+"""
+Paginación por cursor (keyset) para los listados grandes (horarios y solicitudes).
+
+A diferencia de PageNumberPagination (OFFSET), cada página se obtiene filtrando por la
+posición del último elemento de la página anterior sobre la tupla de ordenamiento completa,
+por lo que la página 100 cuesta lo mismo que la primera. Los campos de `ordering` no deben
+admitir nulos y el último debe ser único (normalmente 'id').
+
+Las respuestas no incluyen `count`: contar todas las filas cuesta un recorrido completo en
+cada página. Quien necesite el total lo pide con ?contar=true y se agrega una consulta COUNT.
+"""
+import base64
+import json
+from datetime import date, time
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    ordering = ('id',)
+    cursor_query_param = 'cursor'
+    page_size = 100
+    # Los clientes pueden pedir páginas grandes (ej. una semana completa) hasta este límite.
+    page_size_query_param = 'page_size'
+    max_page_size = 2000
+    invalid_cursor_message = 'Cursor inválido.'
+    # Conteo total opcional (una consulta más): ?contar=true.
+    count_query_param = 'contar'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        posicion, reverso = self.decode_cursor(request)
+        self.count = None
+        if str(request.query_params.get(self.count_query_param, '')).lower() in ('true', '1'):
+            self.count = queryset.order_by().count()
+
+        orden = [self._invertir(campo) for campo in self.ordering] if reverso else list(self.ordering)
+        queryset = queryset.order_by(*orden)
+        if posicion is not None:
+            queryset = queryset.filter(self._filtro_posterior(orden, posicion))
+
+        resultados = list(queryset[:self.page_size + 1])
+        hay_mas = len(resultados) > self.page_size
+        resultados = resultados[:self.page_size]
+        if reverso:
+            resultados.reverse()
+
+        if reverso:
+            self.has_next, self.has_previous = True, hay_mas
+        else:
+            self.has_next, self.has_previous = hay_mas, posicion is not None
+        self.primera = self._posicion(resultados[0]) if resultados else posicion
+        self.ultima = self._posicion(resultados[-1]) if resultados else posicion
+        return resultados
+
+    def get_page_size(self, request):
+        try:
+            solicitado = int(request.query_params[self.page_size_query_param])
+            if solicitado > 0:
+                return min(solicitado, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_paginated_response(self, data):
+        respuesta = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count is not None:
+            respuesta = {'count': self.count, **respuesta}
+        return Response(respuesta)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'description': 'Solo con ?contar=true.'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or self.ultima is None:
+            return None
+        return self.encode_cursor(self.ultima, reverso=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.primera is None:
+            return None
+        return self.encode_cursor(self.primera, reverso=True)
+
+    # --- Cursor ---
+
+    def encode_cursor(self, posicion, reverso):
+        contenido = json.dumps({'p': posicion, 'r': int(reverso)}, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(contenido.encode('utf-8')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            contenido = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            posicion, reverso = contenido['p'], bool(contenido.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(posicion, list) or len(posicion) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return posicion, reverso
+
+    # --- Keyset ---
+
+    @staticmethod
+    def _invertir(campo):
+        return campo[1:] if campo.startswith('-') else f'-{campo}'
+
+    @staticmethod
+    def _filtro_posterior(orden, posicion):
+        """
+        Condición "estrictamente después de `posicion`" sobre la tupla de ordenamiento:
+        (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...
+        """
+        filtro = Q()
+        iguales = {}
+        for campo, valor in zip(orden, posicion):
+            nombre = campo.lstrip('-')
+            operador = 'lt' if campo.startswith('-') else 'gt'
+            filtro |= Q(**iguales, **{f'{nombre}__{operador}': valor})
+            iguales[nombre] = valor
+        return filtro
+
+    def _posicion(self, instancia):
+        posicion = []
+        for campo in self.ordering:
+            valor = instancia
+            for parte in campo.lstrip('-').split('__'):
+                valor = getattr(valor, parte)
+            if isinstance(valor, (time, date)):
+                valor = valor.isoformat()
+            posicion.append(valor)
+        return posicion
+
+
+class HorarioCursorPagination(KeysetCursorPagination):
+    ordering = ('dia', 'hora_inicio', 'id')
+
+
+class SolicitudClaseCursorPagination(KeysetCursorPagination):
+    # Mismo orden que SolicitudClase.Meta.ordering, con 'id' para desempatar.
+    ordering = ('periodo_academico', 'materia__nombre', 'seccion', 'id')
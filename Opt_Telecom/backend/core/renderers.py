@@ -0,0 +1,85 @@
+# backend/core/renderers.py
+"""
+Representación columnar opcional para listados grandes (ej. un período completo de horarios).
+
+En lugar de una lista de objetos que repiten los nombres de campo en cada fila, los
+resultados se envían como arreglos paralelos por columna. Las columnas de texto con valores
+repetidos (profesor_nombre, materia_nombre, aula_codigo, dia, ...) se codifican como índices
+enteros a una tabla de valores únicos:
+
+    {"formato": "columnar", "filas": 2, "columnas": ["id", "dia"],
+     "datos": {"id": [1, 2], "dia": [0, 0]}, "diccionarios": {"dia": ["LUN"]}}
+
+Se elige con ?format=columnar o con la cabecera Accept. La misma estructura se ofrece
+también en MessagePack (?format=msgpack).
+"""
+import msgpack
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+
+def a_columnas(filas):
+    """Convierte una lista de dicts (todos con las mismas claves) a la estructura columnar."""
+    columnas = list(filas[0].keys()) if filas else []
+    datos, diccionarios = {}, {}
+    for columna in columnas:
+        valores = [fila.get(columna) for fila in filas]
+        textos = [v for v in valores if v is not None]
+        if textos and all(isinstance(v, str) for v in textos):
+            indices = {}
+            for valor in textos:
+                indices.setdefault(valor, len(indices))
+            # Solo compensa si hay repeticiones.
+            if len(indices) < len(textos):
+                datos[columna] = [None if v is None else indices[v] for v in valores]
+                diccionarios[columna] = list(indices)
+                continue
+        datos[columna] = valores
+    return {'formato': 'columnar', 'filas': len(filas), 'columnas': columnas, 'datos': datos, 'diccionarios': diccionarios}
+
+
+def de_columnas(estructura):
+    """Inversa de `a_columnas`: vuelve a la lista de dicts."""
+    columnas, datos, diccionarios = estructura['columnas'], estructura['datos'], estructura['diccionarios']
+    valores = []
+    for columna in columnas:
+        if columna in diccionarios:
+            tabla = diccionarios[columna]
+            valores.append([None if v is None else tabla[v] for v in datos[columna]])
+        else:
+            valores.append(datos[columna])
+    return [dict(zip(columnas, fila)) for fila in zip(*valores)] if columnas else [{} for _ in range(estructura['filas'])]
+
+
+def datos_columnares(data):
+    """Aplica `a_columnas` a una lista o a los 'results' de una respuesta paginada; el resto no cambia."""
+    if isinstance(data, list) and all(isinstance(fila, dict) for fila in data):
+        return a_columnas(data)
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        return {**data, 'results': a_columnas(data['results'])}
+    return data
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    media_type = 'application/vnd.horarios.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(datos_columnares(data), accepted_media_type, renderer_context)
+
+
+class MessagePackColumnarRenderer(BaseRenderer):
+    media_type = 'application/x-msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(datos_columnares(data), use_bin_type=True, default=str)
+
+
+def renderers_columnares():
+    """Renderers por defecto de la API más los columnares."""
+    return list(api_settings.DEFAULT_RENDERER_CLASSES) + [ColumnarJSONRenderer, MessagePackColumnarRenderer]
@@ -1,14 +1,51 @@
 # backend/core/serializers.py
-import datetime
-from datetime import time, timedelta, datetime # Importa datetime (la clase), time y timedelta
 from rest_framework import serializers
 # Asegúrate de importar los nuevos modelos: SolicitudClase y VersionHorario
-from .models import Profesor, Materia, Aula, Horario, Restriccion, SolicitudClase, VersionHorario
+from .models import Profesor, Materia, Aula, Horario, Restriccion, SolicitudClase, VersionHorario, validate_json_schema
+from .versionado import guardar_version
 import json # Importamos json, aunque no se usa directamente en este serializador, es buena práctica si manejamos JSONFields.
 
+# --- Campos dinámicos (?fields= / ?omit=) ---
+
+def _lista_parametro(params, nombre):
+    crudo = params.get(nombre)
+    return [c.strip() for c in crudo.split(',') if c.strip()] if crudo else None
+
+
+def seleccionar_campos(params, disponibles):
+    """
+    Campos a serializar según ?fields=id,nombre y/o ?omit=campo1,campo2, en el orden del
+    serializador. Devuelve None si la petición no restringe los campos.
+    """
+    incluir, omitir = _lista_parametro(params, 'fields'), _lista_parametro(params, 'omit')
+    if incluir is None and omitir is None:
+        return None
+    desconocidos = sorted(set(incluir or []) - set(disponibles))
+    if desconocidos:
+        raise serializers.ValidationError({'fields': f"Campos desconocidos: {', '.join(desconocidos)}."})
+    return [c for c in disponibles if (incluir is None or c in incluir) and c not in (omitir or [])]
+
+
+class CamposDinamicosMixin:
+    """
+    Serializa solo los campos pedidos en la petición (?fields=id,nombre o ?omit=datos_horario_json).
+    Solo se aplica en lecturas; los listados y las vistas de detalle podan además el queryset
+    (ver CamposDinamicosViewMixin).
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        campos = seleccionar_campos(request.query_params, list(self.fields))
+        if campos is not None:
+            for nombre in set(self.fields) - set(campos):
+                self.fields.pop(nombre)
+
+
 # --- Serializadores existentes (MODIFICADOS) ---
 
-class ProfesorSerializer(serializers.ModelSerializer):
+class ProfesorSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     carga_horaria_asignada = serializers.SerializerMethodField()
 
     class Meta:
@@ -16,27 +53,15 @@ class ProfesorSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def get_carga_horaria_asignada(self, obj):
-        total_minutes = 0
-        for horario in obj.horarios_asignados.all():
-            start_dt = horario.hora_inicio
-            end_dt = horario.hora_fin
-            
-            # --- CORRECCIÓN CLAVE AQUÍ ---
-            # Usamos 'datetime.combine' ya que 'datetime' (la clase) fue importada directamente
-            # y 'datetime.min.date()' para obtener la fecha mínima
-            if end_dt < start_dt:
-                duration_td = (datetime.combine(datetime.min.date(), time(23, 59, 59)) - datetime.combine(datetime.min.date(), start_dt)) + \
-                              (datetime.combine(datetime.min.date(), end_dt) - datetime.combine(datetime.min.date(), time(0, 0, 0))) + \
-                              timedelta(seconds=1)
-            else:
-                duration_td = datetime.combine(datetime.min.date(), end_dt) - datetime.combine(datetime.min.date(), start_dt)
-            
-            total_minutes += duration_td.total_seconds() / 60
-        
-        return total_minutes / 60
-
-
-class MateriaSerializer(serializers.ModelSerializer):
+        # Normalmente viene anotada por ProfesorViewSet (Profesor.objects.con_carga_horaria()).
+        # Para instancias sin anotar (ej. recién creadas) se calcula con el mismo agregado SQL.
+        carga = getattr(obj, 'carga_horaria_asignada', None)
+        if carga is None:
+            carga = Profesor.objects.filter(pk=obj.pk).con_carga_horaria().values_list('carga_horaria_asignada', flat=True).first() or 0.0
+        return carga
+
+
+class MateriaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     profesores_aptos_nombres = serializers.StringRelatedField(many=True, source='profesores_aptos', read_only=True)
 
     class Meta:
@@ -44,13 +69,13 @@ class MateriaSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class AulaSerializer(serializers.ModelSerializer):
+class AulaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Aula
         fields = '__all__'
 
 
-class RestriccionSerializer(serializers.ModelSerializer):
+class RestriccionSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     profesor_info = serializers.StringRelatedField(source='profesor', read_only=True)
     aula_info = serializers.StringRelatedField(source='aula', read_only=True)
     materia_info = serializers.StringRelatedField(source='materia', read_only=True)
@@ -61,7 +86,7 @@ class RestriccionSerializer(serializers.ModelSerializer):
         read_only_fields = ['profesor_info', 'aula_info', 'materia_info']
 
 
-class HorarioSerializer(serializers.ModelSerializer):
+class HorarioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     profesor_nombre = serializers.StringRelatedField(source='profesor', read_only=True)
     materia_nombre = serializers.StringRelatedField(source='materia', read_only=True)
     aula_codigo = serializers.StringRelatedField(source='aula', read_only=True)
@@ -77,7 +102,7 @@ class HorarioSerializer(serializers.ModelSerializer):
 
 # --- NUEVOS SERIALIZADORES ---
 
-class SolicitudClaseSerializer(serializers.ModelSerializer):
+class SolicitudClaseSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     materia_nombre = serializers.StringRelatedField(source='materia', read_only=True)
     profesor_nombre = serializers.StringRelatedField(source='profesor', read_only=True)
     aula_codigo = serializers.StringRelatedField(source='aula', read_only=True)
@@ -88,8 +113,27 @@ class SolicitudClaseSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'estado', 'materia_nombre', 'profesor_nombre', 'aula_codigo']
 
 
-class VersionHorarioSerializer(serializers.ModelSerializer):
+class VersionHorarioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    # Solo metadatos: los horarios se descomprimen en cargar_version/restore.
+    datos_horario_json = serializers.JSONField(write_only=True, required=False, default=list, validators=[validate_json_schema])
+
     class Meta:
         model = VersionHorario
-        fields = '__all__'
-        read_only_fields = ['id', 'fecha_guardado']
\ No newline at end of file
+        exclude = ['contenido']
+        read_only_fields = ['id', 'fecha_guardado', 'cantidad_horarios', 'tamano', 'es_completa', 'version_base', 'profundidad']
+
+    def validate(self, attrs):
+        # El contenido de una versión guardada no se reescribe (otras pueden ser deltas sobre él):
+        # PUT/PATCH solo cambian los metadatos; para otros horarios se guarda una versión nueva.
+        if self.instance is not None and 'datos_horario_json' in self.initial_data:
+            raise serializers.ValidationError({
+                'datos_horario_json': 'Los horarios de una versión guardada no se pueden modificar; guarde una versión nueva.',
+            })
+        return attrs
+
+    def create(self, validated_data):
+        return guardar_version(validated_data['nombre_version'], validated_data.get('datos_horario_json') or [])
+
+    def update(self, instance, validated_data):
+        validated_data.pop('datos_horario_json', None)
+        return super().update(instance, validated_data)
\ No newline at end of file
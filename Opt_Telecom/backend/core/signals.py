@@ -0,0 +1,91 @@
+# backend/core/signals.py
+"""
+Receptores de señales que mantienen coherentes las cachés derivadas de los modelos.
+Se conectan en CoreConfig.ready(). Las operaciones en bloque (bulk_create, bulk_update,
+QuerySet.update) no disparan señales y deben invalidar explícitamente.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .colecciones import COLECCIONES, marcar_cambio
+from .grilla import ambitos_de_horario, invalidar_grillas, invalidar_todas_las_grillas
+from .models import Aula, Horario, Materia, Profesor, SolicitudClase, VersionHorario
+from .nomina import marcar_nomina
+from .versionado import eliminar_si_huerfano, materializar
+
+
+@receiver(pre_save, sender=Horario)
+@receiver(pre_save, sender=SolicitudClase)
+def recordar_valores_anteriores(sender, instance, raw=False, **kwargs):
+    # En una actualización el registro puede cambiar de período, profesor, aula, etc.: también
+    # hay que invalidar lo que dependía de los valores anteriores al cambio.
+    instance._valores_anteriores = None
+    if instance.pk and not raw:
+        instance._valores_anteriores = sender.objects.filter(pk=instance.pk).values(
+            'periodo_academico', 'profesor_id', 'aula_id', 'materia_id', 'seccion', 'carrera_programa'
+        ).first()
+
+
+# --- Versiones de colección (ETag) ---
+
+def _marcar_coleccion(sender, instance, **kwargs):
+    anteriores = getattr(instance, '_valores_anteriores', None) or {}
+    marcar_cambio(COLECCIONES[sender], periodos={getattr(instance, 'periodo_academico', None), anteriores.get('periodo_academico')})
+
+
+for _modelo in COLECCIONES:
+    post_save.connect(_marcar_coleccion, sender=_modelo, dispatch_uid=f'coleccion_post_save_{_modelo.__name__}')
+    post_delete.connect(_marcar_coleccion, sender=_modelo, dispatch_uid=f'coleccion_post_delete_{_modelo.__name__}')
+
+
+@receiver(m2m_changed, sender=Materia.profesores_aptos.through)
+def marcar_profesores_aptos(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        marcar_cambio('materias')
+
+
+# --- Grillas semanales ---
+
+@receiver(post_save, sender=Horario)
+@receiver(post_delete, sender=Horario)
+def invalidar_grillas_horario(sender, instance, **kwargs):
+    anteriores = getattr(instance, '_valores_anteriores', None)
+    invalidar_grillas(ambitos_de_horario(instance) | (ambitos_de_horario(anteriores) if anteriores else set()))
+
+
+@receiver(post_save, sender=Profesor)
+@receiver(post_delete, sender=Profesor)
+@receiver(post_save, sender=Materia)
+@receiver(post_delete, sender=Materia)
+@receiver(post_save, sender=Aula)
+@receiver(post_delete, sender=Aula)
+def invalidar_grillas_por_nombres(sender, instance, created=False, **kwargs):
+    # Los nombres de profesores, materias y aulas aparecen en las grillas. Una entidad recién
+    # creada todavía no puede estar en ninguna grilla.
+    if not created:
+        invalidar_todas_las_grillas()
+
+
+# --- Resumen de nómina ---
+
+@receiver(post_save, sender=Horario)
+@receiver(post_delete, sender=Horario)
+def recalcular_nomina_horario(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    anteriores = getattr(instance, '_valores_anteriores', None)
+    marcar_nomina([instance] + ([anteriores] if anteriores else []))
+
+
+# --- Versiones de horario ---
+
+@receiver(pre_delete, sender=VersionHorario)
+def materializar_versiones_derivadas(sender, instance, **kwargs):
+    # Las versiones delta que se apoyan en la que se borra pasan a ser completas.
+    for derivada in instance.derivadas.all():
+        materializar(derivada)
+
+
+@receiver(post_delete, sender=VersionHorario)
+def eliminar_contenido_version(sender, instance, **kwargs):
+    eliminar_si_huerfano(instance.contenido)
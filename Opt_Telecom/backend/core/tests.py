@@ -1,3 +1,1132 @@
-from django.test import TestCase
+# backend/core/tests.py
+import io
+import json
+from datetime import datetime, time, timedelta
 
-# Create your tests here.
+import msgpack
+import openpyxl
+import pandas as pd
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .importacion import _hora_desde_texto, detectar_formato_dominante, minutos_desde_valor, parsear_columna_horas
+from .models import (
+    Aula, ContenidoVersion, Horario, Materia, Profesor, Restriccion, ResumenNomina, SolicitudClase, VersionHorario,
+)
+from .serializers import HorarioSerializer
+from .validacion import normalizar_propuesta
+from .views import excel_time_to_python_time
+from .versionado import contenido_version, datos_version, ordenar, podar_versiones
+
+
+class HorariosTestCase(APITestCase):
+    """
+    Base de las pruebas con horarios: Ana Pérez, Luis Gómez, la materia Redes y el aula A-1 se crean
+    una vez por clase; cada prueba empieza con la caché vacía.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesor = Profesor.objects.create(nombre='Ana', apellido='Pérez')
+        cls.otro_profesor = Profesor.objects.create(nombre='Luis', apellido='Gómez')
+        cls.materia = Materia.objects.create(nombre='Redes')
+        cls.aula = Aula.objects.create(codigo='A-1', capacidad=30)
+
+    def setUp(self):
+        cache.clear()
+
+    @classmethod
+    def crear_horario(cls, dia='LUN', inicio=time(8), fin=time(10), **campos):
+        """Horario de Ana con Redes en A-1 salvo que `campos` indique otro profesor, materia o aula."""
+        campos = {'profesor': cls.profesor, 'materia': cls.materia, 'aula': cls.aula, **campos}
+        return Horario.objects.create(dia=dia, hora_inicio=inicio, hora_fin=fin, **campos)
+
+
+class PresupuestoConsultasListadosTests(APITestCase):
+    """
+    Cada endpoint de listado debe ejecutar un número fijo de consultas, sin importar
+    cuántas filas haya ni cuántas relaciones recorra el serializador.
+    """
+
+    # Consultas máximas por listado (conteo de paginación + consulta principal + prefetches).
+    # Horarios y solicitudes usan paginación por cursor, sin consulta de conteo.
+    PRESUPUESTOS = {
+        '/api/profesores/': 2,
+        '/api/materias/': 3,
+        '/api/aulas/': 2,
+        '/api/restricciones/': 2,
+        '/api/horarios/': 1,
+        '/api/solicitudes-clase/': 1,
+        '/api/versiones-horario/': 2,
+    }
+
+    def setUp(self):
+        cache.clear()
+
+    def crear_datos(self, cantidad):
+        # Se ejecutan los on_commit para que las señales invaliden las respuestas cacheadas.
+        with self.captureOnCommitCallbacks(execute=True):
+            self._crear_datos(cantidad)
+
+    def _crear_datos(self, cantidad):
+        inicio = Profesor.objects.count()
+        for i in range(inicio, inicio + cantidad):
+            profesor = Profesor.objects.create(nombre=f'Nombre{i}', apellido=f'Apellido{i}')
+            materia = Materia.objects.create(nombre=f'Materia{i}')
+            materia.profesores_aptos.add(profesor)
+            aula = Aula.objects.create(codigo=f'A-{i}', capacidad=30)
+            Horario.objects.create(
+                profesor=profesor, materia=materia, aula=aula, dia='LUN',
+                hora_inicio=time(8), hora_fin=time(10), seccion=str(i),
+            )
+            Restriccion.objects.create(
+                nombre=f'Restricción {i}', tipo='PROFESOR_NO_DISPONIBLE', profesor=profesor,
+                aula=aula, materia=materia, dia='MAR', hora_inicio=time(8), hora_fin=time(10),
+            )
+            SolicitudClase.objects.create(
+                materia=materia, profesor=profesor, aula=aula, dia='LUN', hora_inicio=time(8),
+                hora_fin=time(10), tipo_clase='Teoría', seccion=str(i), periodo_academico='2025-2',
+                carrera_programa='Sistemas',
+            )
+            VersionHorario.objects.create(nombre_version=f'Versión {i}')
+
+    def consultas_listado(self, url):
+        with CaptureQueriesContext(connection) as contexto:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200, url)
+        return len(contexto.captured_queries)
+
+    def test_listados_con_consultas_constantes(self):
+        self.crear_datos(3)
+        pocas = {url: self.consultas_listado(url) for url in self.PRESUPUESTOS}
+        self.crear_datos(30)
+        for url, presupuesto in self.PRESUPUESTOS.items():
+            with self.subTest(url=url):
+                muchas = self.consultas_listado(url)
+                self.assertLessEqual(muchas, presupuesto)
+                self.assertEqual(muchas, pocas[url])
+
+    def test_paginas_grandes_con_consultas_constantes(self):
+        self.crear_datos(30)
+        for url in ('/api/horarios/', '/api/solicitudes-clase/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.consultas_listado(f'{url}?page_size=5'), self.consultas_listado(f'{url}?page_size=500'))
+
+
+class PaginacionCursorTests(HorariosTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for i in range(25):
+            cls.crear_horario(['LUN', 'MAR'][i % 2], time(7 + i % 3), time(12), periodo_academico=f'P{i}')
+
+    def test_recorrido_completo_en_ambos_sentidos(self):
+        esperado = list(Horario.objects.order_by('dia', 'hora_inicio', 'id').values_list('id', flat=True))
+        obtenido, url = [], '/api/horarios/?page_size=4'
+        while url:
+            datos = self.client.get(url).json()
+            obtenido += [h['id'] for h in datos['results']]
+            ultima_pagina, url = datos, datos['next']
+        self.assertEqual(obtenido, esperado)
+
+        hacia_atras, url = [], ultima_pagina['previous']
+        while url:
+            datos = self.client.get(url).json()
+            hacia_atras = [h['id'] for h in datos['results']] + hacia_atras
+            url = datos['previous']
+        self.assertEqual(hacia_atras, esperado[:len(hacia_atras)])
+        self.assertEqual(len(hacia_atras) + len(ultima_pagina['results']), len(esperado))
+
+    def test_tamano_de_pagina_limitado_por_el_servidor(self):
+        respuesta = self.client.get('/api/horarios/?page_size=1000000')
+        self.assertEqual(len(respuesta.json()['results']), 25)
+        self.assertIsNone(respuesta.json()['next'])
+
+    def test_cursor_invalido(self):
+        self.assertEqual(self.client.get('/api/horarios/?cursor=no-es-un-cursor').status_code, 404)
+
+    def test_conteo_solo_a_pedido(self):
+        self.assertNotIn('count', self.client.get('/api/horarios/?page_size=4').json())
+        with CaptureQueriesContext(connection) as contexto:
+            datos = self.client.get('/api/horarios/?page_size=4&contar=true&dia=LUN').json()
+        self.assertEqual((datos['count'], len(datos['results'])), (13, 4))
+        self.assertEqual(len(contexto.captured_queries), 2)
+        self.assertEqual(self.client.get(datos['next']).json()['count'], 13)
+
+
+class GrillaSemanalTests(HorariosTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.horario = cls.crear_horario('LUN', periodo_academico='2025-2')
+        cls.crear_horario('MIE', periodo_academico='2025-2')
+
+    def grilla(self, consulta):
+        respuesta = self.client.get(f'/api/horarios/grilla/?periodo_academico=2025-2&{consulta}')
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json()
+
+    def test_celdas_referencian_entradas_sin_repetir(self):
+        grilla = self.grilla(f'profesor={self.profesor.id}')
+        self.assertEqual(len(grilla['entradas']), 1)
+        self.assertEqual(grilla['paso'], 60)
+        self.assertEqual(grilla['horas'], ['08:00', '09:00'])
+        self.assertEqual(grilla['celdas'][grilla['dias'].index('LUN')], [0, 0])
+        self.assertEqual(grilla['celdas'][grilla['dias'].index('MAR')], [None, None])
+
+    def test_invalidacion_solo_del_ambito_modificado(self):
+        self.grilla(f'profesor={self.profesor.id}')
+        self.grilla(f'profesor={self.otro_profesor.id}')
+        self.assertTrue(self.grilla(f'profesor={self.profesor.id}')['desde_cache'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.horario.profesor = self.otro_profesor
+            self.horario.save()
+
+        self.assertFalse(self.grilla(f'profesor={self.profesor.id}')['desde_cache'])
+        otra = self.grilla(f'profesor={self.otro_profesor.id}')
+        self.assertFalse(otra['desde_cache'])
+        self.assertEqual(otra['entradas'][0]['horarios'], [self.horario.id])
+
+    def test_ambito_obligatorio_y_unico(self):
+        self.assertEqual(self.client.get('/api/horarios/grilla/?periodo_academico=2025-2').status_code, 400)
+        url = f'/api/horarios/grilla/?periodo_academico=2025-2&profesor={self.profesor.id}&aula={self.aula.id}'
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get('/api/horarios/grilla/?profesor=1').status_code, 400)
+
+
+class GetCondicionalETagTests(HorariosTestCase):
+    def test_sondeo_sin_cambios_responde_304_sin_consultas(self):
+        etag = self.client.get('/api/profesores/')['ETag']
+        with CaptureQueriesContext(connection) as contexto:
+            respuesta = self.client.get('/api/profesores/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(len(contexto.captured_queries), 0)
+
+    def test_escritura_en_dependencia_cambia_el_etag(self):
+        etag_profesores = self.client.get('/api/profesores/')['ETag']
+        etag_aulas = self.client.get('/api/aulas/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.crear_horario()
+        # La carga horaria de los profesores depende de los horarios; las aulas no.
+        self.assertEqual(self.client.get('/api/profesores/', HTTP_IF_NONE_MATCH=etag_profesores).status_code, 200)
+        self.assertEqual(self.client.get('/api/aulas/', HTTP_IF_NONE_MATCH=etag_aulas).status_code, 304)
+
+    def test_version_por_periodo(self):
+        url = '/api/horarios/?periodo_academico=2025-1'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.crear_horario(periodo_academico='2025-2')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class CacheRespuestasCatalogosTests(HorariosTestCase):
+    def test_segunda_lectura_sin_consultas(self):
+        primera = self.client.get('/api/materias/').json()
+        with CaptureQueriesContext(connection) as contexto:
+            segunda = self.client.get('/api/materias/').json()
+        self.assertEqual(len(contexto.captured_queries), 0)
+        self.assertEqual(primera, segunda)
+        # Otros parámetros de consulta son otra entrada de la caché.
+        self.assertNotEqual(self.client.get('/api/materias/?page=1')['ETag'], self.client.get('/api/materias/')['ETag'])
+
+    def test_m2m_invalida_la_respuesta(self):
+        self.client.get('/api/materias/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.materia.profesores_aptos.add(self.profesor)
+        datos = self.client.get('/api/materias/').json()
+        self.assertEqual(datos['results'][0]['profesores_aptos'], [self.profesor.id])
+
+    def test_estadisticas(self):
+        self.client.get('/api/aulas/')
+        self.client.get('/api/aulas/')
+        estadisticas = self.client.get('/api/cache/estadisticas/').json()
+        self.assertEqual(estadisticas['aula'], {'aciertos': 1, 'fallos': 1, 'tasa_aciertos': 0.5})
+
+
+class LotesHorariosTests(HorariosTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.horario = cls.crear_horario()
+
+    def bloque(self, dia, inicio, fin, seccion):
+        return {'profesor': self.profesor.id, 'materia': self.materia.id, 'aula': self.aula.id,
+                'dia': dia, 'hora_inicio': inicio, 'hora_fin': fin, 'seccion': seccion}
+
+    def test_lote_con_resultado_por_elemento_y_consultas_constantes(self):
+        crear = [self.bloque('MAR', f'{7 + i}:00', f'{8 + i}:00', str(i)) for i in range(10)]
+        # Choca con el horario existente ya movido por la actualización del mismo lote.
+        crear.append(self.bloque('LUN', '07:30', '08:30', '99'))
+        with CaptureQueriesContext(connection) as contexto:
+            respuesta = self.client.post('/api/horarios/lote/', {
+                'crear': crear,
+                'actualizar': [{'id': self.horario.id, 'hora_inicio': '07:00', 'hora_fin': '08:00'}],
+            }, format='json')
+        self.assertEqual(respuesta.status_code, 207)
+        resultados = respuesta.json()['resultados']
+        self.assertEqual([r['estado'] for r in resultados], ['ok'] + ['ok'] * 10 + ['error'])
+        self.assertIn('profesor', resultados[-1]['errores'])
+        self.assertEqual(Horario.objects.count(), 11)
+        self.assertEqual(Horario.objects.get(pk=self.horario.id).hora_inicio, time(7))
+        self.assertLess(len(contexto.captured_queries), 15)
+
+    def test_todo_o_nada(self):
+        respuesta = self.client.post('/api/horarios/lote/', {
+            'crear': [self.bloque('MAR', '08:00', '09:00', '2'), self.bloque('MAR', '08:30', '09:30', '3')],
+            'eliminar': [self.horario.id],
+            'todo_o_nada': True,
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(Horario.objects.count(), 1)
+
+
+class FormatoColumnarTests(HorariosTestCase):
+    def test_listado_columnar_con_diccionarios(self):
+        for dia in ('LUN', 'MAR', 'MIE'):
+            self.crear_horario(dia)
+
+        normal = self.client.get('/api/horarios/').json()['results']
+        columnar = self.client.get('/api/horarios/?format=columnar').json()['results']
+        self.assertEqual(columnar['filas'], 3)
+        self.assertEqual(columnar['diccionarios']['materia_nombre'], ['Redes'])
+        self.assertEqual(columnar['datos']['materia_nombre'], [0, 0, 0])
+        # Reconstruir las filas da exactamente el listado normal.
+        filas = [
+            {c: (columnar['diccionarios'][c][v] if c in columnar['diccionarios'] else v) for c, v in zip(columnar['columnas'], valores)}
+            for valores in zip(*(columnar['datos'][c] for c in columnar['columnas']))
+        ]
+        self.assertEqual(filas, normal)
+
+    def test_messagepack_igual_al_json_columnar(self):
+        for dia in ('LUN', 'MAR'):
+            self.crear_horario(dia)
+        respuesta = self.client.get('/api/horarios/?format=msgpack')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['Content-Type'], 'application/x-msgpack')
+        self.assertEqual(msgpack.unpackb(respuesta.content), self.client.get('/api/horarios/?format=columnar').json())
+
+
+class CamposDinamicosTests(HorariosTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.materia.profesores_aptos.add(cls.profesor)
+        VersionHorario.objects.create(nombre_version='Inicial', cantidad_horarios=1)
+
+    def test_fields_poda_salida_y_consultas(self):
+        with CaptureQueriesContext(connection) as contexto:
+            datos = self.client.get('/api/materias/?fields=id,nombre').json()
+        self.assertEqual(datos['results'], [{'id': self.materia.id, 'nombre': 'Redes'}])
+        # Sin prefetch de profesores_aptos: conteo + consulta principal.
+        self.assertEqual(len(contexto.captured_queries), 2)
+        self.assertNotIn('horas_semanales', contexto.captured_queries[-1]['sql'])
+
+    def test_omit_poda_columnas_de_la_version(self):
+        with CaptureQueriesContext(connection) as contexto:
+            datos = self.client.get('/api/versiones-horario/?omit=tamano').json()
+        self.assertNotIn('tamano', datos['results'][0])
+        self.assertNotIn('tamano', contexto.captured_queries[-1]['sql'])
+
+    def test_campo_desconocido(self):
+        self.assertEqual(self.client.get('/api/profesores/?fields=id,no_existe').status_code, 400)
+
+
+class ExportacionTests(HorariosTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        materia = Materia.objects.create(nombre='Cálculo & Álgebra')
+        for periodo in ('2025-1', '2025-2'):
+            cls.crear_horario(materia=materia, periodo_academico=periodo)
+
+    def test_csv_filtrado_por_periodo(self):
+        respuesta = self.client.get('/api/horarios/exportar/?periodo_academico=2025-1')
+        self.assertTrue(respuesta.streaming)
+        lineas = b''.join(respuesta.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lineas), 2)
+        self.assertIn('2025-1,ingeniero en sistemas,LUN,08:00,10:00,Cálculo & Álgebra,1,,Ana Pérez,A-1', lineas[1])
+
+    def test_nombre_de_archivo_sin_caracteres_de_cabecera(self):
+        respuesta = self.client.get('/api/horarios/exportar/', {'periodo_academico': '2025-1"; x=1\r\nSet-Cookie: a=b'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['Content-Disposition'], 'attachment; filename="horarios_2025-1-x1-set-cookie-ab.csv"')
+        self.assertFalse(respuesta.has_header('Set-Cookie'))
+        respuesta = self.client.get('/api/horarios/exportar/?periodo_academico=2025-1')
+        self.assertEqual(respuesta['Content-Disposition'], 'attachment; filename="horarios_2025-1.csv"')
+
+    def test_xlsx_legible_por_openpyxl(self):
+        respuesta = self.client.get('/api/horarios/exportar/?formato=xlsx')
+        libro = openpyxl.load_workbook(io.BytesIO(b''.join(respuesta.streaming_content)))
+        filas = list(libro.active.iter_rows(values_only=True))
+        self.assertEqual(filas[0][:4], ('ID', 'Período', 'Carrera', 'Día'))
+        self.assertEqual(len(filas), 3)
+
+
+class ValidacionPropuestasTests(HorariosTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.profesor.disponibilidad = {'LUN': ['07:00-12:00']}
+        cls.profesor.save(update_fields=['disponibilidad'])
+        cls.materia.requisitos_de_aula = {'tipo_aula': 'Laboratorio'}
+        cls.materia.save(update_fields=['requisitos_de_aula'])
+        cls.lab = Aula.objects.create(codigo='LAB-1', capacidad=20, tipo='Laboratorio')
+        cls.crear_horario(aula=cls.lab, seccion='1')
+        Restriccion.objects.create(nombre='Mantenimiento', tipo='AULA_NO_DISPONIBLE', aula=cls.lab, dia='LUN',
+                                   hora_inicio=time(11), hora_fin=time(12))
+
+    def propuesta(self, inicio, fin, seccion, aula=None, dia='LUN'):
+        return {'profesor': self.profesor.id, 'materia': self.materia.id, 'aula': (aula or self.lab).id,
+                'seccion': seccion, 'dia': dia, 'hora_inicio': inicio, 'hora_fin': fin}
+
+    def test_conflictos_por_propuesta_sin_escribir(self):
+        propuestas = [
+            self.propuesta('10:00', '11:00', '2'),  # Válida.
+            self.propuesta('09:30', '10:30', '3'),  # Choca con el horario existente y con la anterior.
+            self.propuesta('11:00', '12:00', '4'),  # Aula en mantenimiento.
+            self.propuesta('08:00', '09:00', '5', dia='MAR'),  # Fuera de la disponibilidad.
+            self.propuesta('10:00', '11:00', '6', aula=self.aula),  # Choca con la primera y no es laboratorio.
+            {'profesor': 'x', 'dia': 'DOM'},
+        ]
+        with CaptureQueriesContext(connection) as contexto:
+            respuesta = self.client.post('/api/horarios/validar/', {'propuestas': propuestas}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        self.assertFalse(datos['valido'])
+        tipos = [sorted({c['tipo'] for c in r['conflictos']}) for r in datos['resultados']]
+        self.assertEqual(tipos, [
+            ['ocupacion'], ['ocupacion'], ['restriccion'], ['disponibilidad'], ['ocupacion', 'requisitos_aula'], ['datos'],
+        ])
+        origenes = {('horario', c['horario']) if 'horario' in c else ('propuesta', c['propuesta'])
+                    for c in datos['resultados'][1]['conflictos']}
+        self.assertIn(('propuesta', 0), origenes)
+        self.assertEqual(len([o for o in origenes if o[0] == 'horario']), 1)
+        self.assertLessEqual(len(contexto.captured_queries), 5)
+        self.assertEqual(Horario.objects.count(), 1)
+
+    def test_seccion_nula_o_no_textual(self):
+        # Null toma la sección predeterminada en lugar del texto 'None'.
+        registro, errores = normalizar_propuesta(self.propuesta('10:00', '11:00', None))
+        self.assertEqual((registro['seccion'], errores), ('1', []))
+        respuesta = self.client.post('/api/horarios/validar/', {'propuestas': [self.propuesta('10:00', '11:00', 2)]}, format='json')
+        conflictos = respuesta.json()['resultados'][0]['conflictos']
+        self.assertEqual([(c['tipo'], c['campo']) for c in conflictos], [('datos', 'seccion')])
+
+
+class AsignacionSolicitudesTests(HorariosTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.otra_aula = Aula.objects.create(codigo='A-2', capacidad=30)
+        cls.materias = [cls.materia] + [Materia.objects.create(nombre=f'Materia {i}') for i in range(1, 4)]
+        cls.solicitudes = [
+            SolicitudClase.objects.create(materia=materia, profesor=cls.profesor, tipo_clase='Teoría', seccion='1',
+                                          periodo_academico='2025-2', carrera_programa='Telecomunicaciones')
+            for materia in cls.materias
+        ]
+        cls.crear_horario(seccion='9')
+
+    def test_asignacion_individual_detecta_solapamiento_no_identico(self):
+        url = f'/api/solicitudes-clase/{self.solicitudes[1].id}/asignar_a_horario/'
+        respuesta = self.client.post(url, {'aula': self.otra_aula.id, 'dia': 'LUN', 'hora_inicio': '09:00', 'hora_fin': '11:00'}, format='json')
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.json()['conflictos'][0]['recursos'], ['profesor'])
+        respuesta = self.client.post(url, {'aula': self.otra_aula.id, 'dia': 'LUN', 'hora_inicio': '10:00', 'hora_fin': '11:00'}, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+
+    def test_asignacion_en_lote(self):
+        asignaciones = [
+            {'solicitud': self.solicitudes[1].id, 'aula': self.aula.id, 'dia': 'MAR', 'hora_inicio': '08:00', 'hora_fin': '10:00'},
+            {'solicitud': self.solicitudes[2].id, 'aula': self.aula.id, 'dia': 'MAR', 'hora_inicio': '09:00', 'hora_fin': '11:00'},
+            {'solicitud': self.solicitudes[3].id, 'aula': self.otra_aula.id, 'dia': 'LUN', 'hora_inicio': '10:00', 'hora_fin': '12:00'},
+            {'solicitud': 9999, 'aula': self.aula.id, 'dia': 'MIE', 'hora_inicio': '08:00', 'hora_fin': '10:00'},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post('/api/solicitudes-clase/asignar_lote/', {'asignaciones': asignaciones}, format='json')
+        self.assertEqual(respuesta.status_code, 207)
+        resultados = respuesta.json()['resultados']
+        self.assertEqual([r['estado'] for r in resultados], ['ok', 'error', 'ok', 'error'])
+        self.assertIn('asignación 0', resultados[1]['errores']['profesor'][0])
+        self.assertEqual(Horario.objects.count(), 3)
+        self.assertEqual(
+            sorted(SolicitudClase.objects.filter(estado='Asignada').values_list('id', flat=True)),
+            [self.solicitudes[1].id, self.solicitudes[3].id],
+        )
+
+    def test_todo_o_nada(self):
+        asignaciones = [
+            {'solicitud': self.solicitudes[1].id, 'aula': self.aula.id, 'dia': 'LUN', 'hora_inicio': '09:00', 'hora_fin': '10:00'},
+            {'solicitud': self.solicitudes[2].id, 'aula': self.aula.id, 'dia': 'MAR', 'hora_inicio': '09:00', 'hora_fin': '10:00'},
+        ]
+        respuesta = self.client.post('/api/solicitudes-clase/asignar_lote/', {'asignaciones': asignaciones, 'todo_o_nada': True}, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(Horario.objects.count(), 1)
+        self.assertFalse(SolicitudClase.objects.filter(estado='Asignada').exists())
+
+
+class MoverHorarioTests(HorariosTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.a = cls.crear_horario(seccion='1')
+        cls.b = cls.crear_horario('MAR', time(8), time(9), profesor=cls.otro_profesor, seccion='2')
+
+    def test_conflictos_y_simulacion(self):
+        url = f'/api/horarios/{self.a.id}/mover/'
+        with CaptureQueriesContext(connection) as contexto:
+            respuesta = self.client.post(url, {'dia': 'MAR', 'hora_inicio': '07:30', 'simular': True}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json(), {'valido': False, 'conflictos': [{'horario': self.a.id, 'recurso': 'aula', 'con': self.b.id}]})
+        self.assertEqual(len(contexto.captured_queries), 2)
+
+        respuesta = self.client.post(url, {'dia': 'MAR', 'hora_inicio': '07:30'}, format='json')
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(Horario.objects.get(pk=self.a.id).dia, 'LUN')
+
+    def test_mover_conserva_la_duracion(self):
+        respuesta = self.client.post(f'/api/horarios/{self.a.id}/mover/', {'dia': 'MAR', 'hora_inicio': '09:00'}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.a.refresh_from_db()
+        self.assertEqual((self.a.dia, self.a.hora_inicio, self.a.hora_fin), ('MAR', time(9), time(11)))
+
+    def test_intercambio_en_la_misma_aula(self):
+        respuesta = self.client.post(f'/api/horarios/{self.a.id}/mover/', {'intercambiar_con': self.b.id}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.a.refresh_from_db()
+        self.b.refresh_from_db()
+        self.assertEqual((self.a.dia, self.a.hora_fin, self.a.periodo_academico), ('MAR', time(9), '2025-2'))
+        self.assertEqual((self.b.dia, self.b.hora_fin, self.b.periodo_academico), ('LUN', time(10), '2025-2'))
+
+    def test_intercambio_no_expone_un_periodo_temporal(self):
+        with CaptureQueriesContext(connection) as contexto:
+            self.client.post(f'/api/horarios/{self.a.id}/mover/', {'intercambiar_con': self.b.id}, format='json')
+        actualizaciones = [q['sql'] for q in contexto.captured_queries if q['sql'].startswith('UPDATE "core_horario"')]
+        self.assertEqual(len(actualizaciones), 3)
+        self.assertFalse(any('~' in sql for sql in actualizaciones))
+        self.assertEqual(set(Horario.objects.values_list('periodo_academico', flat=True)), {'2025-2'})
+
+    def test_identificador_no_numerico(self):
+        respuesta = self.client.post('/api/horarios/abc/mover/', {'dia': 'MAR'}, format='json')
+        self.assertEqual(respuesta.status_code, 404)
+
+
+class BusquedaHuecosTests(HorariosTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.profesor.disponibilidad = {'LUN': ['08:00-12:00'], 'MAR': ['08:00-10:00']}
+        cls.profesor.save(update_fields=['disponibilidad'])
+        cls.materia.requisitos_de_aula = {'tipo_aula': 'Laboratorio', 'recursos_minimos': ['Computadoras']}
+        cls.materia.save(update_fields=['requisitos_de_aula'])
+        cls.lab = Aula.objects.create(codigo='LAB-1', capacidad=20, tipo='Laboratorio', recursos_especiales=['Computadoras'])
+        cls.lab_2 = Aula.objects.create(codigo='LAB-2', capacidad=20, tipo='Laboratorio', recursos_especiales=['Computadoras'])
+        cls.crear_horario('LUN', time(8), time(9), aula=cls.lab, seccion='1')
+        cls.crear_horario('LUN', time(10), time(12), aula=cls.lab, profesor=cls.otro_profesor, seccion='2')
+        Restriccion.objects.create(nombre='Consejo', tipo='PROFESOR_NO_DISPONIBLE', profesor=cls.profesor, dia='MAR')
+
+    def test_opciones_por_dia_inicio_y_aula(self):
+        url = f'/api/horarios/huecos/?profesor={self.profesor.id}&materia={self.materia.id}&duracion=120&paso=60'
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        opciones = [(o['dia'], o['hora_inicio'], o['aulas']) for o in respuesta.json()['opciones']]
+        self.assertEqual(opciones, [('LUN', '09:00', [self.lab_2.id]), ('LUN', '10:00', [self.lab_2.id])])
+        self.assertEqual(respuesta.json()['total'], 2)
+
+        # La ocupación queda precalculada; un nuevo horario la invalida.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.crear_horario('LUN', time(11), time(12), aula=self.lab_2, seccion='3')
+        self.assertEqual([o['hora_inicio'] for o in self.client.get(url).json()['opciones']], ['09:00'])
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client.get('/api/horarios/huecos/?duracion=60').status_code, 400)
+        self.assertEqual(self.client.get(f'/api/horarios/huecos/?profesor={self.profesor.id}&duracion=60&dias=XYZ').status_code, 400)
+
+
+class AnaliticaTests(HorariosTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.profesor.carga_horaria_maxima = 4
+        cls.profesor.save(update_fields=['carga_horaria_maxima'])
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.crear_horario('LUN', time(8, 30), time(10), tipo_clase='Teoría', carrera_programa='Telecomunicaciones')
+            cls.crear_horario('MAR', time(8), time(11), tipo_clase='Laboratorio', carrera_programa='Telecomunicaciones',
+                              seccion='2')
+
+    def test_ocupacion_de_aulas(self):
+        datos = self.client.get('/api/analitica/ocupacion-aulas/?desde=8&hasta=12').json()
+        aula = datos['aulas'][0]
+        self.assertEqual(aula['horas_ocupadas'], 4.5)
+        self.assertEqual(aula['mapa'][0], [0.5, 1.0, 0.0, 0.0])
+        self.assertEqual(aula['mapa'][1], [1.0, 1.0, 1.0, 0.0])
+        self.assertEqual(aula['utilizacion'], round(4.5 / 20, 4))
+
+    def test_carga_y_horas_por_carrera_con_cache(self):
+        carga = self.client.get('/api/analitica/carga-profesores/').json()
+        self.assertEqual(carga['distribucion']['>100%'], 1)
+        self.assertEqual(carga['sin_carga_maxima'], 1)
+        self.assertEqual(carga['profesores'][1]['carga_horaria_asignada'], 4.5)
+        self.assertTrue(carga['profesores'][1]['sobrecargado'])
+
+        self.assertEqual(self.client.get('/api/analitica/horas-carrera/').json()['total_por_tipo'],
+                         {'Laboratorio': 3.0, 'Teoría': 1.5})
+        with CaptureQueriesContext(connection) as contexto:
+            self.assertTrue(self.client.get('/api/analitica/horas-carrera/').json()['desde_cache'])
+        self.assertEqual(len(contexto.captured_queries), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Horario.objects.filter(tipo_clase='Teoría').delete()
+        datos = self.client.get('/api/analitica/horas-carrera/').json()
+        self.assertFalse(datos['desde_cache'])
+        self.assertEqual(datos['total'], 3.0)
+        self.assertEqual(self.client.get('/api/analitica/otro/').status_code, 404)
+
+    def test_horas_por_carrera_sin_tipo_ni_carrera(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.crear_horario('MIE', time(8), time(9), tipo_clase=None, carrera_programa='', seccion='3')
+            self.crear_horario('JUE', tipo_clase='', seccion='4')
+        respuesta = self.client.get('/api/analitica/horas-carrera/')
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        self.assertEqual(datos['total_por_tipo'], {'Laboratorio': 3.0, 'Sin tipo': 3.0, 'Teoría': 1.5})
+        self.assertEqual(datos['total_por_carrera']['Sin carrera'], 1.0)
+
+
+class NominaTests(HorariosTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.profesor.cedula, cls.profesor.categoria, cls.profesor.dedicatoria = 'V-1', 'Titular', 'Exclusiva'
+        cls.profesor.save(update_fields=['cedula', 'categoria', 'dedicatoria'])
+        cls.otro_profesor.categoria = 'Asistente'
+        cls.otro_profesor.save(update_fields=['categoria'])
+
+    def crear(self, profesor, dia, inicio, fin, tipo):
+        return self.crear_horario(dia, inicio, fin, profesor=profesor, tipo_clase=tipo, seccion=dia)
+
+    def test_resumen_incremental_y_reporte(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.crear(self.profesor, 'LUN', time(8), time(10), 'Teoría')
+            horario = self.crear(self.profesor, 'MAR', time(8), time(9, 30), 'Laboratorio')
+            self.crear(self.otro_profesor, 'LUN', time(10), time(11), 'Teoría')
+        self.assertEqual(ResumenNomina.objects.count(), 3)
+
+        # Cambiar el profesor de un horario recalcula a ambos profesores.
+        with self.captureOnCommitCallbacks(execute=True):
+            horario.profesor = self.otro_profesor
+            horario.save()
+        with CaptureQueriesContext(connection) as contexto:
+            datos = self.client.get('/api/nomina/?semanas=10').json()
+        self.assertLessEqual(len(contexto.captured_queries), 2)
+        self.assertEqual(datos['tipos_clase'], ['Laboratorio', 'Teoría'])
+        gomez, perez = datos['profesores']
+        self.assertEqual(gomez['horas_por_tipo'], {'Laboratorio': 1.5, 'Teoría': 1.0})
+        self.assertEqual((perez['horas_semanales'], perez['horas_periodo']), (2.0, 20.0))
+        self.assertEqual(datos['totales']['por']['categoria'], {'Asistente': 2.5, 'Titular': 2.0})
+
+        # La reconstrucción completa produce el mismo resumen.
+        antes = sorted(ResumenNomina.objects.values_list('profesor_id', 'tipo_clase', 'minutos_semanales'))
+        call_command('recalcular_nomina', stdout=io.StringIO())
+        self.assertEqual(sorted(ResumenNomina.objects.values_list('profesor_id', 'tipo_clase', 'minutos_semanales')), antes)
+
+    def test_exportacion_csv(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.crear(self.profesor, 'LUN', time(8), time(10), None)
+        respuesta = self.client.get('/api/nomina/?formato=csv')
+        contenido = b''.join(respuesta.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(contenido[0], 'Cédula,Profesor,Categoría,Régimen,Dedicación,Horas Sin tipo,Bloques,Horas Semanales,Horas del Período')
+        self.assertEqual(contenido[1], 'V-1,Ana Pérez,Titular,,Exclusiva,2.0,1,2.0,32.0')
+
+
+class VersionesDeltaTests(HorariosTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        aulas = [cls.aula] + [Aula.objects.create(codigo=f'A-{i}', capacidad=30) for i in (2, 3)]
+        for i, dia in enumerate(['LUN', 'MAR', 'MIE', 'JUE']):
+            cls.crear_horario(dia, aula=aulas[i % 3], seccion=str(i % 2))
+
+    def guardar(self, nombre):
+        respuesta = self.client.post('/api/versiones-horario/guardar_actual/', {'nombre_version': nombre}, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        return VersionHorario.objects.get(pk=respuesta.json()['id'])
+
+    def cargar(self, version):
+        return self.client.get(f'/api/versiones-horario/{version.id}/cargar_version/').json()['horarios_data']
+
+    def actuales(self):
+        return ordenar(HorarioSerializer(Horario.objects.all(), many=True).data)
+
+    def test_cadena_de_diferencias_transparente(self):
+        base = self.guardar('Base')
+        self.assertTrue(base.es_completa)
+
+        Horario.objects.filter(dia='MAR').update(hora_inicio=time(14), hora_fin=time(16))
+        movida = self.guardar('Movida')
+        delta = contenido_version(movida)
+        self.assertFalse(movida.es_completa)
+        self.assertEqual((len(delta['modificados']), len(delta['agregados']), len(delta['eliminados'])), (1, 0, 0))
+        self.assertNotIn('ids', delta)
+        self.assertEqual(self.cargar(movida), self.actuales())
+
+        # Regenerar (borrar y crear de nuevo) solo cambia los ids.
+        filas = list(Horario.objects.values('profesor', 'materia', 'aula', 'dia', 'hora_inicio', 'hora_fin', 'seccion'))
+        Horario.objects.all().delete()
+        for fila in filas:
+            Horario.objects.create(**{k + ('_id' if k in ('profesor', 'materia', 'aula') else ''): v for k, v in fila.items()})
+        regenerada = self.guardar('Regenerada')
+        delta = contenido_version(regenerada)
+        self.assertEqual(delta['modificados'] + delta['agregados'] + delta['eliminados'], [])
+        esperado = self.actuales()
+        self.assertEqual(self.cargar(regenerada), esperado)
+
+        # Borrar la base convierte en completa a la versión que dependía de ella.
+        base.delete()
+        movida.refresh_from_db()
+        self.assertTrue(movida.es_completa)
+        self.assertEqual(self.cargar(regenerada), esperado)
+
+    def test_version_completa_periodica(self):
+        versiones = []
+        with self.settings(VERSIONES_CADA_COMPLETA=3):
+            for i in range(4):
+                Horario.objects.filter(dia='LUN').update(hora_inicio=time(8 + i), hora_fin=time(10 + i))
+                versiones.append(self.guardar(f'V{i}'))
+        self.assertEqual([v.es_completa for v in versiones], [True, False, False, True])
+        self.assertEqual([v.profundidad for v in versiones], [0, 1, 2, 0])
+
+    def test_editar_version_no_reescribe_sus_horarios(self):
+        version = self.guardar('Base')
+        antes = self.cargar(version)
+        url = f'/api/versiones-horario/{version.id}/'
+        respuesta = self.client.patch(url, {'datos_horario_json': []}, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('datos_horario_json', respuesta.json())
+
+        respuesta = self.client.patch(url, {'nombre_version': 'Renombrada'}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        version.refresh_from_db()
+        self.assertEqual((version.nombre_version, version.cantidad_horarios), ('Renombrada', 4))
+        self.assertEqual(self.cargar(version), antes)
+
+
+class ContenidoVersionTests(HorariosTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for i in range(40):
+            cls.crear_horario(['LUN', 'MAR', 'MIE', 'JUE'][i % 4], time(7 + i // 4), time(8 + i // 4), seccion=str(i),
+                              tipo_clase='Teoría', periodo_academico='2025-2', carrera_programa='Sistemas')
+
+    def setUp(self):
+        super().setUp()
+        self.respuesta = self.client.post('/api/versiones-horario/guardar_actual/', {'nombre_version': 'Completa'}, format='json')
+
+    def test_listado_solo_metadatos(self):
+        version = VersionHorario.objects.get()
+        self.assertEqual(version.contenido.formato, 'columnar')
+        self.assertEqual(version.tamano, len(version.contenido.datos))
+        with CaptureQueriesContext(connection) as contexto:
+            fila = self.client.get('/api/versiones-horario/').json()['results'][0]
+        self.assertEqual((fila['nombre_version'], fila['cantidad_horarios'], fila['tamano']), ('Completa', 40, version.tamano))
+        self.assertNotIn('datos_horario_json', fila)
+        self.assertNotIn('contenidoversion', ' '.join(q['sql'] for q in contexto.captured_queries))
+        self.assertEqual(self.respuesta.json()['cantidad_horarios'], 40)
+
+    def test_contenido_comprimido_se_recupera_y_se_borra(self):
+        version = VersionHorario.objects.get()
+        datos = self.client.get(f'/api/versiones-horario/{version.id}/cargar_version/').json()['horarios_data']
+        self.assertEqual(datos, ordenar(HorarioSerializer(Horario.objects.all(), many=True).data))
+        self.assertLess(version.tamano, len(json.dumps(datos)) / 4)
+        version.delete()
+        self.assertFalse(ContenidoVersion.objects.exists())
+
+
+class ComparacionVersionesTests(HorariosTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.otra_aula = Aula.objects.create(codigo='B-1', capacidad=30)
+        for dia in ['LUN', 'MIE', 'VIE']:
+            cls.crear_horario(dia, seccion='1')
+        cls.quitado = cls.crear_horario('MAR', profesor=cls.otro_profesor, seccion='2')
+
+    def setUp(self):
+        super().setUp()
+        self.base = self.client.post('/api/versiones-horario/guardar_actual/', {'nombre_version': 'Base'}, format='json').json()['id']
+
+        # El bloque del lunes pasa al jueves en otra aula: los del miércoles y viernes no cambian.
+        Horario.objects.filter(dia='LUN').update(dia='JUE', aula=self.otra_aula)
+        self.quitado.delete()
+        self.crear_horario('MAR', time(14), time(16), profesor=self.otro_profesor, aula=self.otra_aula, seccion='3')
+
+    def verificar(self, datos):
+        self.assertEqual(datos['totales'], {'agregados': 1, 'eliminados': 1, 'movidos': 1, 'sin_cambios': 2})
+        movido, = datos['movidos']
+        self.assertEqual((movido['antes']['dia'], movido['despues']['dia'], movido['cambios']), ('LUN', 'JUE', ['dia', 'aula']))
+        self.assertEqual(datos['eliminados'][0]['seccion'], '2')
+        self.assertEqual(datos['agregados'][0]['seccion'], '3')
+        por_profesor = {fila['profesor']: fila for fila in datos['por_profesor']}
+        self.assertEqual(por_profesor[self.profesor.id]['movidos'], 1)
+        otro = por_profesor[self.otro_profesor.id]
+        self.assertEqual((otro['agregados'], otro['eliminados']), (1, 1))
+        por_aula = {fila['aula_codigo']: fila for fila in datos['por_aula']}
+        self.assertEqual((por_aula['A-1']['eliminados'], por_aula['A-1']['movidos']), (1, 1))
+        self.assertEqual((por_aula['B-1']['agregados'], por_aula['B-1']['movidos']), (1, 1))
+
+    def test_contra_horarios_actuales(self):
+        datos = self.client.get(f'/api/versiones-horario/{self.base}/comparar/').json()
+        self.assertEqual(datos['hasta']['id'], None)
+        self.verificar(datos)
+
+    def test_entre_versiones(self):
+        nueva = self.client.post('/api/versiones-horario/guardar_actual/', {'nombre_version': 'Nueva'}, format='json').json()['id']
+        datos = self.client.get(f'/api/versiones-horario/{self.base}/comparar/?con={nueva}').json()
+        self.assertEqual(datos['hasta']['nombre_version'], 'Nueva')
+        self.verificar(datos)
+        self.assertEqual(self.client.get(f'/api/versiones-horario/{self.base}/comparar/?con=999').status_code, 404)
+
+
+class RestauracionVersionTests(HorariosTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        otros = [Profesor.objects.create(nombre=f'P{i}', apellido='Prueba') for i in (2, 3)]
+        cls.profesores = [cls.profesor, cls.otro_profesor] + otros
+        cls.aulas = [cls.aula] + [Aula.objects.create(codigo=f'A-{i}', capacidad=30) for i in range(2, 6)]
+
+    def crear_horarios(self, cantidad):
+        for i in range(cantidad):
+            self.crear_horario(['LUN', 'MAR', 'MIE', 'JUE', 'VIE'][i // 5 % 5], time(7 + i // 25), time(8 + i // 25),
+                               profesor=self.profesores[i % 4], aula=self.aulas[i % 5], seccion=str(i))
+        return self.client.post('/api/versiones-horario/guardar_actual/', {'nombre_version': f'V{cantidad}'}, format='json').json()['id']
+
+    def restaurar(self, version):
+        with CaptureQueriesContext(connection) as contexto, self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post(f'/api/versiones-horario/{version}/restore/')
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json(), len(contexto.captured_queries)
+
+    def test_restaura_con_consultas_constantes(self):
+        pequena = self.crear_horarios(10)
+        Horario.objects.all().delete()
+        grande = self.crear_horarios(60)
+        _, consultas_pequena = self.restaurar(pequena)
+        self.assertEqual(Horario.objects.count(), 10)
+        datos, consultas_grande = self.restaurar(grande)
+        self.assertNotIn('errors', datos)
+        self.assertEqual(Horario.objects.count(), 60)
+        # Borrar los horarios anteriores, con sus señales, no depende de las filas de la versión.
+        self.assertLessEqual(consultas_grande - consultas_pequena, 3)
+        self.assertEqual(sum(ResumenNomina.objects.values_list('bloques', flat=True)), 60)
+
+    def test_referencias_faltantes_por_fila(self):
+        version = self.crear_horarios(8)
+        aula_id = self.aulas[0].id
+        self.aulas[0].delete()  # También borra sus horarios.
+        datos, _ = self.restaurar(version)
+        self.assertEqual(len(datos['errors']), 2)
+        self.assertIn(f'No existe aula con ID {aula_id}', datos['errors'][0])
+        self.assertTrue(datos['message'].startswith('Se restauraron 6 horarios'))
+        self.assertEqual(Horario.objects.count(), 6)
+
+
+class RetencionVersionesTests(HorariosTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.horario = cls.crear_horario('LUN', time(7), time(8))
+        for i in range(6):
+            cls.crear_horario('MAR', time(8 + i), time(9 + i), seccion=str(i))
+
+    def guardar(self, nombre, hora=None):
+        if hora is not None:
+            Horario.objects.filter(pk=self.horario.pk).update(hora_inicio=time(hora), hora_fin=time(hora + 1))
+        return VersionHorario.objects.get(pk=self.client.post(
+            '/api/versiones-horario/guardar_actual/', {'nombre_version': nombre}, format='json').json()['id'])
+
+    def test_version_identica_comparte_contenido(self):
+        primera = self.guardar('Primera')
+        self.guardar('Cambio', hora=9)
+        igual = self.guardar('Igual a la primera', hora=7)
+        self.assertEqual((igual.contenido_id, igual.es_completa, igual.huella), (primera.contenido_id, True, primera.huella))
+        self.assertEqual(ContenidoVersion.objects.count(), 2)
+        primera.delete()
+        igual.refresh_from_db()
+        self.assertEqual(self.client.get(f'/api/versiones-horario/{igual.id}/cargar_version/').json()['horarios_data'],
+                         ordenar(HorarioSerializer(Horario.objects.all(), many=True).data))
+
+    def regenerar(self):
+        # Como GenerarHorariosView: borra todos los horarios y los vuelve a crear (con otros ids).
+        filas = list(Horario.objects.values('profesor_id', 'materia_id', 'aula_id', 'dia', 'hora_inicio', 'hora_fin', 'seccion'))
+        Horario.objects.all().delete()
+        Horario.objects.bulk_create([Horario(**fila) for fila in filas])
+
+    def cargar(self, version):
+        return self.client.get(f'/api/versiones-horario/{version.id}/cargar_version/').json()['horarios_data']
+
+    def test_regenerar_igual_solo_guarda_los_ids(self):
+        primera = self.guardar('Algoritmo 1')
+        self.guardar('Cambio', hora=9)
+        Horario.objects.filter(dia='LUN').update(hora_inicio=time(7), hora_fin=time(8))
+        self.regenerar()
+        segunda = self.guardar('Algoritmo 2')
+        self.regenerar()
+        tercera = self.guardar('Algoritmo 3')
+
+        self.assertEqual({segunda.huella, tercera.huella}, {primera.huella})
+        # Sobre la versión idéntica (no encadenadas entre sí) y sin más diferencias que los ids.
+        self.assertEqual((segunda.version_base_id, tercera.version_base_id), (primera.id, primera.id))
+        self.assertEqual((segunda.profundidad, tercera.profundidad), (1, 1))
+        delta = contenido_version(tercera)
+        self.assertEqual(delta['agregados'] + delta['modificados'] + delta['eliminados'], [])
+        esperado = ordenar(HorarioSerializer(Horario.objects.all(), many=True).data)
+        self.assertEqual(self.cargar(tercera), esperado)
+
+        anterior = self.cargar(segunda)
+        primera.delete()
+        self.assertEqual((self.cargar(segunda), self.cargar(tercera)), (anterior, esperado))
+
+    def test_politica_de_retencion(self):
+        ahora = timezone.make_aware(datetime(2025, 6, 11, 12))  # Miércoles.
+        edades = [0, 1, 2, 2.1, 3, 10, 11, 100]  # Días.
+        versiones = [self.guardar(f'Algoritmo {i}', hora=7 + i) for i in range(len(edades))]
+        con_nombre = self.guardar('Cierre de semestre', hora=20)
+        for version, edad in zip(versiones, edades):
+            VersionHorario.objects.filter(pk=version.pk).update(fecha_guardado=ahora - timedelta(days=edad))
+        VersionHorario.objects.filter(pk=con_nombre.pk).update(fecha_guardado=ahora - timedelta(days=400))
+        esperados = {v.pk: datos_version(v) for v in VersionHorario.objects.all()}
+
+        call_command('podar_versiones', '--simular', stdout=io.StringIO())
+        self.assertEqual(VersionHorario.objects.count(), 9)
+
+        politica = {'ULTIMAS_AUTOMATICAS': 2, 'DIAS_UNA_POR_DIA': 5, 'DIAS_UNA_POR_SEMANA': 30}
+        borradas, _ = podar_versiones(ahora, politica)
+        # Las 2 últimas, una por día hasta 5 días (2.1 cae el mismo día que 2), una por semana
+        # hasta 30 días (11 cae en la misma semana que 10), ninguna más vieja y las con nombre.
+        self.assertEqual(borradas, 3)
+        self.assertEqual(
+            set(VersionHorario.objects.values_list('nombre_version', flat=True)),
+            {'Algoritmo 0', 'Algoritmo 1', 'Algoritmo 2', 'Algoritmo 4', 'Algoritmo 5', 'Cierre de semestre'},
+        )
+        for version in VersionHorario.objects.all():
+            self.assertEqual(datos_version(version), esperados[version.pk])
+        self.assertFalse(ContenidoVersion.objects.filter(versiones__isnull=True).exists())
+
+
+class ImportacionExcelTests(APITestCase):
+    COLUMNAS = ['Dia', 'Hora Inicio', 'Hora Fin', 'Profesor', 'Materia', 'Aula', 'Tipo Clase', 'Seccion', 'Periodo Academico']
+
+    def setUp(self):
+        cache.clear()
+
+    def libro(self, hojas):
+        """Archivo .xlsx con una hoja por entrada de `hojas` ({nombre: (columnas, filas)})."""
+        libro = openpyxl.Workbook()
+        libro.remove(libro.active)
+        for nombre, (columnas, filas) in hojas.items():
+            hoja = libro.create_sheet(nombre)
+            hoja.append(columnas)
+            for fila in filas:
+                hoja.append(fila)
+        contenido = io.BytesIO()
+        libro.save(contenido)
+        contenido.seek(0)
+        contenido.name = 'solicitudes.xlsx'
+        return contenido
+
+    def importar(self, libro, **datos):
+        # horarios/importar_excel/ queda tapada por la ruta de detalle del router de horarios.
+        return self.client.post('/api/importar-horarios-excel/', {'file': self.libro(libro), **datos}, format='multipart')
+
+    def test_varias_hojas_con_errores_por_hoja_y_duplicados_entre_hojas(self):
+        sistemas = [
+            ['Lunes', '08:00', '10:00', 'Ana Pérez', 'Redes', 'A-1', 'Teoría', '1', '2025-2 Sistemas'],
+            ['Martes', '08:00', '10:00', 'Luis Gómez', 'Cálculo', 'A-2', 'Teoría', '1', '2025-2 Sistemas'],
+        ]
+        # La primera fila repite la primera de Sistemas (misma clave de solicitud).
+        telecom = [
+            ['Miércoles', '14:00', '16:00', 'Ana Pérez', 'Redes', 'A-3', 'Teoría', '1', '2025-2 Sistemas'],
+            ['Jueves', '2:00 PM', '4:00 PM', 'Ana Pérez', 'Antenas', 'A-3', 'Práctica', '1', '2025-2 Telecom'],
+        ]
+        sin_aula = [c for c in self.COLUMNAS if c != 'Aula']
+        respuesta = self.importar({
+            'Sistemas': (self.COLUMNAS, sistemas),
+            'Telecom': (self.COLUMNAS, telecom),
+            'Incompleta': (sin_aula, [['Lunes', '08:00', '09:00', 'Eva Ruiz', 'Física', 'Teoría', '1', '2025-2 Física']]),
+        })
+        self.assertEqual(respuesta.status_code, 207)
+        datos = respuesta.json()
+        hojas = {h['hoja']: h for h in datos['hojas']}
+        self.assertEqual({k: (v['filas'], v['importadas'], v['errores']) for k, v in hojas.items()},
+                         {'Sistemas': (2, 2, 0), 'Telecom': (2, 1, 1), 'Incompleta': (0, 0, 0)})
+        self.assertIn('"aula"', hojas['Incompleta']['error'])
+        error, = datos['errors']
+        self.assertEqual((error['hoja'], error['fila']), ('Telecom', 2))
+        self.assertIn("la fila 2 de la hoja 'Sistemas'", error['error'])
+        self.assertEqual(SolicitudClase.objects.count(), 3)
+        self.assertEqual(SolicitudClase.objects.get(materia__nombre='Antenas').hora_inicio, time(14))
+
+    def test_dry_run_no_escribe_y_reporta_lo_mismo(self):
+        filas = [
+            ['Lunes', '08:00', '10:00', 'Ana Pérez', 'Redes', 'A-1', 'Teoría', '1', '2025-2 Sistemas'],
+            ['Lunes', '09:00', '11:00', 'Ana Pérez', 'Cálculo', 'A-2', 'Teoría', '1', '2025-2 Sistemas'],
+            ['Domingo?', '08:00', '10:00', 'Luis Gómez', 'Redes', 'A-1', 'Teoría', '2', '2025-2 Sistemas'],
+            ['Martes', '10:00', '08:00', 'Luis Gómez', 'Redes', 'A-1', 'Teoría', '3', '2025-2 Sistemas'],
+        ]
+        libro = {'Sistemas': (self.COLUMNAS, filas)}
+        with CaptureQueriesContext(connection) as contexto:
+            seco = self.importar(libro, dry_run='true').json()
+        self.assertTrue(seco['dry_run'])
+        self.assertFalse(any(q['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')) for q in contexto.captured_queries))
+        self.assertEqual((Profesor.objects.count(), Materia.objects.count(), Aula.objects.count(), SolicitudClase.objects.count()), (0, 0, 0, 0))
+        self.assertEqual(seco['filas_validas'], 2)
+        self.assertEqual(len(seco['entidades_nuevas']['profesores']), 1)
+
+        real = self.importar(libro).json()
+        self.assertEqual(real['errors'], seco['errors'])
+        self.assertEqual(real['conflictos'], seco['conflictos'])
+        self.assertEqual(len(real['solicitudes_creadas']), seco['filas_validas'])
+
+    def test_hojas_pedidas(self):
+        fila = ['Lunes', '08:00', '10:00', 'Ana Pérez', 'Redes', 'A-1', 'Teoría', '1', '2025-2 Sistemas']
+        hojas = {'Sistemas': (self.COLUMNAS, [fila]), 'Otra': (['x'], [[1]])}
+        self.assertEqual(self.importar(hojas, hojas='Sistemas').status_code, 201)
+        self.assertEqual(self.importar(hojas, hojas='No existe').status_code, 400)
+
+
+class ParseoHorasTests(SimpleTestCase):
+    def test_formato_dominante(self):
+        self.assertEqual(detectar_formato_dominante(['08:00', '09:30', '10:15:00']), '%H:%M')
+        self.assertEqual(detectar_formato_dominante(['02:30 PM', '11:00 AM']), '%I:%M %p')
+        self.assertIsNone(detectar_formato_dominante(['hola']))
+
+    def test_columna_mixta(self):
+        serie = pd.Series([
+            '08:00', '14.30', '2:30 pm', 0.5, 45000.75, datetime(2025, 1, 1, 7, 15), time(6, 5),
+            None, '  ', 'mañana', -1.0, True, '08:00',
+        ])
+        minutos, invalidos = parsear_columna_horas(serie)
+        self.assertEqual(
+            [None if pd.isna(m) else int(m) for m in minutos],
+            [480, 870, 870, 720, 1080, 435, 365, None, None, None, None, None, 480],
+        )
+        self.assertEqual(invalidos[invalidos].index.tolist(), [9, 10, 11])
+
+    def test_respaldo_celda_a_celda_memoizado(self):
+        # El formato dominante es HH:MM; '2:30 PM' se resuelve con el parseo por celda, una sola vez
+        # aunque aparezca repetido.
+        _hora_desde_texto.cache_clear()
+        minutos, _ = parsear_columna_horas(pd.Series(['08:00', '09:00', '10:00', '2:30 PM', '2:30 PM']))
+        self.assertEqual(minutos.tolist()[3:], [870, 870])
+        self.assertEqual(_hora_desde_texto.cache_info().misses, 1)
+        parsear_columna_horas(pd.Series(['08:00', '2:30 PM']))
+        self.assertEqual(_hora_desde_texto.cache_info().hits, 1)
+
+    def test_valor_individual_conserva_segundos(self):
+        self.assertEqual(excel_time_to_python_time('08:30:15'), time(8, 30, 15))
+        self.assertEqual(excel_time_to_python_time(0.354166666), time(8, 30))  # Redondeo al segundo.
+        self.assertEqual(excel_time_to_python_time(45000.5), time(12))
+        self.assertEqual(excel_time_to_python_time(time(9, 0, 30)), time(9, 0, 30))
+        self.assertIsNone(excel_time_to_python_time(''))
+        self.assertEqual(minutos_desde_valor('08:30:59'), 510)
+        with self.assertRaises(ValueError):
+            excel_time_to_python_time('25:00')
+        with self.assertRaises(ValueError):
+            excel_time_to_python_time(-0.5)
+        with self.assertRaises(TypeError):
+            excel_time_to_python_time([8, 0])
+
+
+class CargaHorariaProfesoresTests(HorariosTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Profesor.objects.create(nombre='Eva', apellido='Ruiz')
+        cls.crear_horario('LUN', time(8), time(10, 30))  # 2.5 h
+        cls.crear_horario('MAR', time(23), time(1))  # Cruza la medianoche: 2 h
+        cls.crear_horario('MIE', time(7, 15), time(8), profesor=cls.otro_profesor)  # 0.75 h
+
+    def cargas(self, url):
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200, url)
+        return [(p['nombre'], p['carga_horaria_asignada']) for p in respuesta.json()['results']]
+
+    def test_agregado_incluye_bloques_que_cruzan_medianoche(self):
+        cargas = dict(Profesor.objects.con_carga_horaria().values_list('nombre', 'carga_horaria_asignada'))
+        self.assertEqual(cargas, {'Ana': 4.5, 'Luis': 0.75, 'Eva': 0.0})
+        self.assertEqual(dict(self.cargas('/api/profesores/')), cargas)
+
+    def test_filtros_y_orden_por_carga(self):
+        self.assertEqual(self.cargas('/api/profesores/?ordering=-carga_horaria_asignada'),
+                         [('Ana', 4.5), ('Luis', 0.75), ('Eva', 0.0)])
+        self.assertEqual(self.cargas('/api/profesores/?carga_min=0.5&carga_max=4'), [('Luis', 0.75)])
+        # El filtro funciona aunque la carga no se pida en la respuesta.
+        datos = self.client.get('/api/profesores/?carga_min=1&fields=nombre').json()['results']
+        self.assertEqual(datos, [{'nombre': 'Ana'}])
+        self.assertEqual(self.client.get('/api/profesores/?carga_max=mucho').status_code, 400)
+
+
+class FiltrosHorariosTests(HorariosTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        otra_aula = Aula.objects.create(codigo='B-2', capacidad=30)
+        bloques = {
+            'manana': (cls.profesor, cls.aula, 'LUN', time(8), time(10), '2025-1', 'S1'),
+            'tarde': (cls.profesor, otra_aula, 'MAR', time(14), time(16), '2025-1', 'S2'),
+            'noche': (cls.otro_profesor, cls.aula, 'MIE', time(22), time(1), '2025-1', 'S1'),  # Cruza la medianoche.
+            'otro_periodo': (cls.otro_profesor, otra_aula, 'LUN', time(9), time(11), '2025-2', 'S1'),
+        }
+        cls.ids = {}
+        for nombre, (profesor, aula, dia, inicio, fin, periodo, seccion) in bloques.items():
+            cls.ids[nombre] = cls.crear_horario(
+                dia, inicio, fin, profesor=profesor, aula=aula, periodo_academico=periodo, seccion=seccion,
+            ).id
+            SolicitudClase.objects.create(
+                profesor=profesor, materia=cls.materia, aula=aula, dia=dia, hora_inicio=inicio, hora_fin=fin,
+                periodo_academico=periodo, seccion=seccion, carrera_programa='Telecom', tipo_clase='Teoría',
+                estado='Asignada' if nombre == 'tarde' else 'Pendiente',
+            )
+
+    def resultados(self, url):
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200, url)
+        return respuesta.json()['results']
+
+    def nombres(self, consulta):
+        por_id = {pk: nombre for nombre, pk in self.ids.items()}
+        return sorted(por_id[h['id']] for h in self.resultados(f'/api/horarios/?{consulta}'))
+
+    def test_filtros_de_igualdad_y_listas(self):
+        self.assertEqual(self.nombres(f'profesor={self.profesor.id}'), ['manana', 'tarde'])
+        self.assertEqual(self.nombres(f'aula={self.aula.id}&periodo_academico=2025-1'), ['manana', 'noche'])
+        self.assertEqual(self.nombres('dia=lun,mie'), ['manana', 'noche', 'otro_periodo'])
+        self.assertEqual(self.nombres('seccion=S1&periodo_academico=2025-2'), ['otro_periodo'])
+        self.assertEqual(self.client.get('/api/horarios/?profesor=ana').status_code, 400)
+
+    def test_rango_horario_por_solapamiento(self):
+        # [desde, hasta) se solapa con el bloque si inicio < hasta y fin > desde; los bordes no cuentan.
+        self.assertEqual(self.nombres('desde=10:00&hasta=14:00'), ['otro_periodo'])
+        self.assertEqual(self.nombres('desde=09:30&hasta=09:45'), ['manana', 'otro_periodo'])
+        self.assertEqual(self.nombres('hasta=08:30'), ['manana', 'noche'])
+        self.assertEqual(self.nombres('desde=15:00'), ['noche', 'tarde'])
+        self.assertEqual(self.client.get('/api/horarios/?desde=8am').status_code, 400)
+
+    def test_rango_horario_con_bloques_que_cruzan_medianoche(self):
+        # El bloque 22:00-01:00 ocupa [22:00, 24:00) y [00:00, 01:00).
+        self.assertEqual(self.nombres('desde=23:00&hasta=23:30'), ['noche'])
+        self.assertEqual(self.nombres('desde=00:30&hasta=02:00'), ['noche'])
+        self.assertEqual(self.nombres('desde=01:00&hasta=07:00'), [])
+        self.assertEqual(self.nombres('desde=17:00&hasta=22:00'), [])
+
+    def test_solicitudes_comparten_filtros_y_agregan_estado(self):
+        self.assertEqual(len(self.resultados('/api/solicitudes-clase/?estado=Pendiente')), 3)
+        self.assertEqual(len(self.resultados('/api/solicitudes-clase/?estado=Asignada&dia=MAR')), 1)
+        self.assertEqual(len(self.resultados('/api/solicitudes-clase/?desde=00:00&hasta=00:30')), 1)
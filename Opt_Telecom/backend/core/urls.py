@@ -12,6 +12,9 @@ from .views import (
     SolicitudClaseViewSet,
     VersionHorarioViewSet,
     AsignarSolicitudAHorarioView,
+    EstadisticasCacheView,
+    AnaliticaView,
+    NominaView,
     GenerarHorariosView, # Confirmado que esta importación es correcta
     # Asegúrate de que las siguientes vistas también estén importadas si las necesitas,
     # ya que estaban en mi sugerencia anterior para completar el flujo:
@@ -56,6 +59,13 @@ urlpatterns = [
     path('generar-horarios/', GenerarHorariosView.as_view(), name='generar_horarios'),
     path('importar-horarios-excel/', ImportarHorariosExcelView.as_view(), name='importar_horarios_excel'),
 
+    # Aciertos y fallos de la caché de respuestas de los catálogos.
+    path('cache/estadisticas/', EstadisticasCacheView.as_view(), name='estadisticas_cache'),
+    # Reportes de uso para los tableros (ocupacion-aulas, carga-profesores, horas-carrera).
+    path('analitica/<slug:reporte>/', AnaliticaView.as_view(), name='analitica'),
+    # Horas de docencia por profesor para la nómina (JSON, CSV o XLSX).
+    path('nomina/', NominaView.as_view(), name='nomina'),
+
 
     # === Sugerencias adicionales (si las necesitas en tu flujo) ===
     # Si necesitas una vista para obtener el "horario completo" actual (no una versión guardada),
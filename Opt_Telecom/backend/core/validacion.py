@@ -0,0 +1,141 @@
+# backend/core/validacion.py
+"""
+Validación en lote de ubicaciones propuestas (sin escribir nada).
+
+Cada propuesta es un bloque {profesor, aula, materia, seccion, dia, hora_inicio, hora_fin,
+periodo_academico[, tipo_clase][, id]}. Todo lo necesario se carga con un número fijo de
+consultas (horarios de los períodos, restricciones, profesores, materias y aulas del lote) y
+se compila en índices en memoria; después cada propuesta se revisa contra:
+
+- los horarios existentes y las demás propuestas del lote (profesor, aula y sección),
+- las Restricciones (profesor o aula no disponible, materia no permitida en el aula),
+- la disponibilidad declarada del profesor,
+- los requisitos de aula de la materia (para clases de laboratorio, como el generador).
+
+Con 'id' la propuesta representa el movimiento de un horario existente y no choca consigo mismo.
+"""
+from datetime import time
+
+from django.db.models import Q
+
+from .models import Aula, Horario, Materia, Profesor, Restriccion
+from .ocupacion import (
+    IndiceOcupacion, IndiceRestricciones, aula_cumple_requisitos, compilar_disponibilidad,
+    dentro_de_disponibilidad, intervalo_minutos,
+)
+
+DIAS_VALIDOS = {codigo for codigo, _ in Horario.DIA_CHOICES}
+PERIODO_POR_DEFECTO = Horario._meta.get_field('periodo_academico').default
+CAMPOS_OCUPACION = ('id', 'profesor_id', 'aula_id', 'materia_id', 'seccion', 'dia', 'hora_inicio', 'hora_fin', 'periodo_academico')
+
+
+def _entero(item, campo, errores):
+    valor = item.get(campo)
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        errores.append({'tipo': 'datos', 'campo': campo, 'detalle': f"'{campo}' debe ser un identificador numérico."})
+        return None
+
+
+def _hora(item, campo, errores):
+    try:
+        return time.fromisoformat(str(item.get(campo)))
+    except ValueError:
+        errores.append({'tipo': 'datos', 'campo': campo, 'detalle': f"'{campo}' debe tener el formato HH:MM."})
+        return None
+
+
+def _seccion(item, errores):
+    # Sin sección (o con null) se usa la predeterminada del modelo; otros tipos son un error de datos.
+    valor = item.get('seccion') or '1'
+    if not isinstance(valor, str):
+        errores.append({'tipo': 'datos', 'campo': 'seccion', 'detalle': "'seccion' debe ser un texto."})
+        return None
+    return valor
+
+
+def normalizar_propuesta(item):
+    """Devuelve (registro, errores_de_datos) con los nombres de campo de Horario."""
+    errores = []
+    if not isinstance(item, dict):
+        return None, [{'tipo': 'datos', 'detalle': 'Cada propuesta debe ser un objeto.'}]
+    registro = {
+        'id': item.get('id') if isinstance(item.get('id'), int) else None,
+        'profesor_id': _entero(item, 'profesor', errores),
+        'aula_id': _entero(item, 'aula', errores),
+        'materia_id': _entero(item, 'materia', errores),
+        'seccion': _seccion(item, errores),
+        'dia': str(item.get('dia', '')).upper(),
+        'hora_inicio': _hora(item, 'hora_inicio', errores),
+        'hora_fin': _hora(item, 'hora_fin', errores),
+        'periodo_academico': item.get('periodo_academico') or PERIODO_POR_DEFECTO,
+        'tipo_clase': item.get('tipo_clase'),
+    }
+    if registro['dia'] not in DIAS_VALIDOS:
+        errores.append({'tipo': 'datos', 'campo': 'dia', 'detalle': f"Día no válido: '{item.get('dia')}'."})
+    if registro['hora_inicio'] is not None and registro['hora_inicio'] == registro['hora_fin']:
+        errores.append({'tipo': 'datos', 'campo': 'hora_fin', 'detalle': 'La hora de fin debe ser distinta de la hora de inicio.'})
+    return registro, errores
+
+
+def _describir_referencia(referencia):
+    if isinstance(referencia, tuple):
+        return {'propuesta': referencia[1]}
+    return {'horario': referencia}
+
+
+def validar_propuestas(items):
+    """
+    Devuelve una lista con un resultado por propuesta:
+    {'indice', 'valida', 'conflictos': [{'tipo', 'recurso'?, 'detalle', 'horario'|'propuesta'|'restriccion'?}]}.
+    """
+    normalizadas = [normalizar_propuesta(item) for item in items]
+    validas = [(i, r) for i, (r, errores) in enumerate(normalizadas) if not errores]
+
+    profesores = {p['id']: p for p in Profesor.objects.filter(pk__in={r['profesor_id'] for _, r in validas}).values('id', 'nombre', 'apellido', 'disponibilidad')}
+    aulas = {a['id']: a for a in Aula.objects.filter(pk__in={r['aula_id'] for _, r in validas}).values('id', 'codigo', 'tipo', 'recursos_especiales')}
+    materias = {m['id']: m for m in Materia.objects.filter(pk__in={r['materia_id'] for _, r in validas}).values('id', 'nombre', 'requisitos_de_aula')}
+
+    # Horarios de los períodos involucrados + las propuestas válidas, en el mismo índice.
+    periodos = {r['periodo_academico'] for _, r in validas}
+    indice = IndiceOcupacion.desde_registros(Horario.objects.filter(periodo_academico__in=periodos).values(*CAMPOS_OCUPACION))
+    for i, registro in validas:
+        if registro['id'] is not None:
+            indice.quitar(registro['id'])  # La propuesta mueve ese horario.
+    for i, registro in validas:
+        indice.agregar(('propuesta', i), registro)
+
+    restricciones = IndiceRestricciones(Restriccion.objects.filter(
+        Q(profesor_id__in=profesores) | Q(aula_id__in=aulas) | Q(materia_id__in=materias)
+    ).values('id', 'nombre', 'tipo', 'dia', 'hora_inicio', 'hora_fin', 'profesor_id', 'aula_id', 'materia_id'))
+    disponibilidades = {pk: compilar_disponibilidad(p['disponibilidad']) for pk, p in profesores.items()}
+
+    resultados = []
+    for i, (registro, conflictos) in enumerate(normalizadas):
+        conflictos = list(conflictos)
+        if not conflictos:
+            conflictos += _revisar_referencias(registro, profesores, aulas, materias)
+        if not conflictos:
+            for recurso, referencia in indice.conflictos(registro, ignorar=('propuesta', i)):
+                conflictos.append({
+                    'tipo': 'ocupacion', 'recurso': recurso,
+                    'detalle': f"Se solapa con otro bloque del mismo {recurso}.", **_describir_referencia(referencia),
+                })
+            for restriccion in restricciones.conflictos(registro):
+                conflictos.append({'tipo': 'restriccion', 'restriccion': restriccion['id'], 'detalle': restriccion['nombre']})
+            inicio, fin = intervalo_minutos(registro['hora_inicio'], registro['hora_fin'])
+            if not dentro_de_disponibilidad(disponibilidades[registro['profesor_id']], registro['dia'], inicio, fin):
+                conflictos.append({'tipo': 'disponibilidad', 'recurso': 'profesor', 'detalle': 'Fuera de la disponibilidad declarada del profesor.'})
+            if registro['tipo_clase'] in (None, 'Laboratorio') and not aula_cumple_requisitos(aulas[registro['aula_id']], materias[registro['materia_id']]['requisitos_de_aula']):
+                conflictos.append({'tipo': 'requisitos_aula', 'recurso': 'aula', 'detalle': 'El aula no cumple los requisitos de la materia.'})
+        resultados.append({'indice': i, 'valida': not conflictos, 'conflictos': conflictos})
+    return resultados
+
+
+def _revisar_referencias(registro, profesores, aulas, materias):
+    faltantes = []
+    for campo, catalogo in (('profesor', profesores), ('aula', aulas), ('materia', materias)):
+        if registro[f'{campo}_id'] not in catalogo:
+            faltantes.append({'tipo': 'datos', 'campo': campo, 'detalle': f"No existe {campo} con ID {registro[f'{campo}_id']}."})
+    return faltantes
@@ -0,0 +1,479 @@
+# backend/core/versionado.py
+"""
+Versiones de horario guardadas como cadenas de diferencias.
+
+Una versión completa guarda todos los horarios. Las demás guardan solo lo que cambió respecto
+de la versión anterior (`version_base`):
+
+    {"agregados": [[ordinal, fila], ...], "modificados": [[ordinal, fila], ...],
+     "eliminados": [clave, ...], "ids": [...]?}
+
+Cada fila se identifica con una clave estable que no depende del id del Horario (el generador
+borra y vuelve a crear todos los horarios en cada corrida):
+
+    (periodo_academico, carrera_programa, materia, seccion, tipo_clase, ordinal)
+
+donde `ordinal` numera los bloques de una misma clase por día y hora. Las filas se guardan en
+un orden canónico, así la reconstrucción devuelve exactamente la lista original. Cada
+VERSIONES_CADA_COMPLETA versiones (o cuando la diferencia no compensa) se guarda una completa,
+para que reconstruir nunca recorra más de esa cantidad de eslabones.
+
+El contenido (filas o diferencias) se guarda en ContenidoVersion como JSON compacto comprimido
+con zlib; las listas de horarios, además, en la forma columnar de renderers.a_columnas, que no
+repite los nombres de campo ni los textos (días, tipos, carreras). No se usa MessagePack aunque
+esté instalado: una versión guardada tiene que poder leerse sin la dependencia opcional.
+
+Cada versión lleva la huella (SHA-256) de sus horarios: guardar algo idéntico a una versión
+existente no crea contenido nuevo, sino que la nueva versión comparte el de aquella.
+`podar_versiones` aplica la política de retención de settings.VERSIONES_RETENCION.
+"""
+import hashlib
+import json
+import zlib
+from collections import defaultdict
+from datetime import time, timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .colecciones import COLECCIONES, marcar_cambio
+from .grilla import invalidar_grillas_de_horarios
+from .models import Aula, ContenidoVersion, Horario, Materia, Profesor, VersionHorario
+from .nomina import marcar_nomina
+from .renderers import a_columnas, de_columnas
+
+ORDEN_DIAS = {codigo: i for i, (codigo, _) in enumerate(Horario.DIA_CHOICES)}
+PREFIJO_VERSION_AUTOMATICA = 'Algoritmo '
+
+CAMPOS_CLAVE = ('periodo_academico', 'carrera_programa', 'materia', 'seccion', 'tipo_clase')
+
+
+def _texto(valor):
+    return '' if valor is None else str(valor)
+
+
+def orden_canonico(fila):
+    return (
+        _texto(fila.get('periodo_academico')), ORDEN_DIAS.get(fila.get('dia'), len(ORDEN_DIAS)),
+        _texto(fila.get('hora_inicio')), _texto(fila.get('hora_fin')),
+        _texto(fila.get('aula')), _texto(fila.get('materia')), _texto(fila.get('seccion')), _texto(fila.get('id')),
+    )
+
+
+def ordenar(filas):
+    return sorted(filas, key=orden_canonico)
+
+
+def claves_estables(filas):
+    """Clave estable (tupla) de cada fila, en el mismo orden que `filas`."""
+    grupos = defaultdict(list)
+    for posicion, fila in enumerate(filas):
+        grupos[clave_de_fila(fila, None)[:-1]].append(posicion)
+    claves = [None] * len(filas)
+    for grupo, posiciones in grupos.items():
+        # Dentro de una misma clase los bloques se numeran por día y hora.
+        posiciones.sort(key=lambda p: (ORDEN_DIAS.get(filas[p].get('dia'), len(ORDEN_DIAS)),
+                                       _texto(filas[p].get('hora_inicio')), _texto(filas[p].get('aula'))))
+        for ordinal, posicion in enumerate(posiciones):
+            claves[posicion] = grupo + (ordinal,)
+    return claves
+
+
+def clave_de_fila(fila, ordinal):
+    return tuple(fila.get(campo) for campo in CAMPOS_CLAVE) + (ordinal,)
+
+
+def _sin_id(fila):
+    return {campo: valor for campo, valor in fila.items() if campo != 'id'}
+
+
+def calcular_delta(base, filas):
+    """Diferencia entre dos listas de filas en orden canónico (ver aplicar_delta)."""
+    anteriores = dict(zip(claves_estables(base), base))
+    nuevas = dict(zip(claves_estables(filas), filas))
+    # El resto de la clave sale de la propia fila: basta con guardar el ordinal.
+    delta = {
+        'agregados': [[clave[-1], fila] for clave, fila in nuevas.items() if clave not in anteriores],
+        'modificados': [
+            [clave[-1], fila] for clave, fila in nuevas.items()
+            if clave in anteriores and _sin_id(fila) != _sin_id(anteriores[clave])
+        ],
+        'eliminados': [list(clave) for clave in anteriores if clave not in nuevas],
+    }
+    # Los ids de Horario cambian en cada regeneración aunque nada más cambie: se guardan
+    # aparte, como una lista compacta, solo si alguno es distinto.
+    reconstruidas = aplicar_delta(base, delta)
+    if [fila.get('id') for fila in reconstruidas] != [fila.get('id') for fila in filas]:
+        delta['ids'] = [fila.get('id') for fila in filas]
+    return delta
+
+
+def aplicar_delta(base, delta):
+    filas = dict(zip(claves_estables(base), base))
+    for clave in delta.get('eliminados', ()):
+        filas.pop(tuple(clave), None)
+    for ordinal, fila in delta.get('modificados', []) + delta.get('agregados', []):
+        filas[clave_de_fila(fila, ordinal)] = fila
+    resultado = ordenar(filas.values())
+    if 'ids' in delta:
+        resultado = [{**fila, 'id': pk} for fila, pk in zip(resultado, delta['ids'])]
+    return resultado
+
+
+def tamano_delta(delta):
+    return len(delta['agregados']) + len(delta['modificados']) + len(delta['eliminados'])
+
+
+# --- Contenido comprimido ---
+
+def _columnar(valor):
+    # a_columnas toma las columnas de la primera fila: solo sirve si todas tienen las mismas claves.
+    if not isinstance(valor, list) or not valor or not all(isinstance(fila, dict) for fila in valor):
+        return False
+    claves = list(valor[0])
+    return all(list(fila) == claves for fila in valor)
+
+
+def _json(valor, **opciones):
+    return json.dumps(valor, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':'), **opciones)
+
+
+def huella_filas(filas):
+    """
+    SHA-256 de una lista de horarios en orden canónico, sin los ids: el generador vuelve a crear
+    todos los horarios en cada corrida, así que dos corridas con el mismo resultado solo
+    difieren en ellos (igual que en calcular_delta).
+    """
+    return hashlib.sha256(_json([_sin_id(fila) for fila in filas], sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def comprimir(valor):
+    """ContenidoVersion (sin guardar) con `valor` (lista de filas o delta) codificado y comprimido."""
+    formato = 'columnar' if _columnar(valor) else 'json'
+    if formato == 'columnar':
+        valor = a_columnas(valor)
+    texto = _json(valor)
+    return ContenidoVersion(formato=formato, datos=zlib.compress(texto.encode('utf-8'), 9))
+
+
+def descomprimir(contenido):
+    if contenido is None:
+        return None
+    valor = json.loads(zlib.decompress(bytes(contenido.datos)).decode('utf-8'))
+    return de_columnas(valor) if contenido.formato == 'columnar' else valor
+
+
+# --- Lectura y escritura de versiones ---
+
+def contenido_version(version):
+    """Lo que guarda la versión tal cual: la lista de horarios si es completa, si no el delta."""
+    valor = descomprimir(version.contenido)
+    if valor is None:
+        return [] if version.es_completa else {}
+    return valor
+
+
+def datos_version(version):
+    """Lista completa de horarios de la versión, reconstruida desde su última versión completa."""
+    cadena = [version]
+    while not cadena[-1].es_completa:
+        base = cadena[-1].version_base
+        if base is None:
+            raise ValueError(f"La versión '{cadena[-1].nombre_version}' no tiene versión base.")
+        cadena.append(base)
+    filas = contenido_version(cadena[-1])
+    for eslabon in reversed(cadena[:-1]):
+        filas = aplicar_delta(filas, contenido_version(eslabon))
+    return filas
+
+
+def _crear(nombre_version, valor, cantidad, **campos):
+    contenido = comprimir(valor)
+    contenido.save()
+    return VersionHorario.objects.create(
+        nombre_version=nombre_version, contenido=contenido, cantidad_horarios=cantidad,
+        tamano=len(contenido.datos), **campos,
+    )
+
+
+def guardar_version(nombre_version, filas):
+    """
+    Crea la versión `nombre_version` con los horarios `filas` (lista de dicts de HorarioSerializer)
+    como diferencia respecto de la última versión guardada, o completa si toca. Si ya hay una
+    versión idéntica, la nueva comparte su contenido (y su lugar en la cadena de diferencias).
+    """
+    filas = ordenar(filas)
+    huella = huella_filas(filas)
+    with transaction.atomic():
+        # Entre las idénticas se toma la de menor profundidad, para no alargar la cadena.
+        igual = (
+            VersionHorario.objects.select_related('contenido').filter(huella=huella)
+            .order_by('profundidad', '-fecha_guardado', '-id').first()
+        )
+        if igual is not None:
+            delta = calcular_delta(datos_version(igual), filas)
+            if 'ids' not in delta:
+                return VersionHorario.objects.create(
+                    nombre_version=nombre_version, huella=huella, contenido_id=igual.contenido_id,
+                    cantidad_horarios=igual.cantidad_horarios, tamano=igual.tamano, es_completa=igual.es_completa,
+                    version_base_id=igual.version_base_id, profundidad=igual.profundidad,
+                )
+            # Mismos horarios con otros ids: solo se guardan los ids, sobre la versión idéntica.
+            return _crear(nombre_version, delta, len(filas), huella=huella, es_completa=False,
+                          version_base=igual, profundidad=igual.profundidad + 1)
+        base = VersionHorario.objects.select_related('contenido').order_by('-fecha_guardado', '-id').first()
+        if base is not None and base.profundidad + 1 < settings.VERSIONES_CADA_COMPLETA:
+            delta = calcular_delta(datos_version(base), filas)
+            # Si cambió más de la mitad, una versión completa ocupa lo mismo y se lee más rápido.
+            if tamano_delta(delta) * 2 <= len(filas):
+                return _crear(nombre_version, delta, len(filas), huella=huella, es_completa=False,
+                              version_base=base, profundidad=base.profundidad + 1)
+        return _crear(nombre_version, filas, len(filas), huella=huella)
+
+
+def materializar(version):
+    """
+    Convierte una versión delta en completa (por ejemplo, antes de borrar su versión base).
+    Las versiones que dependen de ella conservan su profundidad anterior, que ahora es una
+    cota superior: a lo sumo adelantan la siguiente versión completa.
+    """
+    if version.es_completa:
+        return
+    with transaction.atomic():
+        anterior = version.contenido
+        filas = datos_version(version)
+        # Si ya hay una versión completa idéntica, ids incluidos (p. ej. otra que compartía este
+        # delta), se reutiliza su contenido.
+        igual = None
+        if version.huella:
+            candidatas = (
+                VersionHorario.objects.select_related('contenido')
+                .filter(huella=version.huella, es_completa=True).exclude(pk=version.pk)
+            )
+            igual = next((v for v in candidatas if contenido_version(v) == filas), None)
+        if igual is not None:
+            version.contenido_id, version.tamano = igual.contenido_id, igual.tamano
+        else:
+            contenido = comprimir(filas)
+            contenido.save()
+            version.contenido, version.tamano = contenido, len(contenido.datos)
+        version.es_completa = True
+        version.version_base = None
+        version.profundidad = 0
+        version.save(update_fields=['contenido', 'tamano', 'es_completa', 'version_base', 'profundidad'])
+        eliminar_si_huerfano(anterior)
+
+
+def eliminar_si_huerfano(contenido):
+    if contenido is not None and not contenido.versiones.exists():
+        contenido.delete()
+
+
+# --- Retención ---
+
+def es_automatica(version):
+    return version.nombre_version.startswith(PREFIJO_VERSION_AUTOMATICA)
+
+
+def versiones_a_podar(ahora=None, politica=None):
+    """
+    Versiones automáticas que la política de retención descarta (las con nombre propio se
+    conservan siempre): fuera de las ULTIMAS_AUTOMATICAS más recientes, se conserva la última
+    de cada día hasta DIAS_UNA_POR_DIA de antigüedad, la última de cada semana hasta
+    DIAS_UNA_POR_SEMANA, y ninguna más allá.
+    """
+    politica = politica or settings.VERSIONES_RETENCION
+    ahora = ahora or timezone.now()
+    automaticas = (
+        VersionHorario.objects.filter(nombre_version__startswith=PREFIJO_VERSION_AUTOMATICA)
+        .order_by('-fecha_guardado', '-id').only('id', 'nombre_version', 'fecha_guardado')
+    )
+    vistos, descartadas = set(), []
+    for posicion, version in enumerate(automaticas):
+        if posicion < politica['ULTIMAS_AUTOMATICAS']:
+            continue
+        antiguedad = ahora - version.fecha_guardado
+        fecha = timezone.localtime(version.fecha_guardado).date()
+        if antiguedad <= timedelta(days=politica['DIAS_UNA_POR_DIA']):
+            tramo = ('dia', fecha)
+        elif antiguedad <= timedelta(days=politica['DIAS_UNA_POR_SEMANA']):
+            tramo = ('semana',) + tuple(fecha.isocalendar())[:2]
+        else:
+            tramo = None
+        # Se recorre de la más reciente a la más antigua: se conserva la primera de cada tramo.
+        if tramo is None or tramo in vistos:
+            descartadas.append(version)
+        else:
+            vistos.add(tramo)
+    return descartadas
+
+
+def podar_versiones(ahora=None, politica=None):
+    """
+    Borra las versiones que descarta la política y los contenidos que quedan sin versión.
+    Se borran de la más reciente a la más antigua: así una versión delta que también se descarta
+    se va antes que su base, y solo se materializan (ver signals) las que se conservan.
+    Devuelve (versiones borradas, contenidos huérfanos borrados).
+    """
+    descartadas = versiones_a_podar(ahora, politica)
+    with transaction.atomic():
+        for version in descartadas:
+            version.delete()
+        huerfanos, _ = ContenidoVersion.objects.filter(versiones__isnull=True).delete()
+    return len(descartadas), huerfanos
+
+
+# --- Restauración ---
+
+REFERENCIAS = {'profesor': Profesor, 'materia': Materia, 'aula': Aula}
+CAMPOS_TEXTO = ('dia', 'tipo_clase', 'seccion', 'periodo_academico', 'carrera_programa')
+CAMPOS_UNICOS = ('aula_id', 'dia', 'hora_inicio', 'hora_fin', 'periodo_academico')
+
+
+def _entero(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _horario_de_fila(fila, existentes):
+    """Horario (sin guardar) de una fila de la versión; ValueError si no se puede restaurar."""
+    if not all(fila.get(campo) for campo in REFERENCIAS):
+        raise ValueError("IDs de profesor, materia o aula faltantes en los datos de la versión.")
+    ids = {campo: _entero(fila[campo]) for campo in REFERENCIAS}
+    faltantes = [f"No existe {campo} con ID {fila[campo]}" for campo in REFERENCIAS if ids[campo] not in existentes[campo]]
+    if faltantes:
+        raise ValueError('; '.join(faltantes))
+    try:
+        horas = {campo: time.fromisoformat(fila[campo]) for campo in ('hora_inicio', 'hora_fin')}
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Horas de inicio/fin faltantes o con formato inválido.")
+    if not fila.get('dia'):
+        raise ValueError("Día faltante en los datos de la versión.")
+    # Los campos ausentes toman el valor por defecto del modelo.
+    textos = {campo: fila[campo] for campo in CAMPOS_TEXTO if fila.get(campo) is not None}
+    return Horario(**{f'{campo}_id': pk for campo, pk in ids.items()}, **horas, **textos)
+
+
+def restaurar_version(version):
+    """
+    Reemplaza todos los horarios por los de la versión. Los profesores, materias y aulas
+    referenciados se leen con un in_bulk por modelo, las filas se validan en memoria y los
+    horarios se insertan con bulk_create. Devuelve (creados, errores): las filas con
+    referencias inexistentes o datos inválidos no se restauran y se informan una por una.
+    """
+    filas = datos_version(version)
+    existentes = {
+        campo: modelo.objects.only('pk').in_bulk({_entero(fila.get(campo)) for fila in filas} - {None})
+        for campo, modelo in REFERENCIAS.items()
+    }
+    horarios, errores, ocupadas = [], [], set()
+    for fila in filas:
+        try:
+            horario = _horario_de_fila(fila, existentes)
+            clave = tuple(getattr(horario, campo) for campo in CAMPOS_UNICOS)
+            if clave in ocupadas:
+                raise ValueError("Ya se restauró otro horario con la misma aula, día, horas y período.")
+            ocupadas.add(clave)
+            horarios.append(horario)
+        except ValueError as e:
+            errores.append(f"Error al restaurar horario (ID original {fila.get('id', 'N/A')}): {e}. Datos: {fila}")
+
+    with transaction.atomic():
+        # Borrar uno por uno (con señales) invalida las cachés de los horarios anteriores.
+        Horario.objects.all().delete()
+        creados = Horario.objects.bulk_create(horarios)
+        # bulk_create no dispara señales.
+        if creados:
+            marcar_cambio(COLECCIONES[Horario], periodos={h.periodo_academico for h in creados})
+            invalidar_grillas_de_horarios(creados)
+            marcar_nomina(creados)
+    return len(creados), errores
+
+
+# --- Comparación de versiones ---
+
+# Lo que define dónde y con quién se dicta un bloque; el resto de la clave estable identifica la clase.
+CAMPOS_UBICACION = ('dia', 'hora_inicio', 'hora_fin', 'aula', 'profesor')
+
+
+def _ubicacion(fila):
+    return tuple(fila.get(campo) for campo in CAMPOS_UBICACION)
+
+
+def _orden_en_clase(fila):
+    return ORDEN_DIAS.get(fila.get('dia'), len(ORDEN_DIAS)), _texto(fila.get('hora_inicio')), _texto(fila.get('aula'))
+
+
+def _resumen(agregados, eliminados, movidos, campo, nombre):
+    """Cambios por valor de `campo` (profesor o aula); un movimiento cuenta para el origen y el destino."""
+    resumen = {}
+
+    def contar(fila, tipo):
+        valor = fila.get(campo)
+        if valor not in resumen:
+            resumen[valor] = {campo: valor, nombre: fila.get(nombre), 'agregados': 0, 'eliminados': 0, 'movidos': 0}
+        resumen[valor][tipo] += 1
+
+    for fila in agregados:
+        contar(fila, 'agregados')
+    for fila in eliminados:
+        contar(fila, 'eliminados')
+    for movido in movidos:
+        contar(movido['antes'], 'movidos')
+        if movido['despues'].get(campo) != movido['antes'].get(campo):
+            contar(movido['despues'], 'movidos')
+    return sorted(resumen.values(), key=lambda r: (_texto(r[nombre]), _texto(r[campo])))
+
+
+def comparar_filas(anteriores, nuevas):
+    """
+    Diferencia entre dos listas de horarios (dicts de HorarioSerializer) en tiempo lineal.
+
+    Las filas se agrupan por clase (la clave estable sin el ordinal) con un diccionario. Dentro
+    de cada clase primero se emparejan los bloques con la misma ubicación (sin cambios); los
+    que quedan se emparejan por día y hora (movidos: cambió el día, las horas, el aula o el
+    profesor) y el sobrante son bloques agregados o eliminados. Así mover un bloque de una
+    clase no hace aparecer como movidos a los demás, como pasaría comparando por ordinal.
+    """
+    grupos = defaultdict(lambda: ([], []))
+    for lado, filas in enumerate((anteriores, nuevas)):
+        for fila in filas:
+            grupos[clave_de_fila(fila, None)[:-1]][lado].append(fila)
+
+    agregados, eliminados, movidos, sin_cambios = [], [], [], 0
+    for antes, despues in grupos.values():
+        pendientes = defaultdict(list)
+        for fila in antes:
+            pendientes[_ubicacion(fila)].append(fila)
+        sin_par = []
+        for fila in despues:
+            iguales = pendientes.get(_ubicacion(fila))
+            if iguales:
+                iguales.pop()
+                sin_cambios += 1
+            else:
+                sin_par.append(fila)
+        restantes = sorted((fila for filas in pendientes.values() for fila in filas), key=_orden_en_clase)
+        sin_par.sort(key=_orden_en_clase)
+        for anterior, nueva in zip(restantes, sin_par):
+            movidos.append({
+                'antes': anterior, 'despues': nueva,
+                'cambios': [campo for campo in CAMPOS_UBICACION if anterior.get(campo) != nueva.get(campo)],
+            })
+        eliminados.extend(restantes[len(sin_par):])
+        agregados.extend(sin_par[len(restantes):])
+
+    agregados, eliminados = ordenar(agregados), ordenar(eliminados)
+    movidos.sort(key=lambda movido: orden_canonico(movido['antes']))
+    return {
+        'totales': {'agregados': len(agregados), 'eliminados': len(eliminados), 'movidos': len(movidos), 'sin_cambios': sin_cambios},
+        'agregados': agregados,
+        'eliminados': eliminados,
+        'movidos': movidos,
+        'por_profesor': _resumen(agregados, eliminados, movidos, 'profesor', 'profesor_nombre'),
+        'por_aula': _resumen(agregados, eliminados, movidos, 'aula', 'aula_codigo'),
+    }
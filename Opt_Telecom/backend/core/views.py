@@ -1,9 +1,12 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
+from django.conf import settings
 from django.db import transaction
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
@@ -23,6 +26,27 @@ import pandas as pd
 import numpy as np # Importamos numpy para usar np.nan y pd.isna de forma más robusta
 import traceback # Importamos traceback para depuración
 
+from .analitica import REPORTES, obtener_reporte
+from .exportacion import COLUMNAS_HORARIO, COLUMNAS_SOLICITUD, TIPOS_CONTENIDO, respuesta_exportacion, respuesta_filas
+from .filtros import filtrar_horarios, filtrar_solicitudes
+from .mixins import CacheRespuestaMixin, CamposDinamicosViewMixin, ColeccionETagMixin, estadisticas_cache
+from .grilla import DIAS_LABORABLES, ORDEN_DIAS, PASO_MINIMO, obtener_grilla
+from .huecos import buscar_huecos
+from .lotes import AsignacionSolicitudes, ErrorLote, LoteHorarios, LoteSolicitudes
+from .nomina import encabezados_nomina, filas_exportacion_nomina, filas_nomina, tipos_de_clase, totales_nomina
+from .movimientos import ErrorMovimiento, aplicar_movimiento, conflictos_movimiento, planificar_movimiento
+from .ocupacion import filtro_solapamiento, recursos_compartidos
+from .pagination import HorarioCursorPagination, SolicitudClaseCursorPagination
+from .renderers import renderers_columnares
+from .validacion import PERIODO_POR_DEFECTO, validar_propuestas
+from .versionado import (
+    PREFIJO_VERSION_AUTOMATICA, comparar_filas, datos_version, guardar_version, restaurar_version,
+)
+from .importacion import (
+    CatalogoEntidades, ErrorImportacion, fila_a_dict, guardar_solicitudes, hora_desde_valor,
+    leer_libro, minutos_a_time, time_a_minutos, validar_solicitudes,
+)
+
 # --- Funciones Auxiliares (revisadas y mejoradas) ---
 
 def is_time_in_range(start_time, end_time, current_time):
@@ -43,82 +67,266 @@ def excel_time_to_python_time(excel_value):
     1. Números flotantes/enteros (representación interna de Excel para horas/fechas).
     2. Objetos datetime.time o datetime.datetime (si pandas ya los ha convertido).
     3. Cadenas de texto con varios formatos comunes de hora (HH:MM:SS, HH:MM, con/sin AM/PM).
+    Conserva los segundos. Para columnas completas usar `parsear_columna_horas`, que es
+    vectorizada y memoizada y trabaja en minutos.
     """
-    if pd.isna(excel_value) or excel_value is None or (isinstance(excel_value, str) and excel_value.strip() == ''):
-        return None  # Devuelve None si el valor está vacío o es NaN
-
-    if isinstance(excel_value, (float, int)):
-        if 0 <= excel_value < 1:  # Es una fracción de día (hora de Excel)
-            total_seconds = excel_value * 24 * 3600
-            hours, remainder = divmod(total_seconds, 3600)
-            minutes, seconds = divmod(remainder, 60)
-            return time(int(hours), int(minutes), int(seconds))
-        else:
-            # Podría ser una fecha-hora completa en formato de número de serie de Excel.
-            try:
-                # El origen '1899-12-30' es el estándar para Excel en Windows para números de serie de fecha/hora.
-                dt_obj = pd.to_datetime(excel_value, unit='D', origin='1899-12-30')
-                return dt_obj.time()
-            except Exception:
-                # Si no es una hora ni una fecha válida de Excel, podría ser un número arbitrario
-                # que no representa una hora. Se devuelve un error.
-                raise ValueError(f"No se pudo convertir el número de serie de Excel a hora o fecha/hora: '{excel_value}'")
-
-    elif isinstance(excel_value, time):
-        return excel_value
-    elif isinstance(excel_value, datetime):
-        return excel_value.time()
-    elif isinstance(excel_value, str):
-        cleaned_value = excel_value.strip()
-        formatos_hora = [
-            '%H:%M:%S', '%H:%M',           # 24-horas
-            '%I:%M:%S %p', '%I:%M %p',     # 12-horas con AM/PM (ej. "02:30:00 PM")
-            '%I:%M:%S %P', '%I:%M %P',     # 12-horas con am/pm (ej. "02:30:00 pm")
-            '%H.%M', '%H.%M.%S'            # Para formatos con puntos (ej. "14.30", "14.30.00")
-        ]
-        for fmt in formatos_hora:
-            try:
-                # Ajuste: Normalizamos a dos puntos SOLO si el valor de entrada contiene puntos
-                parsed_value = cleaned_value.replace('.', ':') if '.' in cleaned_value else cleaned_value
-                dt_obj = datetime.strptime(parsed_value, fmt)
-                return dt_obj.time()
-            except ValueError:
-                continue
-        raise ValueError(f"Formato de hora de cadena no reconocido: '{cleaned_value}'. Revise el formato del Excel.")
+    return hora_desde_valor(excel_value)
+
+def respuesta_lote(clase_lote, datos):
+    """Procesa un lote de crear/actualizar/eliminar y arma la respuesta con el resultado por elemento."""
+    try:
+        resultados, aplicado = clase_lote(datos).procesar()
+    except ErrorLote as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    errores = sum(1 for r in resultados if r['estado'] == 'error')
+    if not aplicado:
+        message = f"Lote cancelado: {errores} elemento(s) con errores y se pidió 'todo_o_nada'."
+        codigo = status.HTTP_400_BAD_REQUEST
+    elif errores:
+        message = f"Lote aplicado parcialmente: {len(resultados) - errores} elemento(s) correctos y {errores} con errores."
+        codigo = status.HTTP_207_MULTI_STATUS
     else:
-        raise TypeError(f"Tipo de dato inesperado para la hora: {type(excel_value).__name__} con valor '{excel_value}'")
-
-def clean_col_name(col):
-    """
-    Función para limpiar y normalizar un nombre de columna para el procesamiento de Excel.
-    """
-    return str(col).strip().lower().replace(' ', '_').replace('.', '').replace('-', '_').replace('á', 'a').replace('é', 'e').replace('í', 'i').replace('ó', 'o').replace('ú', 'u').replace('ñ', 'n')
+        message = f"Lote aplicado: {len(resultados)} elemento(s)."
+        codigo = status.HTTP_200_OK
+    return Response({"message": message, "aplicado": aplicado, "resultados": resultados}, status=codigo)
+
+def respuesta_exportar(request, queryset, columnas, nombre, titulo):
+    formato = request.query_params.get('formato', 'csv').lower()
+    if formato not in TIPOS_CONTENIDO:
+        return Response({"error": f"Formato no soportado: '{formato}'. Use 'csv' o 'xlsx'."}, status=status.HTTP_400_BAD_REQUEST)
+    periodo = request.query_params.get('periodo_academico')
+    nombre_archivo = f"{nombre}_{periodo}" if periodo else nombre
+    queryset = queryset.order_by('periodo_academico', 'carrera_programa', 'dia', 'hora_inicio', 'id')
+    return respuesta_exportacion(queryset, columnas, formato, nombre_archivo, titulo)
 
 # --- ViewSets existentes ---
-class ProfesorViewSet(viewsets.ModelViewSet):
+class ProfesorViewSet(CamposDinamicosViewMixin, CacheRespuestaMixin, viewsets.ModelViewSet):
+    # La carga horaria asignada depende de los horarios.
+    colecciones = ('profesores', 'horarios')
     queryset = Profesor.objects.all().order_by('apellido', 'nombre')
     serializer_class = ProfesorSerializer
     permission_classes = [AllowAny]
+    # ?ordering=-carga_horaria_asignada ordena por la carga anotada en la base de datos.
+    filter_backends = [OrderingFilter]
+    ordering_fields = ['nombre', 'apellido', 'carga_horaria_maxima', 'carga_horaria_asignada']
+
+    def get_queryset(self):
+        # La carga asignada se calcula con un único agregado SQL (sin N+1 sobre horarios_asignados).
+        # Se omite si no se pide (?fields=/?omit=) ni se usa para ordenar o filtrar.
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if (self.campo_solicitado('carga_horaria_asignada') or 'carga_horaria_asignada' in params.get('ordering', '')
+                or params.get('carga_min') or params.get('carga_max')):
+            queryset = queryset.con_carga_horaria()
+        # Filtros opcionales por carga asignada, en horas semanales: ?carga_min=10&carga_max=20
+        for param, lookup in (('carga_min', 'carga_horaria_asignada__gte'), ('carga_max', 'carga_horaria_asignada__lte')):
+            valor = self.request.query_params.get(param)
+            if valor:
+                try:
+                    queryset = queryset.filter(**{lookup: float(valor)})
+                except ValueError:
+                    raise ValidationError({param: f"Debe ser un número de horas, se recibió '{valor}'."})
+        return queryset
 
-class MateriaViewSet(viewsets.ModelViewSet):
-    queryset = Materia.objects.all().order_by('nombre')
+class MateriaViewSet(CamposDinamicosViewMixin, CacheRespuestaMixin, viewsets.ModelViewSet):
+    colecciones = ('materias', 'profesores')
+    # profesores_aptos (ids) y profesores_aptos_nombres salen de un único prefetch.
+    queryset = Materia.objects.prefetch_related('profesores_aptos').order_by('nombre')
     serializer_class = MateriaSerializer
     permission_classes = [AllowAny]
 
-class AulaViewSet(viewsets.ModelViewSet):
+class AulaViewSet(CamposDinamicosViewMixin, CacheRespuestaMixin, viewsets.ModelViewSet):
+    colecciones = ('aulas',)
     queryset = Aula.objects.all().order_by('codigo')
     serializer_class = AulaSerializer
     permission_classes = [AllowAny]
 
-class RestriccionViewSet(viewsets.ModelViewSet):
-    queryset = Restriccion.objects.all().order_by('tipo', 'nombre')
+class RestriccionViewSet(CamposDinamicosViewMixin, CacheRespuestaMixin, viewsets.ModelViewSet):
+    colecciones = ('restricciones', 'profesores', 'aulas', 'materias')
+    queryset = Restriccion.objects.select_related('profesor', 'aula', 'materia').order_by('tipo', 'nombre')
     serializer_class = RestriccionSerializer
     permission_classes = [AllowAny]
 
-class HorarioViewSet(viewsets.ModelViewSet):
-    queryset = Horario.objects.all().order_by('dia', 'hora_inicio')
+class HorarioViewSet(CamposDinamicosViewMixin, ColeccionETagMixin, viewsets.ModelViewSet):
+    colecciones = ('horarios', 'profesores', 'materias', 'aulas')
+    coleccion_por_periodo = 'horarios'
+    # El serializador (y Horario.__str__) usan profesor, materia y aula: se traen en el mismo JOIN.
+    queryset = Horario.objects.select_related('profesor', 'materia', 'aula').order_by('dia', 'hora_inicio')
     serializer_class = HorarioSerializer
     permission_classes = [AllowAny]
+    # Paginación por cursor sobre (dia, hora_inicio, id); admite ?page_size= hasta el máximo del servidor.
+    pagination_class = HorarioCursorPagination
+    # ?format=columnar (o msgpack) para descargas grandes como un período completo.
+    renderer_classes = renderers_columnares()
+
+    def get_queryset(self):
+        # Filtros del lado del servidor (?profesor=, ?aula=, ?periodo_academico=, ?desde=, ?hasta=, ...)
+        # para que las vistas por persona o aula sean una sola consulta indexada.
+        return filtrar_horarios(super().get_queryset(), self.request.query_params)
+
+    @action(detail=False, methods=['get'])
+    def grilla(self, request):
+        """
+        Grilla semanal lista para dibujar: ?periodo_academico=2025-1 y exactamente un ámbito entre
+        ?profesor=<id>, ?aula=<id>, ?materia=<id>&seccion=<sec> o ?carrera_programa=<nombre>.
+        ?paso=<minutos> fija el tamaño de la franja (por defecto se deduce de los horarios).
+        """
+        params = request.query_params
+        periodo = params.get('periodo_academico')
+        if not periodo:
+            return Response({"error": "El parámetro 'periodo_academico' es obligatorio."}, status=status.HTTP_400_BAD_REQUEST)
+
+        ambitos = []
+        if params.get('profesor'):
+            ambitos.append(('profesor', [params['profesor']]))
+        if params.get('aula'):
+            ambitos.append(('aula', [params['aula']]))
+        if params.get('materia') or params.get('seccion'):
+            ambitos.append(('seccion', [params.get('materia'), params.get('seccion')]))
+        if params.get('carrera_programa'):
+            ambitos.append(('carrera', [params['carrera_programa']]))
+        if len(ambitos) != 1 or None in ambitos[0][1]:
+            return Response(
+                {"error": "Indique exactamente un ámbito: 'profesor', 'aula', 'materia' con 'seccion', o 'carrera_programa'."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        ambito, valores = ambitos[0]
+
+        try:
+            if ambito in ('profesor', 'aula'):
+                valores = [int(valores[0])]
+            elif ambito == 'seccion':
+                valores = [int(valores[0]), valores[1]]
+            paso = int(params['paso']) if params.get('paso') else None
+        except ValueError:
+            return Response({"error": "Los identificadores y 'paso' deben ser números enteros."}, status=status.HTTP_400_BAD_REQUEST)
+        if paso is not None and not (PASO_MINIMO <= paso <= 240):
+            return Response({"error": f"'paso' debe estar entre {PASO_MINIMO} y 240 minutos."}, status=status.HTTP_400_BAD_REQUEST)
+
+        grilla, desde_cache = obtener_grilla(periodo, ambito, valores, paso=paso)
+        return Response({**grilla, 'desde_cache': desde_cache}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def huecos(self, request):
+        """
+        Opciones (día, inicio, aulas) en las que un profesor puede dictar un bloque de ?duracion= minutos:
+        ?profesor=&duracion=&periodo_academico=&materia=&seccion=&tipo_aula=&recursos=a,b&capacidad=
+        &dias=LUN,MAR&desde=07:00&hasta=22:00&paso=30. Los requisitos de aula salen de la materia,
+        salvo que se indiquen ?tipo_aula= o ?recursos=.
+        """
+        params = request.query_params
+        try:
+            profesor_id = int(params['profesor'])
+            duracion = int(params['duracion'])
+            paso = int(params.get('paso', 30))
+            materia_id = int(params['materia']) if params.get('materia') else None
+            capacidad = int(params['capacidad']) if params.get('capacidad') else None
+            desde = time_a_minutos(time.fromisoformat(params.get('desde', '07:00')))
+            hasta = time_a_minutos(time.fromisoformat(params.get('hasta', '22:00')))
+        except KeyError as e:
+            return Response({"error": f"Falta el parámetro {e}."}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response({"error": "'profesor', 'materia', 'duracion', 'paso' y 'capacidad' deben ser números; 'desde' y 'hasta', horas HH:MM."}, status=status.HTTP_400_BAD_REQUEST)
+        if duracion <= 0 or paso < PASO_MINIMO or desde >= hasta:
+            return Response({"error": f"'duracion' debe ser positiva, 'paso' de al menos {PASO_MINIMO} minutos y 'desde' anterior a 'hasta'."}, status=status.HTTP_400_BAD_REQUEST)
+        dias = [dia.strip().upper() for dia in params['dias'].split(',')] if params.get('dias') else DIAS_LABORABLES
+        if any(dia not in ORDEN_DIAS for dia in dias):
+            return Response({"error": f"Días no válidos. Use: {', '.join(ORDEN_DIAS)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        profesor = Profesor.objects.filter(pk=profesor_id).values('id', 'disponibilidad').first()
+        if profesor is None:
+            return Response({"error": f"No existe profesor con ID {profesor_id}."}, status=status.HTTP_404_NOT_FOUND)
+        requisitos = None
+        if materia_id is not None:
+            materia = Materia.objects.filter(pk=materia_id).values('requisitos_de_aula').first()
+            if materia is None:
+                return Response({"error": f"No existe materia con ID {materia_id}."}, status=status.HTTP_404_NOT_FOUND)
+            requisitos = materia['requisitos_de_aula']
+        if params.get('tipo_aula') or params.get('recursos'):
+            requisitos = {
+                'tipo_aula': params.get('tipo_aula'),
+                'recursos_minimos': [r.strip() for r in params.get('recursos', '').split(',') if r.strip()],
+            }
+
+        periodo = params.get('periodo_academico', PERIODO_POR_DEFECTO)
+        opciones, aulas = buscar_huecos(
+            profesor, duracion, periodo, dias, desde, hasta, paso, requisitos=requisitos,
+            materia_id=materia_id, seccion=params.get('seccion'), capacidad_minima=capacidad,
+        )
+        return Response({
+            'periodo_academico': periodo,
+            'duracion': duracion,
+            'total': sum(len(opcion['aulas']) for opcion in opciones),
+            'opciones': [{
+                'dia': opcion['dia'],
+                'hora_inicio': minutos_a_time(opcion['inicio']).strftime('%H:%M'),
+                'hora_fin': minutos_a_time(opcion['fin']).strftime('%H:%M'),
+                'aulas': opcion['aulas'],
+            } for opcion in opciones],
+            'aulas': {aula_id: aulas[aula_id]['codigo'] for aula_id in {a for opcion in opciones for a in opcion['aulas']}},
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Descarga los horarios filtrados (?periodo_academico=, ?carrera_programa=, ?profesor=, ?aula=, ...)
+        en CSV o XLSX (?formato=csv|xlsx). Se genera en streaming, fila por fila.
+        """
+        return respuesta_exportar(
+            request, filtrar_horarios(Horario.objects.all(), request.query_params),
+            COLUMNAS_HORARIO, 'horarios', 'Horarios',
+        )
+
+    @action(detail=False, methods=['post'])
+    def lote(self, request):
+        """
+        Crea, actualiza y elimina varios horarios en una sola transacción:
+        {"crear": [...], "actualizar": [{"id": ..., ...}], "eliminar": [ids], "todo_o_nada": false}.
+        Los solapamientos de profesor, aula o sección se rechazan por elemento.
+        """
+        return respuesta_lote(LoteHorarios, request.data)
+
+    @action(detail=False, methods=['post'])
+    def validar(self, request):
+        """
+        Revisa ubicaciones propuestas sin guardar nada: {"propuestas": [{profesor, aula, materia,
+        seccion, dia, hora_inicio, hora_fin, periodo_academico, tipo_clase?, id?}, ...]}.
+        Devuelve los conflictos de cada propuesta (ocupación, restricciones, disponibilidad y
+        requisitos de aula), incluidos los choques entre propuestas del mismo lote.
+        """
+        propuestas = request.data.get('propuestas') if isinstance(request.data, dict) else request.data
+        if not isinstance(propuestas, list):
+            return Response({"error": "Se esperaba una lista de propuestas en 'propuestas'."}, status=status.HTTP_400_BAD_REQUEST)
+        resultados = validar_propuestas(propuestas)
+        return Response({
+            'valido': all(resultado['valida'] for resultado in resultados),
+            'resultados': resultados,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'])
+    def mover(self, request, pk=None):
+        """
+        Mueve el horario a otro día, hora y (opcionalmente) aula: {"dia", "hora_inicio", "hora_fin"?, "aula"?},
+        o lo intercambia con otro: {"intercambiar_con": id}. Sin "hora_fin" se conserva la duración.
+        Con "simular": true solo se revisan los conflictos (para el arrastre en el calendario).
+        """
+        try:
+            movidos = planificar_movimiento(pk, request.data)
+        except ErrorMovimiento as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        conflictos = conflictos_movimiento(movidos)
+        if str(request.data.get('simular', False)).lower() in ('true', '1'):
+            return Response({'valido': not conflictos, 'conflictos': conflictos}, status=status.HTTP_200_OK)
+        if conflictos:
+            return Response({"error": "El movimiento genera conflictos.", 'conflictos': conflictos}, status=status.HTTP_409_CONFLICT)
+
+        aplicar_movimiento(movidos)
+        horarios = Horario.objects.select_related('profesor', 'materia', 'aula').filter(pk__in=[n['id'] for _, n in movidos])
+        return Response({
+            "message": f"Se movieron {len(movidos)} horario(s) exitosamente.",
+            'horarios': HorarioSerializer(horarios, many=True).data,
+        }, status=status.HTTP_200_OK)
 
     # La vista `generar_horarios` ahora reside en `GenerarHorariosView` (APIView)
     # y no en HorarioViewSet. Por lo tanto, la eliminamos de aquí.
@@ -135,17 +343,43 @@ class HorarioViewSet(viewsets.ModelViewSet):
 
 # --- NUEVOS VIEWSETS Y APIViews ---
 
-class SolicitudClaseViewSet(viewsets.ModelViewSet):
-    queryset = SolicitudClase.objects.all().order_by('periodo_academico', 'materia__nombre', 'seccion')
+class SolicitudClaseViewSet(CamposDinamicosViewMixin, ColeccionETagMixin, viewsets.ModelViewSet):
+    colecciones = ('solicitudes', 'materias', 'profesores', 'aulas')
+    coleccion_por_periodo = 'solicitudes'
+    queryset = SolicitudClase.objects.select_related('materia', 'profesor', 'aula').order_by('periodo_academico', 'materia__nombre', 'seccion')
     serializer_class = SolicitudClaseSerializer
     permission_classes = [AllowAny]
+    pagination_class = SolicitudClaseCursorPagination
+    renderer_classes = renderers_columnares()
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        estado = self.request.query_params.get('estado', None)
-        if estado:
-            queryset = queryset.filter(estado=estado)
-        return queryset
+        # ?estado=, ?periodo_academico=, ?carrera_programa=, ?profesor=, ?aula=, ... (ver filtros.py)
+        return filtrar_solicitudes(super().get_queryset(), self.request.query_params)
+
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """Descarga las solicitudes filtradas en CSV o XLSX (?formato=csv|xlsx), en streaming."""
+        return respuesta_exportar(
+            request, filtrar_solicitudes(SolicitudClase.objects.all(), request.query_params),
+            COLUMNAS_SOLICITUD, 'solicitudes', 'Solicitudes',
+        )
+
+    @action(detail=False, methods=['post'])
+    def lote(self, request):
+        """
+        Igual que /horarios/lote/ para solicitudes. Las solicitudes idénticas se rechazan;
+        los solapamientos se informan como advertencias, como en la importación de Excel.
+        """
+        return respuesta_lote(LoteSolicitudes, request.data)
+
+    @action(detail=False, methods=['post'])
+    def asignar_lote(self, request):
+        """
+        Asigna varias solicitudes pendientes en una sola transacción:
+        {"asignaciones": [{"solicitud": id, "aula": id, "dia", "hora_inicio", "hora_fin"}, ...], "todo_o_nada": false}.
+        Crea un horario por solicitud y la marca como 'Asignada'; los choques se revisan en memoria.
+        """
+        return respuesta_lote(AsignacionSolicitudes, request.data)
 
     @action(detail=False, methods=['delete'])
     def clear_all(self, request):
@@ -153,70 +387,31 @@ class SolicitudClaseViewSet(viewsets.ModelViewSet):
         return Response({'message': f'Se eliminaron {count} solicitudes de clase.'}, status=status.HTTP_204_NO_CONTENT)
 
 
-class VersionHorarioViewSet(viewsets.ModelViewSet):
+class VersionHorarioViewSet(CamposDinamicosViewMixin, ColeccionETagMixin, viewsets.ModelViewSet):
+    colecciones = ('versiones',)
     queryset = VersionHorario.objects.all().order_by('-fecha_guardado')
     serializer_class = VersionHorarioSerializer
     permission_classes = [AllowAny]
 
     @action(detail=True, methods=['post'])
     def restore(self, request, pk=None):
-        version = get_object_or_404(VersionHorario, pk=pk)
+        version = get_object_or_404(VersionHorario.objects.select_related('contenido'), pk=pk)
         
         try:
-            with transaction.atomic():
-                # Eliminar todos los horarios actuales antes de restaurar
-                Horario.objects.all().delete()
+            # Reemplaza todos los horarios actuales por los de la versión (ver versionado.restaurar_version).
+            restored_count, errors = restaurar_version(version)
 
-                restored_count = 0
-                errors = []
-                
-                # Iterar sobre los datos de la versión y crear nuevos objetos Horario
-                for horario_data in version.datos_horario_json:
-                    try:
-                        # Necesitamos obtener las instancias de Profesor, Materia y Aula por sus IDs
-                        profesor_id = horario_data.get('profesor')
-                        materia_id = horario_data.get('materia')
-                        aula_id = horario_data.get('aula')
-
-                        # Asegurarse de que los IDs no sean None antes de buscar
-                        if not all([profesor_id, materia_id, aula_id]):
-                            raise ValueError("IDs de profesor, materia o aula faltantes en los datos de la versión.")
-
-                        profesor = get_object_or_404(Profesor, pk=profesor_id)
-                        materia = get_object_or_404(Materia, pk=materia_id)
-                        aula = get_object_or_404(Aula, pk=aula_id)
-
-                        # Conversión segura de horas de string a objetos time
-                        hora_inicio = time.fromisoformat(horario_data['hora_inicio'])
-                        hora_fin = time.fromisoformat(horario_data['hora_fin'])
-
-                        Horario.objects.create(
-                            profesor=profesor,
-                            materia=materia,
-                            aula=aula,
-                            dia=horario_data['dia'],
-                            hora_inicio=hora_inicio,
-                            hora_fin=hora_fin,
-                            tipo_clase=horario_data.get('tipo_clase'),
-                            seccion=horario_data.get('seccion'),
-                            periodo_academico=horario_data.get('periodo_academico'),
-                            carrera_programa=horario_data.get('carrera_programa')
-                        )
-                        restored_count += 1
-                    except Exception as e:
-                        errors.append(f"Error al restaurar horario (ID original {horario_data.get('id', 'N/A')}): {e}. Datos: {horario_data}")
-                
-                if errors:
-                    # Si hay errores, no necesariamente es un rollback total, pero se reportan los errores.
-                    # El 200 OK con mensaje de advertencia es adecuado si algunos se restauraron.
-                    return Response({
-                        "message": f"Se restauraron {restored_count} horarios. Errores al restaurar algunos: {len(errors)}.",
-                        "errors": errors
-                    }, status=status.HTTP_200_OK)
-                else:
-                    return Response({
-                        "message": f"Versión de horario '{version.nombre_version}' restaurada exitosamente. Se crearon {restored_count} horarios."
-                    }, status=status.HTTP_200_OK)
+            if errors:
+                # Si hay errores, no necesariamente es un rollback total, pero se reportan los errores.
+                # El 200 OK con mensaje de advertencia es adecuado si algunos se restauraron.
+                return Response({
+                    "message": f"Se restauraron {restored_count} horarios. Errores al restaurar algunos: {len(errors)}.",
+                    "errors": errors
+                }, status=status.HTTP_200_OK)
+            else:
+                return Response({
+                    "message": f"Versión de horario '{version.nombre_version}' restaurada exitosamente. Se crearon {restored_count} horarios."
+                }, status=status.HTTP_200_OK)
         except Exception as e:
             traceback.print_exc()
             return Response({'error': f'Error general al intentar restaurar la versión: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -229,13 +424,41 @@ class VersionHorarioViewSet(viewsets.ModelViewSet):
         Esta vista no modifica la base de datos, solo retorna los datos para ser usados por el frontend.
         """
         version = self.get_object()
-        horarios_data_from_json = version.datos_horario_json
+        horarios_data_from_json = datos_version(version)
 
         return Response({
             'message': f'Versión "{version.nombre_version}" cargada. Datos de horario devueltos.',
             'horarios_data': horarios_data_from_json
         }, status=status.HTTP_200_OK)
 
+    @staticmethod
+    def horarios_actuales():
+        horarios = Horario.objects.select_related('profesor', 'materia', 'aula').order_by('dia', 'hora_inicio')
+        return HorarioSerializer(horarios, many=True).data
+
+    @action(detail=True, methods=['get'])
+    def comparar(self, request, pk=None):
+        """
+        Diferencia entre esta versión y otra (?con=<id>) o, sin ?con, los horarios actuales:
+        bloques agregados, eliminados y movidos, con un resumen por profesor y por aula.
+        """
+        version = self.get_object()
+        con = request.query_params.get('con')
+        if con is None:
+            otra, nuevas = None, self.horarios_actuales()
+        else:
+            try:
+                otra = VersionHorario.objects.select_related('contenido').get(pk=int(con))
+            except (ValueError, VersionHorario.DoesNotExist):
+                return Response({'error': f"No existe la versión '{con}' para comparar."}, status=status.HTTP_404_NOT_FOUND)
+            nuevas = datos_version(otra)
+        diferencia = comparar_filas(datos_version(version), nuevas)
+        return Response({
+            'desde': {'id': version.id, 'nombre_version': version.nombre_version},
+            'hasta': {'id': otra.id, 'nombre_version': otra.nombre_version} if otra else {'id': None, 'nombre_version': 'Horario actual'},
+            **diferencia,
+        }, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['post'])
     def guardar_actual(self, request):
         """
@@ -246,14 +469,8 @@ class VersionHorarioViewSet(viewsets.ModelViewSet):
         if not nombre_version:
             return Response({'error': 'El nombre de la versión es requerido para guardar.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        horarios_actuales = Horario.objects.all().order_by('dia', 'hora_inicio')
-        datos_para_json = HorarioSerializer(horarios_actuales, many=True).data
-
         try:
-            version = VersionHorario.objects.create(
-                nombre_version=nombre_version,
-                datos_horario_json=datos_para_json
-            )
+            version = guardar_version(nombre_version, self.horarios_actuales())
             serializer = VersionHorarioSerializer(version)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except Exception as e:
@@ -261,6 +478,81 @@ class VersionHorarioViewSet(viewsets.ModelViewSet):
             return Response({'error': f'No se pudo guardar la versión del horario: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class EstadisticasCacheView(APIView):
+    """
+    Aciertos y fallos de la caché de respuestas de los catálogos (profesores, materias,
+    aulas y restricciones) desde el último reinicio de la caché.
+    """
+    permission_classes = [AllowAny]
+    CATALOGOS = ('profesor', 'materia', 'aula', 'restriccion')
+
+    def get(self, request, *args, **kwargs):
+        return Response(estadisticas_cache(self.CATALOGOS), status=status.HTTP_200_OK)
+
+
+class AnaliticaView(APIView):
+    """
+    Reportes para los tableros, por período (?periodo_academico=):
+    /analitica/ocupacion-aulas/ (?dias=LUN,MAR&desde=7&hasta=22, horas enteras),
+    /analitica/carga-profesores/ y /analitica/horas-carrera/.
+    Se sirven desde la caché hasta que cambian los horarios del período.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, reporte=None, *args, **kwargs):
+        if reporte not in REPORTES:
+            return Response({"error": f"Reporte desconocido: '{reporte}'. Use: {', '.join(REPORTES)}."}, status=status.HTTP_404_NOT_FOUND)
+        params = request.query_params
+        opciones = {}
+        if reporte == 'ocupacion-aulas':
+            try:
+                desde, hasta = int(params.get('desde', 7)), int(params.get('hasta', 22))
+            except ValueError:
+                return Response({"error": "'desde' y 'hasta' deben ser horas enteras (0-24)."}, status=status.HTTP_400_BAD_REQUEST)
+            dias = [dia.strip().upper() for dia in params['dias'].split(',')] if params.get('dias') else DIAS_LABORABLES
+            if not 0 <= desde < hasta <= 24 or any(dia not in ORDEN_DIAS for dia in dias):
+                return Response({"error": f"Use 0 <= desde < hasta <= 24 y días entre: {', '.join(ORDEN_DIAS)}."}, status=status.HTTP_400_BAD_REQUEST)
+            opciones = {'dias': tuple(dias), 'desde': desde, 'hasta': hasta}
+
+        datos, desde_cache = obtener_reporte(reporte, params.get('periodo_academico', PERIODO_POR_DEFECTO), **opciones)
+        return Response({**datos, 'desde_cache': desde_cache}, status=status.HTTP_200_OK)
+
+
+class NominaView(APIView):
+    """
+    Horas de docencia por profesor para la nómina (?periodo_academico=, ?semanas=), desglosadas
+    por tipo de clase, con totales por categoría, régimen y dedicación. ?formato=csv|xlsx
+    descarga el reporte en streaming. Se lee del resumen persistido (ResumenNomina).
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        periodo = params.get('periodo_academico', PERIODO_POR_DEFECTO)
+        formato = params.get('formato', 'json').lower()
+        try:
+            semanas = int(params.get('semanas', settings.NOMINA_SEMANAS_POR_PERIODO))
+        except ValueError:
+            return Response({"error": "'semanas' debe ser un número entero."}, status=status.HTTP_400_BAD_REQUEST)
+        if formato != 'json' and formato not in TIPOS_CONTENIDO:
+            return Response({"error": f"Formato no soportado: '{formato}'. Use 'json', 'csv' o 'xlsx'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        tipos = tipos_de_clase(periodo)
+        filas = filas_nomina(periodo, tipos, semanas)
+        if formato != 'json':
+            return respuesta_filas(
+                filas_exportacion_nomina(filas, tipos), encabezados_nomina(tipos), formato, f'nomina_{periodo}', 'Nómina',
+            )
+        filas = list(filas)
+        return Response({
+            'periodo_academico': periodo,
+            'semanas': semanas,
+            'tipos_clase': tipos,
+            'totales': totales_nomina(filas, tipos, semanas),
+            'profesores': filas,
+        }, status=status.HTTP_200_OK)
+
+
 # --- VISTA PARA IMPORTAR SOLICITUDES DE CLASE DESDE EXCEL ---
 class ImportarHorariosExcelView(APIView):
     permission_classes = [AllowAny]
@@ -274,207 +566,85 @@ class ImportarHorariosExcelView(APIView):
         if not file.name.lower().endswith(('.xls', '.xlsx')):
             return Response({'error': 'Formato de archivo no soportado. Por favor, sube un archivo Excel (.xls o .xlsx).'}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            df = pd.read_excel(file)
-
-            # Normalización más robusta de nombres de columnas
-            df.columns = [clean_col_name(col) for col in df.columns]
-
-            # Mapeo de nombres de columnas normalizados a los nombres esperados en nuestro código
-            # Agregamos 'carrera_programa_excel' como posible alias si la carrera viene del mismo campo que el periodo.
-            column_aliases = {
-                'dia': ['dia', 'day'],
-                'hora_inicio': ['hora_inicio', 'hora_ini', 'start_time'],
-                'hora_fin': ['hora_fin', 'hora_final', 'end_time'],
-                'profesor': ['profesor', 'nombre_profesor', 'profesor_nombre'],
-                'materia': ['materia', 'nombre_materia'],
-                'aula': ['aula', 'codigo_aula', 'nombre_aula'],
-                'tipo_clase': ['tipo_clase', 'clase_tipo', 'class_type'],
-                'seccion': ['seccion', 'section', 'seccion_num'],
-                'periodo_academico_carrera': ['periodo_academico_carrera', 'periodo_academico', 'periodo_carrera'] # Campo combinado de Excel
-            }
+        # Modo de validación en seco: ejecuta toda la normalización y validación en memoria
+        # sin escribir nada en la base de datos (pensado para llamarse en vivo desde el formulario).
+        dry_run = str(request.data.get('dry_run', request.query_params.get('dry_run', ''))).lower() in ('1', 'true', 'si', 'sí', 'yes')
+        # Hojas a importar separadas por coma (por defecto, todas las del libro: una por carrera).
+        hojas = [h.strip() for h in str(request.data.get('hojas', request.query_params.get('hojas', ''))).split(',') if h.strip()]
 
-            # Definir las columnas que realmente esperamos para crear la SolicitudClase.
-            # NO esperamos un campo combinado 'periodo_academico_carrera_programa' en el DataFrame final,
-            # sino que procesaremos 'periodo_academico_carrera' del Excel para obtener 'periodo_academico' y 'carrera_programa'.
-            required_excel_columns_for_processing = [
-                'dia', 'hora_inicio', 'hora_fin',
-                'profesor', 'materia', 'aula',
-                'tipo_clase', 'seccion', 'periodo_academico_carrera' # Aquí esperamos el campo combinado del Excel
+        try:
+            # Todas las hojas se leen de una vez; las que no tienen las columnas requeridas
+            # se reportan como error de hoja sin detener al resto.
+            try:
+                resultados = leer_libro(file.read(), hojas=hojas)
+            except ErrorImportacion as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            hojas_validas = [r for r in resultados if r.error is None]
+            if not hojas_validas:
+                return Response({'error': resultados[0].error if resultados else 'El libro no contiene hojas.'}, status=status.HTTP_400_BAD_REQUEST)
+            originales = {r.nombre: r.df for r in hojas_validas}
+
+            # Validación sobre el conjunto unificado (los duplicados entre hojas también se detectan),
+            # con resolución de entidades contra lookups en memoria y cruce con las solicitudes existentes.
+            catalogo = CatalogoEntidades.desde_bd()
+            norm = pd.concat([r.norm for r in hojas_validas], ignore_index=True)
+            norm, conflictos = validar_solicitudes(norm, catalogo)
+
+            errors = [
+                {'hoja': hoja, 'fila': int(fila), 'error': error, 'data': fila_a_dict(originales[hoja], fila - 2)}
+                for hoja, fila, error in norm.loc[norm['error'].notna(), ['hoja', 'fila', 'error']].itertuples(index=False)
             ]
-            
-            # Verificar si todas las columnas requeridas existen en el DataFrame después de la normalización
-            for expected_col_key, possible_names in column_aliases.items():
-                found = False
-                for pn in possible_names:
-                    if pn in df.columns:
-                        found = True
-                        break
-                if not found and expected_col_key in [col for col_list in column_aliases.values() for col in col_list]: # Solo si es una columna esperada en el input
-                    if expected_col_key in required_excel_columns_for_processing: # Y si es una de las que sí o sí necesitamos
-                        return Response({
-                            'error': f'Columna requerida faltante o con nombre incorrecto en el archivo Excel: "{expected_col_key}" (posibles nombres: {", ".join(possible_names)}). Por favor, revise su archivo.'
-                        }, status=status.HTTP_400_BAD_REQUEST)
-
-            created_solicitudes = []
-            errors = []
-            imported_count = 0
-
-            # Diccionario para mapear días de la semana (ej. 'Lunes' a 'LUN')
-            dias_map = {
-                'lunes': 'LUN', 'lun': 'LUN',
-                'martes': 'MAR', 'mar': 'MAR',
-                'miércoles': 'MIE', 'miercoles': 'MIE', 'mie': 'MIE',
-                'jueves': 'JUE', 'jue': 'JUE',
-                'viernes': 'VIE', 'vie': 'VIE',
-                'sábado': 'SAB', 'sabado': 'SAB', 'sab': 'SAB',
-                'domingo': 'DOM', 'dom': 'DOM',
-            }
+            validas = norm[norm['error'].isna()]
 
-            for index, row in df.iterrows():
-                try:
-                    with transaction.atomic():
-                        # Obtener valores de la fila de forma segura, usando aliases si es necesario
-                        # Y manejar valores NaN/None con cadenas vacías
-                        def get_row_value(row, aliases):
-                            for alias in aliases:
-                                if alias in row and pd.notna(row[alias]):
-                                    return str(row[alias]).strip()
-                            return ""
-
-                        profesor_full_name = get_row_value(row, column_aliases['profesor'])
-                        materia_nombre = get_row_value(row, column_aliases['materia'])
-                        aula_codigo = get_row_value(row, column_aliases['aula'])
-                        tipo_clase = get_row_value(row, column_aliases['tipo_clase'])
-                        seccion_str = get_row_value(row, column_aliases['seccion'])
-                        periodo_carrera_excel = get_row_value(row, column_aliases['periodo_academico_carrera'])
-                        dia_excel = get_row_value(row, column_aliases['dia'])
-
-                        hora_inicio_excel = row[next((alias for alias in column_aliases['hora_inicio'] if alias in row), None)]
-                        hora_fin_excel = row[next((alias for alias in column_aliases['hora_fin'] if alias in row), None)]
-
-                        # Validaciones de datos básicos
-                        if not all([profesor_full_name, materia_nombre, aula_codigo, tipo_clase, seccion_str, periodo_carrera_excel, dia_excel]):
-                            raise ValueError("Una o más columnas críticas están vacías.")
-
-                        # 1. Procesar Profesor: Obtener o crear
-                        profesor_parts = profesor_full_name.split(' ', 1)
-                        nombre_profesor = profesor_parts[0] if profesor_parts else ""
-                        apellido_profesor = profesor_parts[1] if len(profesor_parts) > 1 else ""
-
-                        if not nombre_profesor: # Si el nombre está vacío, no se puede buscar/crear
-                            raise ValueError("El nombre del profesor está vacío.")
-
-                        profesor, created_prof = Profesor.objects.get_or_create(
-                            nombre=nombre_profesor,
-                            apellido=apellido_profesor,
-                            defaults={
-                                'especialidad': 'General',
-                                'carga_horaria_maxima': 40
-                            }
-                        )
-
-                        # 2. Procesar Materia: Obtener o crear
-                        if not materia_nombre:
-                            raise ValueError("El nombre de la materia está vacío.")
-                            
-                        materia, created_mat = Materia.objects.get_or_create(
-                            nombre=materia_nombre,
-                            defaults={
-                                'horas_semanales': 0,
-                                'horas_teoricas': 0,
-                                'horarios_de_practicas': 0,
-                                'horario_de_laboratorio': 0,
-                                'secciones_disponibles': 1,
-                            }
-                        )
-                        # NOTA: Si el modelo Materia tuviera 'carrera_principal', deberías añadirlo aquí en defaults.
-                        # Asumiendo que no lo tiene basándonos en tu FieldError anterior.
-
-                        # 3. Procesar Aula: Obtener o crear
-                        if not aula_codigo:
-                            raise ValueError("El código del aula está vacío.")
-
-                        aula, created_aula = Aula.objects.get_or_create(
-                            codigo=aula_codigo,
-                            defaults={
-                                'capacidad': 0,
-                                'tipo': 'General',
-                            }
-                        )
-
-                        # 4. Procesar Día y Horas
-                        dia_normalizado = dias_map.get(dia_excel.lower(), None)
-                        if dia_normalizado is None:
-                            raise ValueError(f"Día de la semana no reconocido: '{dia_excel}'.")
-
-                        hora_inicio = excel_time_to_python_time(hora_inicio_excel)
-                        hora_fin = excel_time_to_python_time(hora_fin_excel)
-
-                        if hora_inicio is None or hora_fin is None:
-                            raise ValueError("Las horas de inicio o fin no son válidas.")
-                        if hora_inicio >= hora_fin and not (hora_inicio > hora_fin and hora_fin < time(6,0)): # Permite cruzar medianoche de 23:00 a 02:00, pero no inválidos.
-                             raise ValueError("La hora de inicio debe ser anterior a la hora de fin, o el rango debe cruzar la medianoche de forma válida.")
-
-                        # 5. Procesar Periodo Académico y Carrera/Programa
-                        periodo_academico = "N/A"
-                        carrera_programa = "N/A"
-                        
-                        # Intenta parsear el formato "YYYY-P Carrera Nombre" o "YYYY-P"
-                        if ' ' in periodo_carrera_excel:
-                            parts_periodo_carrera = periodo_carrera_excel.split(' ', 1)
-                            periodo_academico = parts_periodo_carrera[0].strip()
-                            carrera_programa = parts_periodo_carrera[1].strip()
-                        else:
-                            periodo_academico = periodo_carrera_excel.strip()
-                            # Si no hay carrera en el string, la asumimos de la materia si aplica,
-                            # o un valor por defecto si no.
-                            # Para el caso de la solicitud, 'carrera_programa' proviene del Excel o de un default.
-                            carrera_programa = "No Especificada en Excel"
-
-                        # Construir el JSON para requisitos_aula_sugeridos (opcional, si el frontend lo usa)
-                        requisitos_aula_sugeridos_json = {
-                            'aula_codigo_sugerida': aula_codigo,
-                            'dia_sugerido': dia_normalizado,
-                            'hora_inicio_sugerida': hora_inicio.isoformat(),
-                            'hora_fin_sugerida': hora_fin.isoformat(),
-                        }
-
-                        # 6. Crear SolicitudClase
-                        solicitud = SolicitudClase.objects.create(
-                            materia=materia,
-                            profesor=profesor,
-                            aula=aula, # El aula sugerida directamente del Excel
-                            dia=dia_normalizado,
-                            hora_inicio=hora_inicio,
-                            hora_fin=hora_fin,
-                            tipo_clase=tipo_clase,
-                            seccion=seccion_str,
-                            periodo_academico=periodo_academico,
-                            carrera_programa=carrera_programa,
-                            requisitos_aula_sugeridos=requisitos_aula_sugeridos_json,
-                            estado='Pendiente'
-                        )
-                        created_solicitudes.append(solicitud)
-                        imported_count += 1
-
-                except Exception as e:
-                    errors.append({
-                        'fila': index + 2,
-                        'error': str(e),
-                        'data': row.to_dict()
+            def resumen_hojas(importadas):
+                resumen = []
+                for r in resultados:
+                    if r.error is not None:
+                        resumen.append({'hoja': r.nombre, 'filas': 0, 'importadas': 0, 'errores': 0, 'error': r.error})
+                        continue
+                    filas_hoja = norm[norm['hoja'] == r.nombre]
+                    resumen.append({
+                        'hoja': r.nombre,
+                        'filas': len(filas_hoja),
+                        'importadas': int(importadas.get(r.nombre, 0)),
+                        'errores': int(filas_hoja['error'].notna().sum()),
+                        'error': None,
                     })
+                return resumen
 
-            if errors:
+            if dry_run:
+                return Response({
+                    'dry_run': True,
+                    'message': f'Validación completada: {len(validas)} filas válidas y {len(errors)} con errores. No se guardó ningún cambio.',
+                    'total_filas': len(norm),
+                    'filas_validas': len(validas),
+                    'hojas': resumen_hojas(validas['hoja'].value_counts()),
+                    'errors': errors,
+                    'conflictos': conflictos,
+                    'entidades_nuevas': catalogo.entidades_nuevas(norm),
+                }, status=status.HTTP_200_OK)
+
+            # Escritura en bloque al final, en una sola transacción.
+            with transaction.atomic():
+                created_solicitudes = guardar_solicitudes(validas, catalogo)
+            imported_count = len(created_solicitudes)
+            hojas_resumen = resumen_hojas(validas['hoja'].value_counts())
+
+            if errors or any(h['error'] for h in hojas_resumen):
                 return Response({
                     'message': f'Se procesaron {imported_count} solicitudes. Se encontraron {len(errors)} errores. Revise los detalles.',
                     'solicitudes_creadas': SolicitudClaseSerializer(created_solicitudes, many=True).data,
-                    'errors': errors
+                    'hojas': hojas_resumen,
+                    'errors': errors,
+                    'conflictos': conflictos
                 }, status=status.HTTP_207_MULTI_STATUS)
             else:
                 return Response({
                     'message': f'Se importaron {imported_count} solicitudes exitosamente.',
-                    'solicitudes_creadas': SolicitudClaseSerializer(created_solicitudes, many=True).data
+                    'solicitudes_creadas': SolicitudClaseSerializer(created_solicitudes, many=True).data,
+                    'hojas': hojas_resumen,
+                    'conflictos': conflictos
                 }, status=status.HTTP_201_CREATED)
 
         except Exception as e:
@@ -483,6 +653,13 @@ class ImportarHorariosExcelView(APIView):
 
 
 # --- VISTA PARA ASIGNAR SOLICITUD A HORARIO ---
+MENSAJES_CONFLICTO_ASIGNACION = {
+    'aula': 'El aula ya está ocupada en ese horario para este período.',
+    'profesor': 'El profesor ya está ocupado en ese horario para este período.',
+    'seccion': 'Ya existe un horario para esta materia y sección en el slot seleccionado.',
+}
+
+
 class AsignarSolicitudAHorarioView(APIView):
     permission_classes = [AllowAny]
 
@@ -522,39 +699,31 @@ class AsignarSolicitudAHorarioView(APIView):
 
             if horario_serializer.is_valid():
                 with transaction.atomic():
-                    # Antes de guardar, verificar conflictos de horario para el aula, profesor, y sección
-                    # Conflicto de aula: ¿Está el aula ocupada en ese día y franja horaria?
-                    if Horario.objects.filter(
-                        aula_id=horario_data['aula'],
-                        dia=horario_data['dia'],
-                        hora_inicio=horario_data['hora_inicio'],
-                        hora_fin=horario_data['hora_fin'],
-                        periodo_academico=horario_data['periodo_academico']
-                    ).exists():
-                        return Response({'error': 'El aula ya está ocupada en ese horario para este período.'}, status=status.HTTP_409_CONFLICT) # 409 Conflict
-
-                    # Conflicto de profesor: ¿Está el profesor ocupado en ese día y franja horaria?
-                    if Horario.objects.filter(
-                        profesor_id=horario_data['profesor'],
-                        dia=horario_data['dia'],
-                        hora_inicio=horario_data['hora_inicio'],
-                        hora_fin=horario_data['hora_fin'],
-                        periodo_academico=horario_data['periodo_academico']
-                    ).exists():
-                        return Response({'error': 'El profesor ya está ocupado en ese horario para este período.'}, status=status.HTTP_409_CONFLICT)
-
-                    # Conflicto de sección: ¿Ya hay una clase asignada para la misma materia y sección en ese slot?
-                    # Esto evita duplicados para la misma sección
-                    if Horario.objects.filter(
-                        materia_id=horario_data['materia'],
-                        seccion=horario_data['seccion'],
-                        dia=horario_data['dia'],
-                        hora_inicio=horario_data['hora_inicio'],
-                        hora_fin=horario_data['hora_fin'],
-                        periodo_academico=horario_data['periodo_academico']
-                    ).exists():
-                        return Response({'error': 'Ya existe un horario para esta materia y sección en el slot seleccionado.'}, status=status.HTTP_409_CONFLICT)
-
+                    # Antes de guardar, verificar conflictos de aula, profesor y sección con una sola
+                    # consulta de solapamiento (no solo franjas idénticas).
+                    registro = {
+                        'profesor_id': horario_data['profesor'],
+                        'aula_id': horario_data['aula'],
+                        'materia_id': horario_data['materia'],
+                        'seccion': horario_data['seccion'],
+                        'dia': horario_data['dia'],
+                        'hora_inicio': horario_data['hora_inicio'],
+                        'hora_fin': horario_data['hora_fin'],
+                        'periodo_academico': horario_data['periodo_academico'],
+                    }
+                    conflictos = list(
+                        Horario.objects.filter(filtro_solapamiento(registro)).order_by()
+                        .values('id', 'profesor_id', 'aula_id', 'materia_id', 'seccion', 'dia', 'hora_inicio', 'hora_fin')
+                    )
+                    if conflictos:
+                        recursos = {recurso for otro in conflictos for recurso in recursos_compartidos(registro, otro)}
+                        recurso = next(r for r in ('aula', 'profesor', 'seccion') if r in recursos)
+                        return Response({
+                            'error': MENSAJES_CONFLICTO_ASIGNACION[recurso],
+                            'conflictos': [
+                                {'horario': otro['id'], 'recursos': recursos_compartidos(registro, otro)} for otro in conflictos
+                            ],
+                        }, status=status.HTTP_409_CONFLICT) # 409 Conflict
 
                     horario = horario_serializer.save()
                     solicitud.estado = 'Asignada'
@@ -594,8 +763,8 @@ class GenerarHorariosView(APIView):
                 profesores = Profesor.objects.all()
                 materias = Materia.objects.all()
                 aulas = Aula.objects.all()
-                restricciones = Restriccion.objects.all()
-                solicitudes_pendientes = SolicitudClase.objects.filter(estado='Pendiente').order_by('materia__nombre', 'seccion', 'dia', 'hora_inicio')
+                restricciones = Restriccion.objects.select_related('profesor', 'aula', 'materia')
+                solicitudes_pendientes = SolicitudClase.objects.filter(estado='Pendiente').select_related('materia', 'profesor', 'aula').order_by('materia__nombre', 'seccion', 'dia', 'hora_inicio')
 
 
                 # 3. Validar que existan datos básicos para la generación
@@ -884,8 +1053,8 @@ class GenerarHorariosView(APIView):
                 # Al final de la generación exitosa, se puede guardar una "versión"
                 try:
                     # Genera un nombre de versión por defecto. Puedes permitir que el usuario lo provea en la request.
-                    nombre_version_auto = f"Algoritmo {timezone.now().strftime('%Y-%m-%d %H:%M')}"
-                    current_horarios = Horario.objects.all() # Obtener todos los horarios creados por el algoritmo
+                    nombre_version_auto = f"{PREFIJO_VERSION_AUTOMATICA}{timezone.now().strftime('%Y-%m-%d %H:%M')}"
+                    current_horarios = Horario.objects.select_related('profesor', 'materia', 'aula') # Obtener todos los horarios creados por el algoritmo
                     version_data = {
                         'nombre_version': nombre_version_auto,
                         'datos_horario_json': HorarioSerializer(current_horarios, many=True).data
@@ -906,7 +1075,7 @@ class GenerarHorariosView(APIView):
                 "carga_profesores_final": carga_horaria_profesor_actual,
                 # Puedes agregar más detalles si lo deseas, ej. solicitudes no asignadas
                 "solicitudes_pendientes_tras_algoritmo": SolicitudClaseSerializer(
-                    SolicitudClase.objects.filter(estado='Pendiente'), many=True
+                    SolicitudClase.objects.filter(estado='Pendiente').select_related('materia', 'profesor', 'aula'), many=True
                 ).data
             }, status=status.HTTP_200_OK)
 
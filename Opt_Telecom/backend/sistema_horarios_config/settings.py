@@ -222,4 +222,29 @@ CORS_ALLOW_METHODS = [
 #     'x-requested-with',
 # ]
 
-# CORS_ALLOW_CREDENTIALS = True # Si tu frontend necesita enviar cookies de origen cruzado (ej. para sesiones)
\ No newline at end of file
+# CORS_ALLOW_CREDENTIALS = True # Si tu frontend necesita enviar cookies de origen cruzado (ej. para sesiones)
+# Caché
+# =====
+# Guarda las grillas semanales, las versiones de colección (ETag) y las respuestas de los
+# catálogos. Con varios procesos de servidor conviene un backend compartido, por ejemplo
+# 'django.core.cache.backends.filebased.FileBasedCache' con LOCATION en un directorio común.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sistema-horarios',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+# Segundos que se conserva una respuesta cacheada; las escrituras la invalidan antes vía señales.
+RESPUESTAS_CACHE_TIEMPO = 60 * 60
+# Semanas lectivas de un período académico (horas del período = horas semanales x semanas).
+NOMINA_SEMANAS_POR_PERIODO = 16
+# Cada cuántas versiones de horario se guarda una completa (las demás guardan solo diferencias).
+VERSIONES_CADA_COMPLETA = 10
+# Retención de las versiones automáticas ("Algoritmo ..."), aplicada con `manage.py podar_versiones`.
+# Las versiones con nombre propio no se borran nunca.
+VERSIONES_RETENCION = {
+    'ULTIMAS_AUTOMATICAS': 20,  # Las N automáticas más recientes se conservan siempre.
+    'DIAS_UNA_POR_DIA': 30,  # De las demás, hasta esta antigüedad se conserva la última de cada día,
+    'DIAS_UNA_POR_SEMANA': 180,  # luego la última de cada semana; las más antiguas se borran.
+}